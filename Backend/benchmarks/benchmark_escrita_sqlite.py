@@ -0,0 +1,111 @@
+"""
+Vazão de escrita do histórico de simulações por perfil do SQLite ('padrao' x 'otimizado').
+
+Reproduz o padrão de /simular-direto: cada simulação é um INSERT seguido de COMMIT, em uma
+sessão própria, com várias threads escrevendo ao mesmo tempo. Cada perfil usa um banco novo
+em uma pasta temporária (o banco da aplicação não é tocado).
+
+Uso (a partir da pasta Backend):
+    python -m benchmarks.benchmark_escrita_sqlite [--threads 8] [--commits 250] [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+PASTA_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PASTA_BACKEND not in sys.path:
+    sys.path.insert(0, PASTA_BACKEND)
+
+from db import crud, models  # noqa: E402
+from db.database import PERFIS_SQLITE, criar_engine, pragmas_em_uso  # noqa: E402
+
+REGISTRO = {
+    "idade": 18, "sexo": "Feminino", "raca_beneficiario": "Parda", "pcd": False,
+    "regiao_beneficiario": "Nordeste", "modalidade_ensino": "Presencial", "nome_turno": "Noturno",
+    "modalidade_concorrencia": "Ampla concorrência", "nome_curso": "Direito",
+    "nome_instituicao": "UNIVERSIDADE PAULISTA", "classificacao": "Bolsa Parcial",
+}
+
+
+def medir_perfil(perfil: str, threads: int, commits_por_thread: int) -> dict:
+    pasta = tempfile.mkdtemp(prefix=f"bench_sqlite_{perfil}_")
+    engine = criar_engine(f"sqlite:///{os.path.join(pasta, 'bench.db')}", perfil)
+    models.Base.metadata.create_all(bind=engine)
+    Sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    latencias = [[] for _ in range(threads)]
+    erros = []
+    largada = threading.Barrier(threads + 1)
+
+    def escrever(posicao: int):
+        largada.wait()
+        for _ in range(commits_por_thread):
+            inicio = time.perf_counter_ns()
+            db = Sessao()
+            try:
+                crud.inserir_simulacoes(db, [dict(REGISTRO)])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                erros.append(str(e))
+            finally:
+                db.close()
+            latencias[posicao].append(time.perf_counter_ns() - inicio)
+
+    trabalhadores = [threading.Thread(target=escrever, args=(i,)) for i in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    duracao = time.perf_counter() - inicio
+
+    tempos = np.concatenate([np.asarray(lista, dtype=np.float64) for lista in latencias]) / 1e6
+    pragmas = pragmas_em_uso(engine)
+    engine.dispose()
+    return {
+        "threads": threads,
+        "commits": int(len(tempos)),
+        "erros": len(erros),
+        "commits_por_s": round(len(tempos) / duracao, 1),
+        "p50_ms": round(float(np.percentile(tempos, 50)), 3),
+        "p95_ms": round(float(np.percentile(tempos, 95)), 3),
+        "p99_ms": round(float(np.percentile(tempos, 99)), 3),
+        "pragmas": pragmas,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vazão de escrita do SQLite por perfil do engine.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=250, help="Commits por thread")
+    parser.add_argument("--perfis", nargs="+", default=list(PERFIS_SQLITE), choices=list(PERFIS_SQLITE))
+    parser.add_argument("--saida", default=None, help="Grava o resultado em JSON")
+    argumentos = parser.parse_args()
+
+    resultado = {"data": datetime.now(timezone.utc).isoformat(), "perfis": {}}
+    for perfil in argumentos.perfis:
+        caso = medir_perfil(perfil, argumentos.threads, argumentos.commits)
+        resultado["perfis"][perfil] = caso
+        print(
+            f"{perfil:<10} {caso['commits_por_s']:>9,.1f} commits/s  p50 {caso['p50_ms']:>8.3f} ms  "
+            f"p99 {caso['p99_ms']:>8.3f} ms  erros {caso['erros']}"
+        )
+
+    if argumentos.saida:
+        with open(argumentos.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"✅ Resultado gravado em {argumentos.saida}")
+
+
+if __name__ == "__main__":
+    main()
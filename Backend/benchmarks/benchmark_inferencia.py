@@ -0,0 +1,272 @@
+"""
+Micro-benchmarks do caminho de inferência (codificação, predict e /simular-direto).
+
+Usa o bundle real do modelo (db/modelo.bundle) e perfis sintéticos gerados a partir dos próprios
+vocabulários do modelo, com semente fixa. Tudo roda offline, em CPU: as requisições HTTP passam
+pelo TestClient do FastAPI, com um banco SQLite temporário no lugar do banco da aplicação.
+
+Uso (a partir da pasta Backend):
+    python -m benchmarks.benchmark_inferencia executar [--repeticoes 200] [--lote 256] [--saida resultado.json]
+    python -m benchmarks.benchmark_inferencia comparar base.json atual.json [--limiar 10]
+
+O resultado (JSON) traz p50/p95/p99 e média em ms e linhas/s para cada caso, além do ambiente
+(versões, CPU, modelo). `comparar` mostra a variação do p50 entre duas execuções e termina com
+código 1 se algum caso piorou mais que o limiar (%).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+PASTA_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PASTA_BACKEND not in sys.path:
+    sys.path.insert(0, PASTA_BACKEND)
+
+from db import ml_model  # noqa: E402  (depois do ajuste do sys.path)
+
+TURNOS = ["Matutino", "Vespertino", "Noturno", "Integral", "Curso a distância"]
+RACAS = ["Branca", "Preta", "Parda", "Amarela", "Indígena"]
+REGIOES = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+
+
+def gerar_requisicoes(n: int, semente: int = 42) -> List[Dict[str, Any]]:
+    """Corpos de /simular-direto; ~80% das IES e cursos dentro do Top-N, o resto fora."""
+    contexto = ml_model.obter_contexto()
+    ies, cursos = sorted(contexto.top_ies), sorted(contexto.top_cursos)
+    rng = random.Random(semente)
+    requisicoes = []
+    for i in range(n):
+        requisicoes.append({
+            "idade": rng.randint(17, 60),
+            "modalidade_concorrencia": rng.choice(["Ampla concorrência", "Cotas"]),
+            "pcd": rng.random() < 0.05,
+            "sexo": rng.choice(["Masculino", "Feminino"]),
+            "raca_beneficiario": rng.choice(RACAS),
+            "regiao_beneficiario": rng.choice(REGIOES),
+            "modalidade_ensino": rng.choice(["Presencial", "EAD"]),
+            "nome_turno": rng.choice(TURNOS),
+            "nome_curso": rng.choice(cursos) if cursos and rng.random() < 0.8 else f"Curso {i}",
+            "nome_instituicao": rng.choice(ies) if ies and rng.random() < 0.8 else f"Instituição {i}",
+        })
+    return requisicoes
+
+
+def _features(requisicao: Dict[str, Any]) -> Dict[str, Any]:
+    # Mesmo formato que o router monta para a IA
+    return {
+        "IDADE": requisicao["idade"],
+        "SEXO_BENEFICIARIO_BOLSA": requisicao["sexo"][0],
+        "STATUS_DEFICIENCIA_TEXT": "Sim" if requisicao["pcd"] else "Não",
+        "RACA_BENEFICIARIO_BOLSA": requisicao["raca_beneficiario"],
+        "REGIAO_BENEFICIARIO_BOLSA": requisicao["regiao_beneficiario"],
+        "MODALIDADE_ENSINO_BOLSA": requisicao["modalidade_ensino"],
+        "NOME_TURNO_CURSO_BOLSA": requisicao["nome_turno"],
+        "MODALIDADE_CONCORRENCIA": requisicao["modalidade_concorrencia"],
+        "NOME_IES_BOLSA": requisicao["nome_instituicao"].upper(),
+        "NOME_CURSO_BOLSA": requisicao["nome_curso"],
+    }
+
+
+@contextmanager
+def _sem_cache():
+    """Desliga o cache de predições durante o caso (mede o custo real de cada predição)."""
+    capacidade = ml_model.CACHE_PREDICOES.capacidade
+    ml_model.CACHE_PREDICOES.capacidade = 0
+    try:
+        yield
+    finally:
+        ml_model.CACHE_PREDICOES.capacidade = capacidade
+        ml_model.CACHE_PREDICOES.limpar()
+
+
+def medir(funcao: Callable[[int], Any], repeticoes: int, linhas_por_chamada: int = 1, aquecimento: int = 5) -> dict:
+    """Executa `funcao(i)` várias vezes e resume as latências."""
+    for i in range(aquecimento):
+        funcao(i)
+    tempos = np.empty(repeticoes, dtype=np.float64)
+    for i in range(repeticoes):
+        inicio = time.perf_counter_ns()
+        funcao(i)
+        tempos[i] = time.perf_counter_ns() - inicio
+    tempos /= 1e6  # ms
+    return {
+        "repeticoes": repeticoes,
+        "linhas_por_chamada": linhas_por_chamada,
+        "p50_ms": round(float(np.percentile(tempos, 50)), 4),
+        "p95_ms": round(float(np.percentile(tempos, 95)), 4),
+        "p99_ms": round(float(np.percentile(tempos, 99)), 4),
+        "media_ms": round(float(tempos.mean()), 4),
+        "linhas_por_s": round(linhas_por_chamada * repeticoes / (tempos.sum() / 1000), 1),
+    }
+
+
+def _casos_modelo(repeticoes: int, lote: int) -> Dict[str, dict]:
+    requisicoes = gerar_requisicoes(max(repeticoes, lote) + 16)
+    features = [_features(requisicao) for requisicao in requisicoes]
+    contexto = ml_model.obter_contexto()
+    codificador = contexto.codificador
+    unitario = lambda i: features[i % len(features)]  # noqa: E731
+    matriz_lote = codificador.codificar(features[:lote], contar=False)
+
+    casos = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        casos["codificacao_pandas_1"] = medir(
+            lambda i: ml_model.pre_processar_features(unitario(i)), max(20, repeticoes // 10)
+        )
+    casos["codificacao_1"] = medir(lambda i: codificador.codificar(unitario(i), contar=False), repeticoes)
+    casos[f"codificacao_{lote}"] = medir(
+        lambda i: codificador.codificar(features[:lote], contar=False), max(10, repeticoes // 10), lote
+    )
+    casos["predict_1"] = medir(lambda i: ml_model._prever(contexto, matriz_lote[i % lote:i % lote + 1]), repeticoes)
+    casos[f"predict_{lote}"] = medir(lambda i: ml_model._prever(contexto, matriz_lote), max(10, repeticoes // 10), lote)
+    with _sem_cache():
+        casos["classificar_bolsa_sem_cache"] = medir(lambda i: ml_model.classificar_bolsa(unitario(i)), repeticoes)
+        casos[f"classificar_bolsa_lote_{lote}_sem_cache"] = medir(
+            lambda i: ml_model.classificar_bolsa_lote(features[:lote]), max(10, repeticoes // 10), lote
+        )
+    ml_model.classificar_bolsa(features[0])
+    casos["classificar_bolsa_cache_quente"] = medir(lambda i: ml_model.classificar_bolsa(features[0]), repeticoes)
+    return casos
+
+
+def _casos_http(repeticoes: int, lote: int) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import main
+    from db import models
+    from db.database import get_db
+
+    # Banco temporário: o benchmark não escreve no banco da aplicação
+    pasta = tempfile.mkdtemp(prefix="bench_prouni_")
+    engine = create_engine(f"sqlite:///{os.path.join(pasta, 'bench.db')}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    Sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db_temporario():
+        db = Sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[get_db] = get_db_temporario
+    requisicoes = gerar_requisicoes(max(repeticoes, lote) + 16, semente=7)
+    casos = {}
+    try:
+        with TestClient(main.app) as cliente, _sem_cache():
+            def simular(i):
+                resposta = cliente.post("/simular-direto", json=requisicoes[i % len(requisicoes)])
+                assert resposta.status_code == 200, resposta.text
+
+            def simular_lote(i):
+                resposta = cliente.post("/simular-direto/lote", json=requisicoes[:lote])
+                assert resposta.status_code == 200, resposta.text
+
+            casos["http_simular_direto"] = medir(simular, repeticoes)
+            casos[f"http_simular_direto_lote_{lote}"] = medir(simular_lote, max(10, repeticoes // 10), lote)
+    finally:
+        main.app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+    return casos
+
+
+def _ambiente() -> dict:
+    import sklearn
+
+    contexto = ml_model.obter_contexto()
+    return {
+        "data": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "modelo_versao": contexto.versao,
+        "backend_inferencia": ml_model.estatisticas_inferencia()["backend_em_uso"],
+    }
+
+
+def executar(repeticoes: int, lote: int, incluir_http: bool) -> dict:
+    casos = _casos_modelo(repeticoes, lote)
+    if incluir_http:
+        casos.update(_casos_http(repeticoes, lote))
+    return {"ambiente": _ambiente(), "casos": casos}
+
+
+def comparar(base: dict, atual: dict, limiar: float) -> bool:
+    """Imprime a variação de p50/p99 por caso; retorna True se algum p50 piorou além do limiar (%)."""
+    regrediu = False
+    print(f"{'caso':<42} {'p50 base':>10} {'p50 atual':>10} {'Δ p50':>8} {'Δ p99':>8}")
+    for nome in sorted(set(base["casos"]) | set(atual["casos"])):
+        antes, depois = base["casos"].get(nome), atual["casos"].get(nome)
+        if antes is None or depois is None:
+            print(f"{nome:<42} {'(só em ' + ('atual' if antes is None else 'base') + ')':>21}")
+            continue
+        delta_p50 = (depois["p50_ms"] / antes["p50_ms"] - 1) * 100 if antes["p50_ms"] else 0.0
+        delta_p99 = (depois["p99_ms"] / antes["p99_ms"] - 1) * 100 if antes["p99_ms"] else 0.0
+        marca = ""
+        if delta_p50 > limiar:
+            marca, regrediu = " ⚠️", True
+        print(
+            f"{nome:<42} {antes['p50_ms']:>10.4f} {depois['p50_ms']:>10.4f} "
+            f"{delta_p50:>+7.1f}% {delta_p99:>+7.1f}%{marca}"
+        )
+    return regrediu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do caminho de inferência.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    rodar = subcomandos.add_parser("executar", help="Executa os benchmarks e grava o JSON")
+    rodar.add_argument("--repeticoes", type=int, default=200)
+    rodar.add_argument("--lote", type=int, default=256, help="Tamanho dos casos em lote")
+    rodar.add_argument("--saida", default=None, help="Arquivo JSON (padrão: benchmarks/resultados/<data>.json)")
+    rodar.add_argument("--sem-http", action="store_true", help="Pula os casos via TestClient")
+
+    diff = subcomandos.add_parser("comparar", help="Compara dois resultados")
+    diff.add_argument("base")
+    diff.add_argument("atual")
+    diff.add_argument("--limiar", type=float, default=10.0, help="Piora máxima aceita no p50 (%%)")
+
+    argumentos = parser.parse_args()
+    if argumentos.comando == "comparar":
+        with open(argumentos.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        with open(argumentos.atual, encoding="utf-8") as arquivo:
+            atual = json.load(arquivo)
+        sys.exit(1 if comparar(base, atual, argumentos.limiar) else 0)
+
+    resultado = executar(argumentos.repeticoes, argumentos.lote, not argumentos.sem_http)
+    saida = argumentos.saida or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "resultados",
+        datetime.now().strftime("%Y%m%d-%H%M%S") + ".json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+    for nome, caso in resultado["casos"].items():
+        print(
+            f"{nome:<42} p50 {caso['p50_ms']:>9.4f} ms  p95 {caso['p95_ms']:>9.4f} ms  "
+            f"p99 {caso['p99_ms']:>9.4f} ms  {caso['linhas_por_s']:>12,.0f} linhas/s"
+        )
+    print(f"✅ Resultado gravado em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Agendador de inferência em micro-lotes.
+
+Requisições simultâneas de simulação entram em uma fila; uma thread dedicada junta os itens
+que chegam dentro de uma janela curta (ex: 2 ms ou 64 linhas) e faz um único predict em lote
+(`ml_model.classificar_bolsa_lote`). Cada chamador recebe o seu resultado por um Future.
+Se o predict do lote falhar, os itens são preditos um a um: um item inválido não derruba os
+outros chamadores do mesmo lote. Itens cujo chamador já desistiu (Future cancelado, ex: cliente
+desconectado) são descartados antes do predict, e nenhum erro de um lote encerra a thread.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from . import ml_model
+from .cronometro import etapa
+from .config import AGENDADOR_ATIVO, AGENDADOR_JANELA_MS, AGENDADOR_MAX_LOTE, AGENDADOR_MAX_FILA
+
+
+class AgendadorInferencia:
+    """Agrupa chamadas concorrentes em lotes e as executa em uma thread dedicada."""
+
+    def __init__(
+        self,
+        funcao_lote: Callable[[Sequence[Dict[str, Any]]], List[str]],
+        janela_ms: float,
+        max_lote: int,
+        max_fila: int,
+    ):
+        self.funcao_lote = funcao_lote
+        self.janela_s = max(0.0, janela_ms) / 1000.0
+        self.max_lote = max(1, max_lote)
+        self.max_fila = max(1, max_fila)
+
+        self._fila: "queue.Queue[Optional[Tuple[Dict[str, Any], Future]]]" = queue.Queue(maxsize=self.max_fila)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.lotes = 0
+        self.linhas = 0
+        self.maior_lote = 0
+        self.fila_maxima = 0
+        self.recusados_fila_cheia = 0
+        self.lotes_com_erro = 0
+        self.tempo_predicao_s = 0.0
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="agendador-inferencia", daemon=True)
+                self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Processa o que já está na fila e encerra a thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._fila.put(None)
+            thread.join(timeout)
+
+    def enviar(self, dados: Dict[str, Any]) -> Optional[Future]:
+        """Enfileira um item; retorna None se a fila estiver cheia (o chamador prediz direto)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.iniciar()
+        futuro: Future = Future()
+        try:
+            self._fila.put_nowait((dados, futuro))
+        except queue.Full:
+            self.recusados_fila_cheia += 1
+            return None
+        profundidade = self._fila.qsize()
+        if profundidade > self.fila_maxima:
+            self.fila_maxima = profundidade
+        return futuro
+
+    def _coletar_lote(self, primeiro: Tuple[Dict[str, Any], Future]) -> Tuple[List[Tuple[Dict[str, Any], Future]], bool]:
+        """Junta itens até encher o lote ou estourar a janela. Retorna (lote, encerrar)."""
+        lote = [primeiro]
+        limite = time.monotonic() + self.janela_s
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _prever_um_a_um(self, lote: List[Tuple[Dict[str, Any], Future]]) -> None:
+        """Após a falha do lote: cada item é predito sozinho, e só o item com problema recebe o erro."""
+        self.lotes_com_erro += 1
+        for dados, futuro in lote:
+            try:
+                resultado = self.funcao_lote([dados])[0]
+            except Exception as e:
+                futuro.set_exception(e)
+            else:
+                futuro.set_result(resultado)
+
+    def _processar(self, lote: List[Tuple[Dict[str, Any], Future]]) -> None:
+        # Marca os Futures como em execução (não podem mais ser cancelados) e descarta os cancelados
+        lote = [(dados, futuro) for dados, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+
+        inicio = time.perf_counter()
+        try:
+            resultados = self.funcao_lote([dados for dados, _ in lote])
+        except Exception as e:
+            if len(lote) == 1:
+                lote[0][1].set_exception(e)
+            else:
+                self._prever_um_a_um(lote)
+        else:
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+
+        self.tempo_predicao_s += time.perf_counter() - inicio
+        self.lotes += 1
+        self.linhas += len(lote)
+        self.maior_lote = max(self.maior_lote, len(lote))
+
+    def _executar(self) -> None:
+        encerrar = False
+        while not encerrar:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                break
+            lote, encerrar = self._coletar_lote(primeiro)
+            try:
+                self._processar(lote)
+            except Exception as e:
+                # Nenhum lote pode derrubar a thread: quem ainda espera recebe o erro
+                print(f"⚠️ Erro no agendador de inferência. Detalhe: {e}")
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def estatisticas(self) -> dict:
+        return {
+            "ativo": AGENDADOR_ATIVO,
+            "janela_ms": self.janela_s * 1000.0,
+            "max_lote": self.max_lote,
+            "max_fila": self.max_fila,
+            "fila_atual": self._fila.qsize(),
+            "fila_maxima": self.fila_maxima,
+            "lotes": self.lotes,
+            "linhas": self.linhas,
+            "tamanho_medio_lote": round(self.linhas / self.lotes, 2) if self.lotes else 0.0,
+            "maior_lote": self.maior_lote,
+            "recusados_fila_cheia": self.recusados_fila_cheia,
+            "lotes_com_erro": self.lotes_com_erro,
+            "tempo_medio_predicao_ms": round(self.tempo_predicao_s * 1000.0 / self.lotes, 3) if self.lotes else 0.0,
+        }
+
+
+AGENDADOR = AgendadorInferencia(
+    funcao_lote=ml_model.classificar_bolsa_lote,
+    janela_ms=AGENDADOR_JANELA_MS,
+    max_lote=AGENDADOR_MAX_LOTE,
+    max_fila=AGENDADOR_MAX_FILA,
+)
+
+
+async def classificar_bolsa_async(dados_candidato: Dict[str, Any]) -> str:
+    """
+    Equivalente assíncrono de `ml_model.classificar_bolsa`.
+    Com o agendador ativo, a predição entra no próximo micro-lote; sem ele (ou com a fila cheia),
+    roda direto no threadpool. Acertos de cache respondem sem passar pela fila.
+    """
+    with etapa("cache"):
+        classificacao = ml_model.classificacao_em_cache(dados_candidato)
+    if classificacao is not None:
+        return classificacao
+
+    futuro = AGENDADOR.enviar(dados_candidato) if AGENDADOR_ATIVO else None
+    if futuro is None:
+        return await run_in_threadpool(ml_model.classificar_bolsa, dados_candidato)
+
+    try:
+        # Espera na fila + predição do micro-lote (que roda na thread do agendador)
+        with etapa("fila_lote"):
+            return await asyncio.wrap_future(futuro)
+    except Exception as e:
+        # Mesmo comportamento de classificar_bolsa: registra e devolve o padrão
+        print(f"⚠️ Erro crítico na predição da IA. Detalhe: {e}")
+        return "Bolsa Parcial"
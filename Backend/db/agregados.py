@@ -0,0 +1,198 @@
+"""
+Agregados do histórico de simulações (contagens por dia, curso, instituição, região, raça,
+modalidade de ensino e classificação).
+
+A cada gravação na tabela simulacao, as contagens do lote são somadas na tabela
+simulacao_agregado com um upsert (INSERT ... ON CONFLICT DO UPDATE SET total = total + ...),
+na mesma transação da gravação. O /estatisticas lê só essa tabela: o custo depende do número
+de grupos, não do tamanho do histórico.
+
+Para bancos com histórico anterior aos agregados (ou depois de correções manuais):
+    python -m db.agregados reconstruir
+A reconstrução também lê as simulações já arquivadas pela retenção (retencao.py), contando cada
+ID uma única vez (uma falha da retenção pode repetir linhas no arquivo ou deixá-las também na tabela).
+"""
+import argparse
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import models
+
+# IDs por consulta na conferência das simulações arquivadas (o SQLite aceita no mínimo 999 parâmetros)
+_MAX_PARAMETROS = 500
+
+# Dimensão -> coluna da tabela simulacao ("dia" sai de data_simulacao; "geral" é o total)
+DIMENSOES = {
+    "curso": "nome_curso",
+    "instituicao": "nome_instituicao",
+    "regiao": "regiao_beneficiario",
+    "raca": "raca_beneficiario",
+    "modalidade_ensino": "modalidade_ensino",
+}
+
+
+def _dia(data_simulacao) -> str:
+    return (data_simulacao or datetime.utcnow()).date().isoformat()
+
+
+def _contar(registros: Iterable[dict]) -> Counter:
+    contagem: Counter = Counter()
+    for registro in registros:
+        classificacao = registro["classificacao"]
+        contagem[("geral", "", classificacao)] += 1
+        contagem[("dia", _dia(registro.get("data_simulacao")), classificacao)] += 1
+        for dimensao, coluna in DIMENSOES.items():
+            contagem[(dimensao, registro[coluna], classificacao)] += 1
+    return contagem
+
+
+def _somar(db: Session, contagem: Counter) -> None:
+    if not contagem:
+        return
+    tabela = models.SimulacaoAgregado
+    comando = sqlite_insert(tabela)
+    comando = comando.on_conflict_do_update(
+        index_elements=[tabela.dimensao, tabela.valor, tabela.classificacao],
+        set_={"total": tabela.total + comando.excluded.total},
+    )
+    db.execute(comando, [
+        {"dimensao": dimensao, "valor": valor, "classificacao": classificacao, "total": total}
+        for (dimensao, valor, classificacao), total in contagem.items()
+    ])
+
+
+def atualizar_agregados(db: Session, registros: List[dict]) -> None:
+    """
+    Soma as simulações recém-gravadas aos agregados. Não faz commit: deve rodar na mesma
+    transação do INSERT na tabela simulacao. `data_simulacao` ausente = agora (UTC).
+    """
+    _somar(db, _contar(registros))
+
+
+def _arquivadas_sem_repeticao(db: Session, registros: Iterable[dict]) -> Iterator[List[dict]]:
+    """
+    Simulações arquivadas, em partes, com cada ID uma única vez. Uma falha da retenção entre a escrita
+    no arquivo e o commit do DELETE pode repetir a simulação no arquivo ou deixá-la ainda na tabela:
+    valem a ocorrência da tabela (já contada) e a primeira do arquivo.
+    """
+    dados = models.SimulacaoDados
+    vistos = set()
+
+    def _fora_da_tabela(parte: List[dict]) -> List[dict]:
+        na_tabela = set(db.scalars(select(dados.ID).where(dados.ID.in_([registro["ID"] for registro in parte]))))
+        return [registro for registro in parte if registro["ID"] not in na_tabela]
+
+    parte: List[dict] = []
+    for registro in registros:
+        if registro["ID"] in vistos:
+            continue
+        vistos.add(registro["ID"])
+        parte.append(registro)
+        if len(parte) >= _MAX_PARAMETROS:
+            yield _fora_da_tabela(parte)
+            parte = []
+    if parte:
+        yield _fora_da_tabela(parte)
+
+
+def reconstruir_agregados(db: Session, incluir_arquivo: bool = True, pasta: Optional[str] = None) -> int:
+    """
+    Recalcula todos os agregados a partir da tabela simulacao (uma leitura completa) e, com
+    `incluir_arquivo`, das simulações já movidas para os arquivos da retenção (`pasta`; padrão:
+    a pasta da retenção), sem contar duas vezes o mesmo ID. Retorna as simulações contadas.
+    """
+    from .retencao import ler_arquivo
+
+    simulacao = models.Simulacao
+    colunas = [simulacao.data_simulacao, simulacao.classificacao, *(getattr(simulacao, c) for c in DIMENSOES.values())]
+    db.execute(delete(models.SimulacaoAgregado))
+    lidas = 0
+    resultado = db.execute(select(*colunas).execution_options(yield_per=10000)).mappings()
+    for parte in resultado.partitions():
+        _somar(db, _contar(parte))
+        lidas += len(parte)
+    if incluir_arquivo:
+        contagem: Counter = Counter()
+        acumuladas = 0
+        arquivo = ler_arquivo(pasta) if pasta else ler_arquivo()
+        for parte in _arquivadas_sem_repeticao(db, arquivo):
+            contagem.update(_contar(parte))
+            acumuladas += len(parte)
+            if acumuladas >= 10000:
+                _somar(db, contagem)
+                lidas, contagem, acumuladas = lidas + acumuladas, Counter(), 0
+        _somar(db, contagem)
+        lidas += acumuladas
+    db.commit()
+    return lidas
+
+
+def preencher_se_vazio(engine: Engine) -> None:
+    """Na inicialização: se há histórico mas nenhum agregado (banco anterior a eles), reconstrói."""
+    with Session(engine) as db:
+        if db.scalar(select(models.SimulacaoAgregado.dimensao).limit(1)) is not None:
+            return
+        if db.scalar(select(models.SimulacaoDados.ID).limit(1)) is None:
+            return
+        inicio = time.perf_counter()
+        lidas = reconstruir_agregados(db)
+        print(f"✅ Agregados do histórico reconstruídos: {lidas} simulações em {time.perf_counter() - inicio:.1f} s.")
+
+
+# --------------------------------------
+# LEITURA (/estatisticas)
+# --------------------------------------
+
+def _grupos(db: Session, dimensao: str, desde: Optional[str] = None) -> List[dict]:
+    """Grupos de uma dimensão, com o total e o total por classificação, do maior para o menor."""
+    tabela = models.SimulacaoAgregado
+    consulta = select(tabela.valor, tabela.classificacao, tabela.total).where(tabela.dimensao == dimensao)
+    if desde is not None:
+        consulta = consulta.where(tabela.valor >= desde)
+    grupos: Dict[str, dict] = {}
+    for valor, classificacao, total in db.execute(consulta):
+        grupo = grupos.setdefault(valor, {"valor": valor, "total": 0, "por_classificacao": {}})
+        grupo["total"] += total
+        grupo["por_classificacao"][classificacao] = total
+    return sorted(grupos.values(), key=lambda grupo: (-grupo["total"], grupo["valor"]))
+
+
+def obter_estatisticas(db: Session, top: int = 10, dias: int = 30) -> dict:
+    """Totais gerais, série diária dos últimos `dias` e os grupos de cada dimensão (`top` para curso e instituição)."""
+    geral = _grupos(db, "geral")
+    desde = (datetime.utcnow().date() - timedelta(days=max(0, dias - 1))).isoformat()
+    return {
+        "total": geral[0]["total"] if geral else 0,
+        "por_classificacao": geral[0]["por_classificacao"] if geral else {},
+        "por_dia": sorted(_grupos(db, "dia", desde), key=lambda grupo: grupo["valor"]),
+        "top_cursos": _grupos(db, "curso")[:top],
+        "top_instituicoes": _grupos(db, "instituicao")[:top],
+        "por_regiao": _grupos(db, "regiao"),
+        "por_raca": _grupos(db, "raca"),
+        "por_modalidade_ensino": _grupos(db, "modalidade_ensino"),
+    }
+
+
+def _principal() -> None:
+    parser = argparse.ArgumentParser(description="Agregados do histórico de simulações.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("reconstruir", help="Recalcula os agregados a partir da tabela simulacao.")
+    parser.parse_args()
+
+    from .database import SessionLocal, engine
+    models.Base.metadata.create_all(bind=engine)
+    inicio = time.perf_counter()
+    with SessionLocal() as db:
+        lidas = reconstruir_agregados(db)
+    print(f"✅ {lidas} simulações agregadas em {time.perf_counter() - inicio:.1f} s.")
+
+
+if __name__ == "__main__":
+    _principal()
@@ -1,15 +1,22 @@
+import hmac
+from typing import Optional
 from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from db import crud, models, schemas
 from db.database import get_db
+from db.auth.tokens import TokenInvalido, validar_token
+from db.config import ADMIN_TOKEN
 
 DbDependency = Depends(get_db)
+# auto_error=False: a ausência do cabeçalho vira o nosso 401 (com a mensagem em português)
+BearerDependency = Depends(HTTPBearer(auto_error=False))
 
 class NotAuthenticatedException(HTTPException):
-    def __init__(self):
+    def __init__(self, detail: str = "É necessário estar logado para acessar este recurso."):
         super().__init__(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="É necessário estar logado para acessar este recurso.",
+            detail=detail,
             headers={"WWW-Authenticate": "Bearer"},
         )
 
@@ -17,19 +24,51 @@ class AuthPayload(schemas.LoginRequest):
     # Apenas um alias para deixar claro que é o payload de auth
     pass
 
+def get_current_candidato_id(
+    credenciais: Optional[HTTPAuthorizationCredentials] = BearerDependency,
+) -> int:
+    """
+    Dependência que valida o token 'Authorization: Bearer <token>' emitido no /login.
+    Só confere a assinatura HMAC e a expiração: não consulta o banco nem roda bcrypt.
+    """
+    if credenciais is None:
+        raise NotAuthenticatedException()
+    try:
+        return validar_token(credenciais.credentials)
+    except TokenInvalido as e:
+        raise NotAuthenticatedException(detail=f"Token inválido: {e}")
+
 def get_current_active_candidato(
-    auth_data: AuthPayload, 
+    candidato_id: int = Depends(get_current_candidato_id),
     db: Session = DbDependency
 ) -> models.Candidato:
     """
-    Função de dependência que verifica o usuário autenticado.
+    Função de dependência que verifica o usuário autenticado (token) e carrega o candidato.
     """
-    
-    candidato = crud.authenticate_candidato(db, email=auth_data.email, senha=auth_data.senha)
-    
+    candidato = db.get(models.Candidato, candidato_id)
+
     if not candidato:
         raise NotAuthenticatedException()
         
     return candidato
 
-CandidatoDependency = Depends(get_current_active_candidato)
\ No newline at end of file
+def verificar_admin(
+    credenciais: Optional[HTTPAuthorizationCredentials] = BearerDependency,
+) -> None:
+    """
+    Dependência das rotas de administração: 'Authorization: Bearer <PROUNI_ADMIN_TOKEN>'.
+    Sem o segredo configurado, as rotas ficam desativadas.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Rota de administração desativada: defina PROUNI_ADMIN_TOKEN.",
+        )
+    if credenciais is None:
+        raise NotAuthenticatedException(detail="É necessário o token de administração.")
+    if not hmac.compare_digest(credenciais.credentials.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise NotAuthenticatedException(detail="Token de administração inválido.")
+
+CandidatoIdDependency = Depends(get_current_candidato_id)
+CandidatoDependency = Depends(get_current_active_candidato)
+AdminDependency = Depends(verificar_admin)
@@ -0,0 +1,96 @@
+"""
+Executor dedicado ao bcrypt do /login, com limite de fila.
+
+A verificação bcrypt leva dezenas de milissegundos de CPU. Rodando no threadpool compartilhado
+do FastAPI, uma rajada de logins (ou de tentativas de credential stuffing) ocupa todas as threads
+e trava o /simular-direto. Aqui as verificações têm threads próprias (o bcrypt libera o GIL) e
+uma fila limitada: com ela cheia, `executar` levanta ExecutorSaturado e o router responde 503
+imediatamente, em vez de acumular espera.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..config import BCRYPT_MAX_FILA, BCRYPT_THREADS
+
+
+class ExecutorSaturado(Exception):
+    pass
+
+
+class ExecutorBcrypt:
+    """ThreadPoolExecutor com controle de admissão (threads + fila) e métricas de fila e latência."""
+
+    def __init__(self, threads: int, max_fila: int):
+        self.threads = max(1, threads)
+        self.max_fila = max(0, max_fila)
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+
+        self.pendentes = 0  # Na fila + em execução
+        self.fila_maxima = 0
+        self.executadas = 0
+        self.rejeitadas = 0
+        self.tempo_espera_s = 0.0
+        self.tempo_execucao_s = 0.0
+        self.maior_tempo_total_s = 0.0
+
+    def _admitir(self) -> None:
+        with self._lock:
+            if self.pendentes >= self.threads + self.max_fila:
+                self.rejeitadas += 1
+                raise ExecutorSaturado("Muitas verificações de senha em andamento. Tente novamente em instantes.")
+            self.pendentes += 1
+            fila = self.pendentes - self.threads
+            if fila > self.fila_maxima:
+                self.fila_maxima = fila
+
+    def _rodar(self, enviado_em: float, funcao: Callable[..., Any], *args: Any) -> Any:
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            fim = time.perf_counter()
+            with self._lock:
+                self.pendentes -= 1
+                self.executadas += 1
+                self.tempo_espera_s += inicio - enviado_em
+                self.tempo_execucao_s += fim - inicio
+                self.maior_tempo_total_s = max(self.maior_tempo_total_s, fim - enviado_em)
+
+    def enviar(self, funcao: Callable[..., Any], *args: Any) -> Future:
+        """Agenda a chamada; levanta ExecutorSaturado se threads e fila estiverem ocupadas."""
+        self._admitir()
+        try:
+            return self._executor.submit(self._rodar, time.perf_counter(), funcao, *args)
+        except RuntimeError:
+            # Executor já encerrado
+            with self._lock:
+                self.pendentes -= 1
+            raise
+
+    async def executar(self, funcao: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.enviar(funcao, *args))
+
+    def encerrar(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def estatisticas(self) -> dict:
+        executadas = self.executadas
+        return {
+            "threads": self.threads,
+            "max_fila": self.max_fila,
+            "em_execucao": min(self.pendentes, self.threads),
+            "fila_atual": max(0, self.pendentes - self.threads),
+            "fila_maxima": self.fila_maxima,
+            "executadas": executadas,
+            "rejeitadas_saturado": self.rejeitadas,
+            "tempo_medio_espera_ms": round(self.tempo_espera_s * 1000.0 / executadas, 3) if executadas else 0.0,
+            "tempo_medio_verificacao_ms": round(self.tempo_execucao_s * 1000.0 / executadas, 3) if executadas else 0.0,
+            "maior_tempo_total_ms": round(self.maior_tempo_total_s * 1000.0, 3),
+        }
+
+
+EXECUTOR_BCRYPT = ExecutorBcrypt(threads=BCRYPT_THREADS, max_fila=BCRYPT_MAX_FILA)
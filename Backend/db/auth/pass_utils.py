@@ -1,7 +1,14 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+from typing import List, Optional, Sequence
+
 from passlib.context import CryptContext
 
+from ..config import BCRYPT_ROUNDS, HASH_PROCESSOS
+
 # Configura o contexto do passlib para usar o algoritmo bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha fornecida corresponde à senha hasheada."""
@@ -10,3 +17,52 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Gera o hash de uma senha."""
     return pwd_context.hash(password)
+
+
+# --------------------------------------
+# HASH EM PARALELO (importação em massa)
+# --------------------------------------
+# O bcrypt é lento de propósito e segura o GIL: com threads, N candidatos custam N hashes
+# em um núcleo só. Na importação em massa os hashes vão para um pool de processos.
+# Os processos são criados com 'spawn' (só importam este módulo): um fork copiaria as threads
+# do agendador/vigia e o modelo carregado no processo da API.
+
+_POOL_HASH: Optional[ProcessPoolExecutor] = None
+_LOCK_POOL = Lock()
+
+
+def _hash_fatia(senhas: List[str]) -> List[str]:
+    """Executado dentro do processo do pool."""
+    return [pwd_context.hash(senha) for senha in senhas]
+
+
+def pool_hash() -> ProcessPoolExecutor:
+    """Pool de processos compartilhado, criado no primeiro uso."""
+    global _POOL_HASH
+    with _LOCK_POOL:
+        if _POOL_HASH is None:
+            _POOL_HASH = ProcessPoolExecutor(
+                max_workers=max(1, HASH_PROCESSOS), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _POOL_HASH
+
+
+def hash_senhas_em_paralelo(senhas: Sequence[str]) -> List[Future]:
+    """
+    Divide as senhas em fatias (uma ou duas por processo) e as envia ao pool sem esperar.
+    O resultado, na ordem original, é `[h for futuro in futuros for h in futuro.result()]`.
+    """
+    if not senhas:
+        return []
+    pool = pool_hash()
+    fatias = max(1, min(len(senhas), 2 * max(1, HASH_PROCESSOS)))
+    tamanho = -(-len(senhas) // fatias)
+    return [pool.submit(_hash_fatia, list(senhas[i:i + tamanho])) for i in range(0, len(senhas), tamanho)]
+
+
+def encerrar_pool_hash() -> None:
+    global _POOL_HASH
+    with _LOCK_POOL:
+        if _POOL_HASH is not None:
+            _POOL_HASH.shutdown(wait=True, cancel_futures=True)
+            _POOL_HASH = None
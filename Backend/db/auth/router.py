@@ -1,27 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import crud, schemas
+from ..config import TOKEN_VALIDADE_MINUTOS
+from ..cronometro import etapa
 from ..database import get_db
+from . import pass_utils
+from .auth import CandidatoDependency
+from .executor_bcrypt import EXECUTOR_BCRYPT, ExecutorSaturado
+from .tokens import emitir_token
 
 router = APIRouter(tags=["Autenticação"])
 DbDependency = Depends(get_db)
 
 @router.post("/login")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: schemas.LoginRequest, 
     db: Session = DbDependency
 ):
     """
     Autentica o candidato usando e-mail e senha.
-    Retorna o objeto Candidato em caso de sucesso.
+    Retorna o objeto Candidato e um token de acesso em caso de sucesso.
+    O token vai no cabeçalho 'Authorization: Bearer <token>' das rotas protegidas,
+    que assim não precisam reenviar (nem verificar com bcrypt) a senha.
+
+    A verificação bcrypt roda no executor dedicado (EXECUTOR_BCRYPT); com ele saturado,
+    responde 503 sem esperar, para não tirar threads das demais rotas.
     """
-    
-    candidato = crud.authenticate_candidato(
-        db, 
-        email=form_data.email, 
-        senha=form_data.senha
-    )
-    
+    with etapa("banco"):
+        candidato = await run_in_threadpool(crud.get_candidato_by_email, db, form_data.email)
+
+    if candidato:
+        try:
+            with etapa("bcrypt"):
+                senha_ok = await EXECUTOR_BCRYPT.executar(pass_utils.verify_password, form_data.senha, candidato.senha)
+        except ExecutorSaturado as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "1"},
+            )
+        if not senha_ok:
+            candidato = None
+
     if not candidato:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,7 +50,17 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    token, expira_em = emitir_token(candidato.ID)
     return {
         "access_status": "success",
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": TOKEN_VALIDADE_MINUTOS * 60,
+        "expires_at": expira_em,
         "candidato": schemas.Candidato.model_validate(candidato)
-    }
\ No newline at end of file
+    }
+
+@router.get("/me", response_model=schemas.Candidato)
+def read_current_candidato(candidato=CandidatoDependency):
+    """Retorna o candidato dono do token enviado em 'Authorization: Bearer <token>'."""
+    return candidato
@@ -0,0 +1,65 @@
+"""
+Tokens de sessão assinados com HMAC-SHA256, sem serviço externo.
+
+Formato: base64url(payload JSON) + "." + base64url(assinatura), com payload
+{"sub": ID do candidato, "exp": expiração em segundos Unix}. O bcrypt roda só no /login;
+as rotas protegidas conferem a assinatura e a expiração (microssegundos).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Tuple
+
+from ..config import TOKEN_SEGREDO, TOKEN_VALIDADE_MINUTOS
+
+
+class TokenInvalido(Exception):
+    pass
+
+
+if TOKEN_SEGREDO:
+    _CHAVE = TOKEN_SEGREDO.encode()
+else:
+    _CHAVE = secrets.token_bytes(32)
+    print("⚠️ PROUNI_TOKEN_SEGREDO não definido: usando uma chave aleatória (os tokens não valem após reiniciar "
+          "nem entre workers diferentes).")
+
+
+def _b64(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).rstrip(b"=").decode("ascii")
+
+
+def _de_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _assinar(payload_b64: str) -> str:
+    return _b64(hmac.new(_CHAVE, payload_b64.encode("ascii"), hashlib.sha256).digest())
+
+
+def emitir_token(candidato_id: int, validade_segundos: int = TOKEN_VALIDADE_MINUTOS * 60) -> Tuple[str, int]:
+    """Retorna (token, expiração em segundos Unix)."""
+    expira_em = int(time.time()) + validade_segundos
+    payload = _b64(json.dumps({"sub": candidato_id, "exp": expira_em}, separators=(",", ":")).encode())
+    return f"{payload}.{_assinar(payload)}", expira_em
+
+
+def validar_token(token: str) -> int:
+    """Confere assinatura e expiração. Retorna o ID do candidato ou levanta TokenInvalido."""
+    payload, _, assinatura = token.partition(".")
+    # compare_digest não aceita str com caracteres não ASCII (o cabeçalho chega decodificado em latin-1)
+    if not payload or not assinatura or not payload.isascii() or not assinatura.isascii():
+        raise TokenInvalido("Token malformado.")
+    if not hmac.compare_digest(assinatura.encode("ascii"), _assinar(payload).encode("ascii")):
+        raise TokenInvalido("Assinatura inválida.")
+    try:
+        dados = json.loads(_de_b64(payload))
+        candidato_id, expira_em = int(dados["sub"]), int(dados["exp"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise TokenInvalido(f"Payload inválido: {e}")
+    if expira_em < time.time():
+        raise TokenInvalido("Token expirado.")
+    return candidato_id
@@ -0,0 +1,455 @@
+"""
+Bundle versionado dos artefatos do modelo, em arquivo único.
+
+Substitui os quatro PKLs soltos (modelo, colunas e os dois vocabulários Top-N), que podiam
+ser trocados um sem o outro. O bundle guarda o estimador, a ordem das colunas, os vocabulários
+(com o hash de cada conjunto), a impressão digital dos dados de treino, a floresta compilada
+em arrays e um checksum de todo o conteúdo.
+
+Formato (little-endian):
+    MAGIC (8 bytes) | versão do formato (uint32) | tamanho do manifesto (uint64) | manifesto JSON (utf-8)
+    | preenchimento até múltiplo de 64 | seção de conteúdo:
+        arrays da floresta (cada um alinhado em 64 bytes) | estimador (joblib)
+
+O manifesto é JSON puro: dá para inspecionar o bundle (versão, colunas, checksums) sem unpickling.
+Na carga, o arquivo é mapeado em memória (somente leitura) e lido uma única vez, em sequência,
+para conferir o checksum; os arrays da floresta são views desse mapeamento, compartilhadas pelos
+workers do uvicorn. O estimador só é desserializado quando alguém precisa dele
+(backend 'sklearn', lotes acima do limite do backend compilado ou PROUNI_CONFERIR_FLORESTA_NA_CARGA).
+A paridade entre a floresta compilada e o estimador é conferida ao gerar o bundle (e no comando
+'verificar') e fica registrada no manifesto, junto com o hash do estimador.
+
+Uso (a partir da pasta Backend):
+    python -m db.bundle_modelo converter [--origem db] [--destino db/modelo.bundle] [--versao 2025.1]
+    python -m db.bundle_modelo manifesto [db/modelo.bundle]
+    python -m db.bundle_modelo verificar [db/modelo.bundle]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import struct
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .esquema_features import problemas_do_esquema
+from .floresta_compilada import FlorestaCompilada
+from .vocabulario import escolher_grafia, grafias_repetidas
+
+MAGIC = b"PROUNIMB"
+VERSAO_FORMATO = 2
+ALINHAMENTO = 64
+_CABECALHO = struct.Struct("<8sIQ")
+_BLOCO_LEITURA = 16 * 1024 * 1024
+
+BUNDLE_PADRAO = os.path.join(os.path.dirname(__file__), "modelo.bundle")
+
+
+class BundleInvalido(Exception):
+    """Bundle corrompido, de formato não suportado ou com artefatos inconsistentes entre si."""
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def _valor_json(valor: Any) -> Any:
+    # Classes do modelo podem vir como np.bool_/np.int64; o manifesto guarda tipos nativos
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _json_canonico(manifesto: dict) -> bytes:
+    return json.dumps(manifesto, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def hash_vocabulario(valores: Iterable[str]) -> str:
+    """Hash do conjunto (independe da ordem e de repetições)."""
+    return hashlib.sha256("\n".join(sorted(set(valores))).encode("utf-8")).hexdigest()
+
+
+def impressao_dados_treino(entrada: Any, saida: Any = None) -> str:
+    """
+    Impressão digital dos dados de treino (DataFrame/Series do pandas ou arrays numpy),
+    para saber de qual base cada bundle foi gerado.
+    """
+    import pandas as pd
+
+    impressao = hashlib.sha256()
+    for parte in (entrada, saida):
+        if parte is None:
+            continue
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            if isinstance(parte, pd.DataFrame):
+                impressao.update("\x1f".join(map(str, parte.columns)).encode("utf-8"))
+            impressao.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        else:
+            impressao.update(np.ascontiguousarray(parte).tobytes())
+    return impressao.hexdigest()
+
+
+def _escolher_colunas_preferidas(colunas: Sequence[str], frequencias: Optional[Mapping[str, float]]) -> List[str]:
+    """
+    Para cada grupo de colunas com o mesmo nome normalizado, a que recebe o valor na API:
+    a mais frequente no treino (se `frequencias` for informada), desempatada por `escolher_grafia`.
+    """
+    preferidas = []
+    for grafias in grafias_repetidas(colunas).values():
+        if frequencias is not None:
+            maior = max(float(frequencias.get(grafia, 0)) for grafia in grafias)
+            grafias = [grafia for grafia in grafias if float(frequencias.get(grafia, 0)) == maior]
+        preferidas.append(escolher_grafia(grafias))
+    return sorted(preferidas)
+
+
+def avisar_colisoes(colunas: Sequence[str], preferidas: Iterable[str] = ()) -> None:
+    """Avisa (ao gerar ou verificar o bundle) sobre colunas que a API não consegue distinguir."""
+    preferidas = frozenset(preferidas)
+    for grafias in grafias_repetidas(colunas).values():
+        vencedora = escolher_grafia(grafias, preferidas)
+        outras = ", ".join(f"'{grafia}'" for grafia in grafias if grafia != vencedora)
+        print(f"⚠️ Colunas com o mesmo nome normalizado: {outras} e '{vencedora}'; os valores vão para '{vencedora}'.")
+
+
+def _conferir_esquema(colunas: Sequence[str], top_ies: Iterable[str], top_cursos: Iterable[str]) -> None:
+    """As colunas precisam ser exatamente as que o codificador da API preenche (ver esquema_features)."""
+    problemas = problemas_do_esquema(colunas, top_ies, top_cursos)
+    if problemas:
+        raise BundleInvalido("Colunas fora do esquema do codificador da API: " + "; ".join(problemas) + ".")
+
+
+def _amostras_de_conferencia(floresta: FlorestaCompilada, n_amostras: int) -> np.ndarray:
+    """
+    Entradas aleatórias (0/1, idade na coluna 0) mais, para limiares sorteados da floresta, linhas
+    com a feature exatamente no limiar (em float32, como o sklearn compara) e no float32 logo acima
+    e logo abaixo: é onde um erro de tipo ou de `<=` muda o caminho na árvore.
+    """
+    rng = np.random.default_rng(0)
+    matriz = rng.integers(0, 2, size=(n_amostras, floresta.n_features)).astype(np.float64)
+    matriz[:, 0] = rng.integers(14, 80, size=n_amostras)
+
+    # Nós internos: as folhas apontam para si mesmas
+    internos = np.flatnonzero(floresta.esquerda != np.arange(len(floresta.esquerda)))
+    if not internos.size:
+        return matriz
+    nos = rng.choice(internos, size=min(n_amostras, internos.size), replace=False)
+    limiares = floresta.limiar[nos].astype(np.float32)
+    bordas = []
+    for valores in (limiares, np.nextafter(limiares, np.float32(np.inf)), np.nextafter(limiares, np.float32(-np.inf))):
+        linhas = matriz[rng.integers(0, n_amostras, size=len(nos))].copy()
+        linhas[np.arange(len(nos)), floresta.feature[nos]] = valores
+        bordas.append(linhas)
+    return np.vstack([matriz] + bordas)
+
+
+def conferir_floresta(floresta: FlorestaCompilada, modelo: Any, n_amostras: int = 256) -> int:
+    """
+    Confere a floresta compilada contra o `predict_proba` e o `predict` do estimador, em entradas
+    aleatórias e nos limiares das árvores. Levanta BundleInvalido se divergirem; retorna o número
+    de linhas conferidas.
+    """
+    matriz = _amostras_de_conferencia(floresta, n_amostras)
+    with warnings.catch_warnings():
+        # O modelo é treinado com DataFrame; aqui a entrada é uma matriz sem nomes de colunas
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        esperado = modelo.predict_proba(matriz)
+        classes = modelo.predict(matriz)
+    if not np.allclose(esperado, floresta.predict_proba(matriz), rtol=0, atol=1e-12):
+        raise BundleInvalido("A floresta compilada diverge do predict_proba do estimador.")
+    if not np.array_equal(classes, floresta.predict(matriz)):
+        raise BundleInvalido("A floresta compilada diverge do predict do estimador.")
+    return len(matriz)
+
+
+def salvar_bundle(
+    caminho: str,
+    modelo: Any,
+    colunas: Sequence[str],
+    top_ies: Iterable[str],
+    top_cursos: Iterable[str],
+    versao: Optional[str] = None,
+    impressao_treino: Optional[str] = None,
+    frequencias_colunas: Optional[Mapping[str, float]] = None,
+) -> dict:
+    """
+    Confere a consistência dos artefatos, grava o bundle e retorna o manifesto.
+    `frequencias_colunas` (ex: `entrada_treino.sum()`) decide qual coluna fica com o valor quando
+    duas têm o mesmo nome normalizado; sem ela, vale a regra de `escolher_grafia`.
+    """
+    import joblib
+
+    colunas = list(colunas)
+    if hasattr(modelo, "n_features_in_") and len(colunas) != modelo.n_features_in_:
+        raise BundleInvalido(
+            f"Inconsistência de Features: Colunas Esperadas ({len(colunas)}) != Modelo ({modelo.n_features_in_})."
+        )
+    if len(set(colunas)) != len(colunas):
+        raise BundleInvalido("A lista de colunas tem nomes repetidos.")
+    top_ies, top_cursos = sorted(set(top_ies)), sorted(set(top_cursos))
+    _conferir_esquema(colunas, top_ies, top_cursos)
+    colunas_preferidas = _escolher_colunas_preferidas(colunas, frequencias_colunas)
+    avisar_colisoes(colunas, colunas_preferidas)
+
+    floresta = FlorestaCompilada.de_sklearn(modelo)
+    linhas_conferidas = conferir_floresta(floresta, modelo)
+
+    buffer = io.BytesIO()
+    joblib.dump(modelo, buffer)
+    estimador = buffer.getvalue()
+
+    secoes = [(nome, np.ascontiguousarray(valor)) for nome, valor in floresta.arrays().items() if nome != 'classes']
+    descritores: Dict[str, dict] = {}
+    posicao = 0
+    for nome, array in secoes:
+        posicao = _alinhar(posicao)
+        descritores[nome] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": posicao,
+            "nbytes": int(array.nbytes),
+        }
+        posicao += array.nbytes
+    posicao_estimador = _alinhar(posicao)
+    tamanho_conteudo = posicao_estimador + len(estimador)
+
+    # Seção de conteúdo montada em memória: é dela que sai o checksum
+    conteudo = bytearray(tamanho_conteudo)
+    for nome, array in secoes:
+        inicio = descritores[nome]["offset"]
+        conteudo[inicio:inicio + array.nbytes] = array.tobytes()
+    conteudo[posicao_estimador:] = estimador
+
+    criado_em = datetime.now(timezone.utc)
+    manifesto = {
+        "formato": VERSAO_FORMATO,
+        "versao": versao or criado_em.strftime("%Y%m%d%H%M%S"),
+        "criado_em": criado_em.isoformat(),
+        "colunas": colunas,
+        "colunas_preferidas": colunas_preferidas,
+        "vocabularios": {
+            "top_ies": {"valores": top_ies, "sha256": hash_vocabulario(top_ies)},
+            "top_cursos": {"valores": top_cursos, "sha256": hash_vocabulario(top_cursos)},
+        },
+        "impressao_treino": impressao_treino,
+        # Paridade floresta x estimador conferida aqui; a carga confia nesse registro (coberto pelo checksum)
+        "conferencia_floresta": {
+            "ok": True,
+            "linhas": linhas_conferidas,
+            "sha256_estimador": hashlib.sha256(estimador).hexdigest(),
+        },
+        "estimador": {
+            "tipo": f"{type(modelo).__module__}.{type(modelo).__name__}",
+            "offset": posicao_estimador,
+            "nbytes": len(estimador),
+            "n_features_in": int(getattr(modelo, "n_features_in_", len(colunas))),
+        },
+        "floresta": {
+            "classes": [_valor_json(classe) for classe in floresta.classes],
+            "profundidade_maxima": floresta.profundidade_maxima,
+            "n_features": floresta.n_features,
+            "n_arvores": floresta.n_arvores,
+        },
+        "arrays": descritores,
+        "tamanho_conteudo": tamanho_conteudo,
+    }
+    # O checksum cobre o manifesto (sem o próprio checksum) e toda a seção de conteúdo
+    checksum = hashlib.sha256(_json_canonico(manifesto))
+    checksum.update(conteudo)
+    manifesto["sha256_conteudo"] = checksum.hexdigest()
+
+    manifesto_bytes = json.dumps(manifesto, ensure_ascii=False).encode("utf-8")
+    inicio_conteudo = _alinhar(_CABECALHO.size + len(manifesto_bytes))
+
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(_CABECALHO.pack(MAGIC, VERSAO_FORMATO, len(manifesto_bytes)))
+        arquivo.write(manifesto_bytes)
+        arquivo.write(b"\0" * (inicio_conteudo - _CABECALHO.size - len(manifesto_bytes)))
+        arquivo.write(conteudo)
+    # Troca atômica: quem estiver lendo o arquivo antigo não vê um bundle pela metade
+    os.replace(temporario, caminho)
+    return manifesto
+
+
+def ler_manifesto(caminho: str) -> dict:
+    """Lê apenas o cabeçalho e o manifesto do bundle (sem unpickling e sem ler o conteúdo)."""
+    with open(caminho, "rb") as arquivo:
+        cabecalho = arquivo.read(_CABECALHO.size)
+        if len(cabecalho) != _CABECALHO.size:
+            raise BundleInvalido(f"{caminho} não é um bundle de modelo válido (arquivo truncado).")
+        magic, versao, tamanho = _CABECALHO.unpack(cabecalho)
+        if magic != MAGIC:
+            raise BundleInvalido(f"{caminho} não é um bundle de modelo válido.")
+        if versao != VERSAO_FORMATO:
+            raise BundleInvalido(
+                f"Versão de bundle não suportada: {versao} (esperada {VERSAO_FORMATO}). "
+                f"Gere o bundle novamente com 'python -m db.bundle_modelo converter'."
+            )
+        manifesto = json.loads(arquivo.read(tamanho).decode("utf-8"))
+    manifesto["_inicio_conteudo"] = _alinhar(_CABECALHO.size + tamanho)
+    return manifesto
+
+
+def _conferir_checksum(manifesto: dict, conteudo: np.ndarray) -> None:
+    """Uma leitura sequencial de todo o conteúdo; também deixa as páginas no page cache."""
+    esperado = manifesto["sha256_conteudo"]
+    dados = {chave: valor for chave, valor in manifesto.items() if chave not in ("sha256_conteudo", "_inicio_conteudo")}
+    checksum = hashlib.sha256(_json_canonico(dados))
+    for inicio in range(0, len(conteudo), _BLOCO_LEITURA):
+        checksum.update(memoryview(conteudo[inicio:inicio + _BLOCO_LEITURA]))
+    if checksum.hexdigest() != esperado:
+        raise BundleInvalido("Checksum do bundle não confere: arquivo corrompido ou alterado.")
+
+
+def _vocabulario(manifesto: dict, nome: str) -> frozenset:
+    vocabulario = manifesto["vocabularios"][nome]
+    valores = frozenset(vocabulario["valores"])
+    if hash_vocabulario(valores) != vocabulario["sha256"]:
+        raise BundleInvalido(f"O vocabulário '{nome}' não confere com o seu hash.")
+    return valores
+
+
+def carregar_bundle(caminho: str, manifesto: Optional[dict] = None, carregar_estimador: bool = False) -> Dict[str, Any]:
+    """
+    Abre o bundle com o conteúdo mapeado em memória (somente leitura), confere checksum,
+    consistência e o esquema das colunas e monta a floresta compilada.
+    Retorna um dicionário com 'manifesto', 'floresta', 'colunas', 'colunas_preferidas', 'top_ies', 'top_cursos',
+    'estimador' (None se `carregar_estimador` for False), 'ler_estimador' (desserializa o
+    estimador deste mesmo mapeamento, mesmo que o arquivo seja trocado depois), 'floresta_conferida'
+    (paridade com o estimador registrada no manifesto ao gerar o bundle) e 'bytes_mapeados'.
+    O estimador não é desserializado aqui, a menos que `carregar_estimador` seja True.
+    """
+    manifesto = manifesto or ler_manifesto(caminho)
+    inicio = manifesto["_inicio_conteudo"]
+    tamanho = manifesto["tamanho_conteudo"]
+    if os.path.getsize(caminho) != inicio + tamanho:
+        raise BundleInvalido(f"{caminho} está truncado ou tem dados a mais.")
+    conteudo = np.memmap(caminho, dtype=np.uint8, mode="r", offset=inicio, shape=(tamanho,))
+    _conferir_checksum(manifesto, conteudo)
+
+    colunas = manifesto["colunas"]
+    dados_floresta = manifesto["floresta"]
+    if not (len(colunas) == dados_floresta["n_features"] == manifesto["estimador"]["n_features_in"]):
+        raise BundleInvalido(
+            f"Inconsistência de Features: Colunas Esperadas ({len(colunas)}) != Modelo ({dados_floresta['n_features']})."
+        )
+    top_ies, top_cursos = _vocabulario(manifesto, "top_ies"), _vocabulario(manifesto, "top_cursos")
+    _conferir_esquema(colunas, top_ies, top_cursos)
+
+    arrays = {}
+    for nome, descritor in manifesto["arrays"].items():
+        comeco = descritor["offset"]
+        bruto = conteudo[comeco:comeco + descritor["nbytes"]]
+        arrays[nome] = bruto.view(np.dtype(descritor["dtype"])).reshape(descritor["shape"])
+
+    floresta = FlorestaCompilada(
+        **arrays,
+        classes=np.asarray(dados_floresta["classes"]),
+        profundidade_maxima=dados_floresta["profundidade_maxima"],
+        n_features=dados_floresta["n_features"],
+    )
+    return {
+        "manifesto": manifesto,
+        "floresta": floresta,
+        "colunas": colunas,
+        # Bundles anteriores a este campo usam só a regra de escolher_grafia
+        "colunas_preferidas": frozenset(manifesto.get("colunas_preferidas", [])),
+        "top_ies": top_ies,
+        "top_cursos": top_cursos,
+        "estimador": _ler_estimador(manifesto, conteudo) if carregar_estimador else None,
+        "ler_estimador": lambda: _ler_estimador(manifesto, conteudo),
+        # Bundles anteriores a esse registro não guardam a conferência
+        "floresta_conferida": bool(manifesto.get("conferencia_floresta", {}).get("ok")),
+        "bytes_mapeados": int(conteudo.nbytes),
+    }
+
+
+def _ler_estimador(manifesto: dict, conteudo: np.ndarray) -> Any:
+    import joblib
+
+    descritor = manifesto["estimador"]
+    bruto = conteudo[descritor["offset"]:descritor["offset"] + descritor["nbytes"]]
+    modelo = joblib.load(io.BytesIO(bruto.tobytes()))
+    if getattr(modelo, "n_features_in_", descritor["n_features_in"]) != descritor["n_features_in"]:
+        raise BundleInvalido("O estimador do bundle não confere com o manifesto.")
+    return modelo
+
+
+def carregar_estimador(caminho: str) -> Any:
+    """Desserializa apenas o estimador do sklearn guardado no bundle (já conferindo o checksum)."""
+    manifesto = ler_manifesto(caminho)
+    conteudo = np.memmap(
+        caminho, dtype=np.uint8, mode="r", offset=manifesto["_inicio_conteudo"], shape=(manifesto["tamanho_conteudo"],)
+    )
+    _conferir_checksum(manifesto, conteudo)
+    return _ler_estimador(manifesto, conteudo)
+
+
+def _converter(origem: str, destino: str, versao: Optional[str]) -> None:
+    """Gera o bundle a partir dos quatro arquivos PKL antigos."""
+    import joblib
+
+    modelo = joblib.load(os.path.join(origem, "modelo_rf.pkl"))
+    colunas = joblib.load(os.path.join(origem, "colunas_esperadas.pkl"))
+    top_ies = joblib.load(os.path.join(origem, "top_ies_agrupadas.pkl"))
+    top_cursos = joblib.load(os.path.join(origem, "top_cursos_agrupados.pkl"))
+
+    try:
+        # Os PKLs não guardam a base de treino: a impressão digital fica em branco
+        manifesto = salvar_bundle(destino, modelo, colunas, top_ies, top_cursos, versao=versao)
+    except BundleInvalido as e:
+        raise SystemExit(f"⚠️ {e}")
+    _resumir(destino, manifesto)
+
+
+def _resumir(destino: str, manifesto: dict) -> None:
+    tamanho_mb = os.path.getsize(destino) / (1024 * 1024)
+    print(
+        f"✅ Bundle {manifesto['versao']} gerado em {destino} ({tamanho_mb:.1f} MB, "
+        f"{manifesto['floresta']['n_arvores']} árvores, sha256 {manifesto['sha256_conteudo'][:12]})."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ferramentas do bundle de artefatos do modelo.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    converter = subcomandos.add_parser("converter", help="Gera o bundle a partir dos quatro arquivos PKL")
+    converter.add_argument("--origem", default=os.path.dirname(__file__), help="Pasta com os arquivos PKL")
+    converter.add_argument("--destino", default=BUNDLE_PADRAO, help="Caminho do bundle gerado")
+    converter.add_argument("--versao", default=None, help="Versão do modelo (padrão: data e hora UTC)")
+
+    manifesto = subcomandos.add_parser("manifesto", help="Mostra o manifesto de um bundle")
+    manifesto.add_argument("caminho", nargs="?", default=BUNDLE_PADRAO)
+
+    verificar = subcomandos.add_parser("verificar", help="Confere checksum, consistência e a floresta compilada de um bundle")
+    verificar.add_argument("caminho", nargs="?", default=BUNDLE_PADRAO)
+
+    argumentos = parser.parse_args()
+    if argumentos.comando == "converter":
+        _converter(argumentos.origem, argumentos.destino, argumentos.versao)
+    elif argumentos.comando == "verificar":
+        try:
+            bundle = carregar_bundle(argumentos.caminho, carregar_estimador=True)
+        except BundleInvalido as e:
+            raise SystemExit(f"⚠️ {e}")
+        avisar_colisoes(bundle["colunas"], bundle["colunas_preferidas"])
+        try:
+            linhas = conferir_floresta(bundle["floresta"], bundle["estimador"])
+        except BundleInvalido as e:
+            raise SystemExit(f"⚠️ {e}")
+        print(f"✅ Floresta compilada confere com o estimador ({linhas} linhas).")
+        print(f"✅ Bundle {bundle['manifesto']['versao']} íntegro ({bundle['bytes_mapeados'] / (1024 * 1024):.1f} MB).")
+    else:
+        dados = ler_manifesto(argumentos.caminho)
+        dados["colunas"] = f"{len(dados['colunas'])} itens"
+        for vocabulario in dados["vocabularios"].values():
+            vocabulario["valores"] = f"{len(vocabulario['valores'])} itens"
+        print(json.dumps(dados, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
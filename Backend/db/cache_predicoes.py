@@ -0,0 +1,86 @@
+"""
+Cache LRU em memória para as predições do modelo de IA.
+
+A chave é a tupla de features já normalizada e agrupada (Top-N), ou seja, muitos nomes de
+IES/cursos fora do Top-N colapsam na mesma chave. O cache é vinculado à impressão digital
+do modelo carregado: quando o modelo muda, as entradas antigas são descartadas.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CachePredicoes:
+    """Cache LRU limitado por tamanho, seguro para uso entre threads."""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = max(0, capacidade)
+        self._entradas: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._impressao: Optional[str] = None
+
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.invalidacoes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.capacidade > 0
+
+    def _verificar_impressao(self, impressao: Optional[str]) -> None:
+        # Chamado com o lock adquirido: troca de modelo invalida todas as entradas
+        if impressao != self._impressao:
+            if self._entradas:
+                self.invalidacoes += 1
+            self._entradas.clear()
+            self._impressao = impressao
+
+    def obter(self, impressao: Optional[str], chave: Hashable, contar_falha: bool = True) -> Optional[Any]:
+        """
+        Retorna o valor em cache (marcando-o como recente) ou None.
+        `contar_falha=False` serve para consultas prévias cuja falha será contada depois.
+        """
+        if not self.ativo:
+            return None
+        with self._lock:
+            self._verificar_impressao(impressao)
+            valor = self._entradas.get(chave)
+            if valor is None:
+                if contar_falha:
+                    self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def armazenar(self, impressao: Optional[str], chave: Hashable, valor: Any) -> None:
+        """Guarda o valor, removendo a entrada menos recente se a capacidade for excedida."""
+        if not self.ativo:
+            return
+        with self._lock:
+            self._verificar_impressao(impressao)
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self.remocoes += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "ativo": self.ativo,
+                "capacidade": self.capacidade,
+                "tamanho": len(self._entradas),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "remocoes": self.remocoes,
+                "invalidacoes": self.invalidacoes,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+                "impressao_modelo": self._impressao,
+            }
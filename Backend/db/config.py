@@ -0,0 +1,161 @@
+"""
+Configurações do backend, lidas de variáveis de ambiente (com valores padrão seguros).
+"""
+import os
+
+
+def _int_env(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    if valor is None or valor.strip() == "":
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        print(f"⚠️ Valor inválido para {nome}: {valor!r}. Usando o padrão ({padrao}).")
+        return padrao
+
+
+def _float_env(nome: str, padrao: float) -> float:
+    valor = os.getenv(nome)
+    if valor is None or valor.strip() == "":
+        return padrao
+    try:
+        return float(valor)
+    except ValueError:
+        print(f"⚠️ Valor inválido para {nome}: {valor!r}. Usando o padrão ({padrao}).")
+        return padrao
+
+
+# --------------------------------------
+# CACHE DE PREDIÇÕES (LRU)
+# --------------------------------------
+# Quantidade máxima de entradas no cache de predições. 0 desativa o cache.
+CACHE_PREDICOES_CAPACIDADE = _int_env("PROUNI_CACHE_PREDICOES_CAPACIDADE", 4096)
+
+# --------------------------------------
+# INFERÊNCIA
+# --------------------------------------
+# Backend de predição: 'compilado' (FlorestaCompilada, arrays numpy) ou 'sklearn' (predict original).
+# A floresta compilada é conferida contra o sklearn (inclusive nas entradas exatamente nos limiares
+# das árvores) ao gerar o bundle, e o resultado fica no manifesto; a carga confia nesse registro.
+BACKEND_INFERENCIA = os.getenv("PROUNI_BACKEND_INFERENCIA", "compilado").strip().lower()
+
+# 1 = refaz a conferência a cada carga (desserializa o estimador: 1-2 s e a memória dele por worker);
+# se a floresta divergir, o serviço volta para 'sklearn'.
+CONFERIR_FLORESTA_NA_CARGA = _int_env("PROUNI_CONFERIR_FLORESTA_NA_CARGA", 0) == 1
+
+# A partir de quantas linhas o lote vai para o sklearn mesmo com o backend compilado
+# (a descida vetorizada ganha em poucas linhas; o Cython do sklearn, em lotes grandes).
+LIMITE_LINHAS_COMPILADO = _int_env("PROUNI_LIMITE_LINHAS_COMPILADO", 256)
+
+# --------------------------------------
+# AGENDADOR DE INFERÊNCIA (MICRO-LOTES)
+# --------------------------------------
+# Quando ativo, requisições simultâneas de /simular-direto são agrupadas em um único predict.
+AGENDADOR_ATIVO = _int_env("PROUNI_AGENDADOR_ATIVO", 0) == 1
+# Tempo máximo (ms, aceita frações como 0.5) que o primeiro item de um lote espera por companhia
+AGENDADOR_JANELA_MS = _float_env("PROUNI_AGENDADOR_JANELA_MS", 2.0)
+# Tamanho máximo de um lote (o lote é disparado assim que atingir esse tamanho)
+AGENDADOR_MAX_LOTE = _int_env("PROUNI_AGENDADOR_MAX_LOTE", 64)
+# Limite da fila; acima dele a predição é feita direto na requisição (sem agrupar)
+AGENDADOR_MAX_FILA = _int_env("PROUNI_AGENDADOR_MAX_FILA", 4096)
+
+# --------------------------------------
+# GRAVAÇÃO DO HISTÓRICO DE SIMULAÇÕES (WRITE-BEHIND)
+# --------------------------------------
+# Quando ativo, /simular-direto não grava a simulação na requisição: a linha entra em uma fila
+# em memória e uma thread grava em lotes (um INSERT e um commit por lote).
+GRAVACAO_ASSINCRONA = _int_env("PROUNI_GRAVACAO_ASSINCRONA", 0) == 1
+# Tempo máximo (ms) que a primeira linha de um lote espera antes da gravação
+GRAVACAO_INTERVALO_MS = _int_env("PROUNI_GRAVACAO_INTERVALO_MS", 200)
+# Linhas por lote (o lote é gravado assim que atingir esse tamanho)
+GRAVACAO_MAX_LOTE = _int_env("PROUNI_GRAVACAO_MAX_LOTE", 500)
+# Limite da fila em memória
+GRAVACAO_MAX_FILA = _int_env("PROUNI_GRAVACAO_MAX_FILA", 10000)
+# Com a fila cheia: 'sincrono' (a requisição grava direto, sem perda) ou 'descartar' (a linha é
+# descartada e contada; a resposta não espera o banco)
+GRAVACAO_POLITICA_FILA_CHEIA = os.getenv("PROUNI_GRAVACAO_POLITICA_FILA_CHEIA", "sincrono").strip().lower()
+
+# --------------------------------------
+# RETENÇÃO DO HISTÓRICO DE SIMULAÇÕES
+# --------------------------------------
+# Simulações mais antigas que isso (dias) saem da tabela simulacao para arquivos mensais
+# compactados (os agregados do /estatisticas não mudam). 0 desativa a retenção.
+RETENCAO_DIAS = _int_env("PROUNI_RETENCAO_DIAS", 0)
+# Pasta dos arquivos (vazio = db/arquivo_simulacoes)
+RETENCAO_PASTA = os.getenv("PROUNI_RETENCAO_PASTA", "")
+# Linhas movidas por transação e pausa entre transações, para não segurar o lock de escrita
+RETENCAO_LOTE = _int_env("PROUNI_RETENCAO_LOTE", 1000)
+RETENCAO_PAUSA_MS = _int_env("PROUNI_RETENCAO_PAUSA_MS", 50)
+# Intervalo entre execuções automáticas (minutos) com a API no ar
+RETENCAO_INTERVALO_MINUTOS = _int_env("PROUNI_RETENCAO_INTERVALO_MINUTOS", 60)
+
+# --------------------------------------
+# ARTEFATOS DO MODELO
+# --------------------------------------
+# Caminho do bundle de artefatos (vazio = db/modelo.bundle).
+MODELO_BUNDLE = os.getenv("PROUNI_MODELO_BUNDLE", "").strip()
+
+# Intervalo (s) da verificação de alteração no bundle do modelo; ao detectar uma versão nova,
+# o modelo é recarregado sem reiniciar a API. 0 = desativado (recarga só por /admin/modelo/recarregar,
+# que exige PROUNI_ADMIN_TOKEN).
+MODELO_VIGIAR_SEGUNDOS = _int_env("PROUNI_MODELO_VIGIAR_SEGUNDOS", 0)
+
+# --------------------------------------
+# TEMPOS POR ETAPA (SERVER-TIMING)
+# --------------------------------------
+# Quando ativo, cada resposta traz o cabeçalho Server-Timing com o tempo de cada etapa
+# (entrada/validação, inferência, banco...). Desativado, o middleware nem é registrado.
+SERVER_TIMING_ATIVO = _int_env("PROUNI_SERVER_TIMING", 0) == 1
+# Fração das requisições (0 a 1) que também geram uma linha de log JSON com os tempos
+LOG_TEMPOS_AMOSTRAGEM = _float_env("PROUNI_LOG_TEMPOS_AMOSTRAGEM", 0.01)
+
+# --------------------------------------
+# BANCO SQLITE
+# --------------------------------------
+# Perfil do engine: 'otimizado' (WAL, synchronous=NORMAL e os pragmas abaixo em cada conexão)
+# ou 'padrao' (como o SQLite vem de fábrica: journal de rollback e fsync a cada commit).
+SQLITE_PERFIL = os.getenv("PROUNI_SQLITE_PERFIL", "otimizado").strip().lower()
+# Espera (ms) por um lock de escrita antes de falhar com "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = _int_env("PROUNI_SQLITE_BUSY_TIMEOUT_MS", 5000)
+# Cache de páginas por conexão (KB) e tamanho máximo do mmap do arquivo (MB)
+SQLITE_CACHE_KB = _int_env("PROUNI_SQLITE_CACHE_KB", 16384)
+SQLITE_MMAP_MB = _int_env("PROUNI_SQLITE_MMAP_MB", 256)
+# Conexões mantidas no pool e conexões extras permitidas em picos
+SQLITE_POOL_TAMANHO = _int_env("PROUNI_SQLITE_POOL_TAMANHO", 8)
+SQLITE_POOL_EXTRA = _int_env("PROUNI_SQLITE_POOL_EXTRA", 8)
+
+# --------------------------------------
+# IMPORTAÇÃO EM MASSA DE CANDIDATOS
+# --------------------------------------
+# Candidatos por bloco (um INSERT em lote por tabela a cada bloco)
+IMPORTACAO_TAMANHO_BLOCO = _int_env("PROUNI_IMPORTACAO_TAMANHO_BLOCO", 1000)
+# Máximo de erros de validação detalhados na resposta da importação em streaming
+IMPORTACAO_MAX_ERROS_DETALHADOS = _int_env("PROUNI_IMPORTACAO_MAX_ERROS_DETALHADOS", 100)
+# Tamanho máximo (bytes) de uma linha NDJSON ou de um registro CSV na importação em streaming;
+# acima disso a importação para com 413 (um corpo sem quebras de linha não cresce na memória)
+IMPORTACAO_MAX_BYTES_LINHA = _int_env("PROUNI_IMPORTACAO_MAX_BYTES_LINHA", 64 * 1024)
+
+# --------------------------------------
+# HASH DE SENHAS (bcrypt)
+# --------------------------------------
+# Custo do bcrypt (log2 das iterações). Cada +1 dobra o tempo de cada hash.
+BCRYPT_ROUNDS = _int_env("PROUNI_BCRYPT_ROUNDS", 12)
+# Processos usados para gerar os hashes na importação em massa
+HASH_PROCESSOS = _int_env("PROUNI_HASH_PROCESSOS", os.cpu_count() or 1)
+# Threads dedicadas à verificação de senha no /login (fora do threadpool compartilhado da API)
+BCRYPT_THREADS = _int_env("PROUNI_BCRYPT_THREADS", min(4, os.cpu_count() or 1))
+# Verificações aguardando uma thread livre; acima disso o /login responde 503 na hora
+BCRYPT_MAX_FILA = _int_env("PROUNI_BCRYPT_MAX_FILA", 32)
+
+# --------------------------------------
+# TOKENS DE SESSÃO (HMAC)
+# --------------------------------------
+# Chave do HMAC que assina os tokens. Deve ser a mesma em todos os workers da API;
+# vazia = chave aleatória gerada na inicialização (tokens deixam de valer ao reiniciar).
+TOKEN_SEGREDO = os.getenv("PROUNI_TOKEN_SEGREDO", "")
+# Validade dos tokens emitidos no /login
+TOKEN_VALIDADE_MINUTOS = _int_env("PROUNI_TOKEN_VALIDADE_MINUTOS", 30)
+# Segredo das rotas de administração (ex: POST /admin/modelo/recarregar), enviado como
+# 'Authorization: Bearer <segredo>'. Vazio = essas rotas ficam desativadas (403).
+ADMIN_TOKEN = os.getenv("PROUNI_ADMIN_TOKEN", "")
@@ -0,0 +1,123 @@
+"""
+Tempos por etapa das requisições (cabeçalho Server-Timing e log JSON amostrado).
+
+O middleware cria, por requisição, um dicionário de tempos guardado em um ContextVar; o
+código do caminho quente marca as etapas com `with etapa("predict"):`. Sem middleware
+(PROUNI_SERVER_TIMING desligado) o ContextVar fica vazio e `etapa` devolve um gerenciador
+que não faz nada, sem ler o relógio.
+
+O dicionário é o mesmo objeto para todo o contexto da requisição, inclusive nas funções
+levadas ao threadpool (que recebem uma cópia do contexto). Etapas repetidas são somadas.
+"""
+import json
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .config import LOG_TEMPOS_AMOSTRAGEM
+
+_TEMPOS: ContextVar[Optional[Dict[str, int]]] = ContextVar("tempos_requisicao", default=None)
+
+
+class _EtapaNula:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ("_tempos", "_nome", "_inicio")
+
+    def __init__(self, tempos: Dict[str, int], nome: str):
+        self._tempos = tempos
+        self._nome = nome
+
+    def __enter__(self):
+        self._inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *excecao):
+        duracao = time.perf_counter_ns() - self._inicio
+        self._tempos[self._nome] = self._tempos.get(self._nome, 0) + duracao
+        return False
+
+
+def etapa(nome: str):
+    """Gerenciador de contexto que soma a duração do bloco na etapa `nome` (nome sem espaços)."""
+    tempos = _TEMPOS.get()
+    return _ETAPA_NULA if tempos is None else _Etapa(tempos, nome)
+
+
+def registrar_desde(nome: str, inicio_ns: int) -> None:
+    """Registra em `nome` o tempo decorrido desde `inicio_ns` (time.perf_counter_ns)."""
+    tempos = _TEMPOS.get()
+    if tempos is not None:
+        tempos[nome] = tempos.get(nome, 0) + time.perf_counter_ns() - inicio_ns
+
+
+def marcar_entrada() -> None:
+    """
+    Chamada no início do handler: o tempo desde a chegada da requisição (leitura do corpo,
+    validação Pydantic e dependências) vai para a etapa 'entrada'.
+    """
+    tempos = _TEMPOS.get()
+    if tempos is not None:
+        tempos["entrada"] = time.perf_counter_ns() - tempos["_inicio"]
+
+
+def _cabecalho(tempos: Dict[str, int], total_ns: int) -> bytes:
+    partes = [f"{nome};dur={duracao / 1e6:.3f}" for nome, duracao in tempos.items() if nome != "_inicio"]
+    partes.append(f"total;dur={total_ns / 1e6:.3f}")
+    return ", ".join(partes).encode("latin-1")
+
+
+class MiddlewareServerTiming:
+    """Middleware ASGI: abre o registro de tempos e devolve o Server-Timing na resposta."""
+
+    def __init__(self, app, taxa_log: float = LOG_TEMPOS_AMOSTRAGEM):
+        self.app = app
+        self.taxa_log = taxa_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter_ns()
+        tempos: Dict[str, int] = {"_inicio": inicio}
+        token = _TEMPOS.set(tempos)
+        estado = {"status": None}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                estado["status"] = mensagem["status"]
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append((b"server-timing", _cabecalho(tempos, time.perf_counter_ns() - inicio)))
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _TEMPOS.reset(token)
+            if self.taxa_log > 0 and random.random() < self.taxa_log:
+                self._registrar_log(scope, estado["status"], tempos, time.perf_counter_ns() - inicio)
+
+    @staticmethod
+    def _registrar_log(scope, status: Optional[int], tempos: Dict[str, int], total_ns: int) -> None:
+        print(json.dumps({
+            "evento": "tempos_requisicao",
+            "metodo": scope.get("method"),
+            "rota": scope.get("path"),
+            "status": status,
+            "etapas_ms": {nome: round(duracao / 1e6, 3) for nome, duracao in tempos.items() if nome != "_inicio"},
+            "total_ms": round(total_ns / 1e6, 3),
+        }, ensure_ascii=False), flush=True)
@@ -1,10 +1,14 @@
 from sqlalchemy.orm import Session
 from . import models, schemas
 from typing import List, Optional, Any
-from sqlalchemy import func, case, or_
+from sqlalchemy import func, case, or_, insert, select, exists
 from . import ml_model 
 from pydantic import BaseModel 
 from .auth import pass_utils
+from .importador_candidatos import ImportadorCandidatos
+from .agregados import atualizar_agregados
+from .dicionario_textos import DICIONARIO_TEXTOS
+from datetime import datetime
 
 
 def _get_ai_prediction(features: dict) -> str:
@@ -12,36 +16,57 @@ def _get_ai_prediction(features: dict) -> str:
     return ml_model.classificar_bolsa(features)
 
 
+def _consulta_features_candidato(candidato_id: int):
+    """
+    Uma única consulta (com as colunas exatas das 10 features) para a inscrição mais recente do
+    candidato, já com curso e instituição. Usa o índice inscricao(ID_Candidato, ID_inscricao).
+    """
+    return (
+        select(
+            models.Candidato.idade,
+            models.Candidato.sexo,
+            models.Candidato.status_deficiencia_text,
+            models.Candidato.raca_beneficiario_bolsa,
+            models.Candidato.regiao_beneficiario_bolsa,
+            models.Inscricao.modalidade.label("modalidade_concorrencia"),
+            models.Instituicao.modalidade.label("modalidade_ensino"),
+            models.Instituicao.nome.label("nome_instituicao"),
+            models.Curso.nome_curso,
+            models.Curso.turno,
+        )
+        .select_from(models.Inscricao)
+        .join(models.Candidato, models.Candidato.ID == models.Inscricao.ID_Candidato)
+        .join(models.Curso, models.Curso.ID == models.Inscricao.ID_curso)
+        .join(models.Instituicao, models.Instituicao.ID == models.Curso.ID_instituicao)
+        .where(models.Inscricao.ID_Candidato == candidato_id)
+        .order_by(models.Inscricao.ID_inscricao.desc())
+        .limit(1)
+    )
+
+
 def classificar_bolsa_candidato(db: Session, candidato_id: int):
     """
     Coleta os 10 dados de entrada (features) e chama o modelo de IA, 
     retornando o resultado no formato do schema ResultadoSimulacao.
     """
-    db_candidato = db.query(models.Candidato).filter(models.Candidato.ID == candidato_id).first()
-    
-    # Busca a inscrição mais recente
-    db_inscricao = db.query(models.Inscricao).filter(
-        models.Inscricao.ID_Candidato == candidato_id
-    ).order_by(models.Inscricao.ID_inscricao.desc()).first()
+    # Uma única ida ao banco, só com as colunas necessárias (sem hidratar objetos do ORM)
+    linha = db.execute(_consulta_features_candidato(candidato_id)).first()
 
-    if not db_candidato or not db_inscricao:
+    if linha is None:
         raise Exception("Candidato ou dados de inscrição não encontrados. Preencha o formulário.") 
-
-    db_curso = db.query(models.Curso).filter(models.Curso.ID == db_inscricao.ID_curso).first()
-    db_instituicao = db.query(models.Instituicao).filter(models.Instituicao.ID == db_curso.ID_instituicao).first()
         
     # Construção do dicionário com EXATAMENTE 10 features (limpeza crítica)
     dados_para_ia = {
-        "IDADE": db_candidato.idade,
-        "SEXO_BENEFICIARIO_BOLSA": db_candidato.sexo,
-        "STATUS_DEFICIENCIA_TEXT": db_candidato.status_deficiencia_text,
-        "RACA_BENEFICIARIO_BOLSA": db_candidato.raca_beneficiario_bolsa,
-        "REGIAO_BENEFICIARIO_BOLSA": db_candidato.regiao_beneficiario_bolsa,
-        "MODALIDADE_CONCORRENCIA": db_inscricao.modalidade,
-        "MODALIDADE_ENSINO_BOLSA": db_instituicao.modalidade,
-        "NOME_IES_BOLSA": db_instituicao.nome,
-        "NOME_CURSO_BOLSA": db_curso.nome_curso,
-        "NOME_TURNO_CURSO_BOLSA": db_curso.turno,
+        "IDADE": linha.idade,
+        "SEXO_BENEFICIARIO_BOLSA": linha.sexo,
+        "STATUS_DEFICIENCIA_TEXT": linha.status_deficiencia_text,
+        "RACA_BENEFICIARIO_BOLSA": linha.raca_beneficiario_bolsa,
+        "REGIAO_BENEFICIARIO_BOLSA": linha.regiao_beneficiario_bolsa,
+        "MODALIDADE_CONCORRENCIA": linha.modalidade_concorrencia,
+        "MODALIDADE_ENSINO_BOLSA": linha.modalidade_ensino,
+        "NOME_IES_BOLSA": linha.nome_instituicao,
+        "NOME_CURSO_BOLSA": linha.nome_curso,
+        "NOME_TURNO_CURSO_BOLSA": linha.turno,
     }
     
     # Obtém a string de predição (ex: "Bolsa Parcial")
@@ -50,8 +75,8 @@ def classificar_bolsa_candidato(db: Session, candidato_id: int):
     # CRÍTICO: Retorna um objeto/dicionário que corresponde ao seu schema ResultadoSimulacao
     return {
         "classificacao_bolsa": resultado_bolsa_str,
-        "mensagem": f"A IA previu que o candidato tem mais chances de obter {resultado_bolsa_str} no curso de {db_curso.nome_curso}.",
-        "curso": db_curso.nome_curso 
+        "mensagem": f"A IA previu que o candidato tem mais chances de obter {resultado_bolsa_str} no curso de {linha.nome_curso}.",
+        "curso": linha.nome_curso 
     }
 
 # --- Funções CRUD Genéricas (Permanecem Iguais) ---
@@ -62,13 +87,32 @@ def get_curso_by_name(db: Session, nome_curso: str) -> Optional[models.Curso]:
         func.lower(models.Curso.nome_curso) == func.lower(nome_curso)
     ).first()
 
-def get_candidatos(db: Session, skip:int = 0, limit: int=100) -> List[models.Candidato]:
-    """Retorna uma lista paginada de todos os candidatos."""
-    return db.query(models.Candidato).offset(skip).limit(limit).all()
+def _colunas_do_schema(modelo, schema) -> list:
+    """Colunas do model que o schema de resposta usa (a projeção das listagens)."""
+    return [getattr(modelo, campo) for campo in schema.model_fields if campo in modelo.__table__.columns]
+
+_COLUNAS_LISTAGEM_CANDIDATO = _colunas_do_schema(models.Candidato, schemas.Candidato)
+_COLUNAS_LISTAGEM_CURSO = _colunas_do_schema(models.Curso, schemas.CursoResponse)
+
+def _pagina(db: Session, modelo, colunas: list, skip: int, limit: int, after_id: Optional[int]) -> List[dict]:
+    """
+    Uma página das colunas projetadas, em ordem de ID, como dicts (sem montar objetos ORM).
+    Com `after_id` (keyset) a busca começa no índice da chave primária; sem ele, usa offset.
+    """
+    consulta = select(*colunas).order_by(modelo.ID).limit(limit)
+    if after_id is not None:
+        consulta = consulta.where(modelo.ID > after_id)
+    elif skip:
+        consulta = consulta.offset(skip)
+    return [dict(linha) for linha in db.execute(consulta).mappings()]
+
+def get_candidatos(db: Session, skip:int = 0, limit: int=100, after_id: Optional[int] = None) -> List[dict]:
+    """Retorna uma lista paginada de todos os candidatos (após `after_id`, se informado)."""
+    return _pagina(db, models.Candidato, _COLUNAS_LISTAGEM_CANDIDATO, skip, limit, after_id)
 
-def get_cursos(db: Session, skip: int = 0, limit: int = 100) -> List[models.Curso]:
-    """Retorna uma lista paginada de todos os cursos cadastrados."""
-    return db.query(models.Curso).offset(skip).limit(limit).all()
+def get_cursos(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[dict]:
+    """Retorna uma lista paginada de todos os cursos cadastrados (após `after_id`, se informado)."""
+    return _pagina(db, models.Curso, _COLUNAS_LISTAGEM_CURSO, skip, limit, after_id)
 
 def get_curso_by_id(db: Session, curso_id: int) -> Optional[models.Curso]:
     """Busca um curso no banco de dados pelo ID."""
@@ -145,8 +189,8 @@ def get_or_create_curso(db: Session, curso_data: schemas.CursoDadosInteresse, in
 
 def create_candidato(db: Session, candidato: schemas.CandidatoCreate) -> models.Candidato:
     
-    db_candidato_existente = db.query(models.Candidato).filter(models.Candidato.email == candidato.email).first()
-    if db_candidato_existente:
+    # EXISTS: responde pelo índice de email, sem carregar o candidato
+    if db.scalar(select(exists().where(models.Candidato.email == candidato.email))):
         raise Exception("Email já cadastrado.")
 
     
@@ -218,10 +262,8 @@ def delete_curso(db: Session, curso_id: int) -> Optional[dict]:
     """
     Deleta um curso pelo ID, retornando o resultado da operação.
     """
-    inscricoes_vinculadas = db.query(models.Inscricao).filter(models.Inscricao.ID_curso == curso_id).all()
-    
-    if inscricoes_vinculadas:
-        
+    # EXISTS no índice inscricao(ID_curso): para na primeira inscrição, sem carregar nenhuma
+    if db.scalar(select(exists().where(models.Inscricao.ID_curso == curso_id))):
         raise ValueError("Não é possível deletar o curso pois há inscrições de candidatos vinculadas a ele. Delete as inscrições primeiro.")
 
     db_curso = db.query(models.Curso).filter(models.Curso.ID == curso_id).first()
@@ -263,42 +305,64 @@ def update_candidato_complementary_data(
     db_inscricao = models.Inscricao(**inscricao_data)
     db.add(db_inscricao)
 
-def create_candidatos_lote(db: Session, candidatos_lote: schemas.LoteCandidatos):
+def create_candidatos_lote(db: Session, candidatos_lote: schemas.LoteCandidatos) -> dict:
     """
     Insere múltiplos candidatos e TODAS as suas dependências em uma transação atômica.
     Removida a criação da Nota.
-    """
-    
-    for candidato_data in candidatos_lote.candidatos:
-        
 
-        candidato_dict = candidato_data.model_dump(exclude={'instituicao', 'curso', 'modalidade_concorrencia'}) 
-        
-        
-        
-        db_candidato = models.Candidato(**candidato_dict)
-        db.add(db_candidato) 
-        db.flush() 
-
-        db_instituicao = get_or_create_instituicao(db, candidato_data.instituicao)
+    Usa o ImportadorCandidatos: instituições e cursos existentes pré-carregados e um INSERT
+    em lote por tabela a cada bloco. Retorna o resumo (linhas, criados, linhas/s).
+    """
+    try:
+        resumo = ImportadorCandidatos(db).importar(candidatos_lote.candidatos)
+        db.commit() 
+    except Exception as e:
+        db.rollback()
+        raise Exception(f"Erro ao inserir dados em lote. A transação foi revertida (rollback). Detalhe: {e}")
 
-        db_curso = get_or_create_curso(db, candidato_data.curso, db_instituicao.ID)
+    print(
+        f"✅ Lote importado: {resumo['linhas']} candidatos em {resumo['segundos']} s "
+        f"({resumo['linhas_por_s']} linhas/s)."
+    )
+    return {"status": "success", "message": f"{resumo['linhas']} pacotes de dados inseridos com sucesso.", "resumo": resumo}
 
 
-        inscricao_data = {
-            "ano_sisu": 2024,
-            "modalidade": candidato_data.modalidade_concorrencia, 
-            "ID_Candidato": db_candidato.ID,
-            "ID_curso": db_curso.ID,
+def inserir_simulacoes(db: Session, simulacoes: List[dict]) -> None:
+    """
+    Insere simulações (dicts com as colunas da view simulacao, textos por extenso) em
+    simulacao_dados, com os textos convertidos em IDs pelo DICIONARIO_TEXTOS, e atualiza os
+    agregados do /estatisticas. Não faz commit.
+    """
+    agora = datetime.utcnow()
+    for simulacao in simulacoes:
+        simulacao.setdefault("data_simulacao", agora)
+    ids = DICIONARIO_TEXTOS.ids(
+        db, (simulacao[coluna] for simulacao in simulacoes for coluna in models.COLUNAS_TEXTO_SIMULACAO)
+    )
+    db.execute(insert(models.SimulacaoDados), [
+        {
+            "data_simulacao": simulacao["data_simulacao"],
+            "idade": simulacao["idade"],
+            "pcd": simulacao["pcd"],
+            **{f"{coluna}_id": ids[simulacao[coluna]] for coluna in models.COLUNAS_TEXTO_SIMULACAO},
         }
-        db_inscricao = models.Inscricao(**inscricao_data)
-        db.add(db_inscricao)
+        for simulacao in simulacoes
+    ])
+    atualizar_agregados(db, simulacoes)
 
+def registrar_simulacoes_lote(db: Session, simulacoes: List[dict]) -> int:
+    """
+    Insere várias simulações no histórico com um único INSERT em lote (executemany),
+    atualiza os agregados do /estatisticas e faz um único commit. Retorna o número de linhas gravadas.
+    """
+    if not simulacoes:
+        return 0
 
     try:
-        db.commit() 
-        return {"status": "success", "message": f"{len(candidatos_lote.candidatos)} pacotes de dados inseridos com sucesso."}
-    
+        inserir_simulacoes(db, simulacoes)
+        db.commit()
+        return len(simulacoes)
+
     except Exception as e:
         db.rollback()
-        raise Exception(f"Erro ao inserir dados em lote. A transação foi revertida (rollback). Detalhe: {e}")
\ No newline at end of file
+        raise Exception(f"Erro ao gravar simulações em lote. A transação foi revertida (rollback). Detalhe: {e}")
@@ -1,16 +1,83 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import weakref
+
+from .config import (
+    SQLITE_PERFIL, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_KB, SQLITE_MMAP_MB,
+    SQLITE_POOL_TAMANHO, SQLITE_POOL_EXTRA,
+)
 
 # Create database directory if it doesn't exist
 db_dir = os.path.dirname(os.path.abspath(__file__))
 db_path = os.path.join(db_dir, "database_verdadeiro.db")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Pragmas aplicados em cada conexão nova, por perfil.
+# WAL: leitores não bloqueiam o escritor e o commit só acrescenta ao -wal (sem reescrever o journal);
+# synchronous=NORMAL: fsync apenas nos checkpoints (seguro contra queda do processo com WAL).
+PERFIS_SQLITE = {
+    "padrao": {},
+    "otimizado": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -SQLITE_CACHE_KB,  # negativo = em KB
+        "mmap_size": SQLITE_MMAP_MB * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+_PERFIL_DO_ENGINE: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+
+def criar_engine(url: str = SQLALCHEMY_DATABASE_URL, perfil: str = SQLITE_PERFIL) -> Engine:
+    """Cria o engine do SQLite com os pragmas do perfil aplicados a cada conexão."""
+    if perfil not in PERFIS_SQLITE:
+        print(f"⚠️ Perfil de SQLite desconhecido: {perfil!r}. Usando 'padrao'.")
+        perfil = "padrao"
+    pragmas = PERFIS_SQLITE[perfil]
+
+    novo_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=SQLITE_POOL_TAMANHO,
+        max_overflow=SQLITE_POOL_EXTRA,
+    )
+
+    if pragmas:
+        @event.listens_for(novo_engine, "connect")
+        def _aplicar_pragmas(conexao_dbapi, _registro):
+            cursor = conexao_dbapi.cursor()
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome}={valor}")
+            cursor.close()
+
+    _PERFIL_DO_ENGINE[novo_engine] = perfil
+    return novo_engine
+
+
+def pragmas_em_uso(engine_alvo: Engine) -> dict:
+    """Valores efetivos dos pragmas (lidos de uma conexão do pool)."""
+    with engine_alvo.connect() as conexao:
+        valores = {
+            nome: conexao.execute(text(f"PRAGMA {nome}")).scalar()
+            for nome in PERFIS_SQLITE["otimizado"]
+        }
+    valores["perfil"] = _PERFIL_DO_ENGINE.get(engine_alvo)
+    return valores
+
+
+def relatar_pragmas(engine_alvo: Engine) -> dict:
+    valores = pragmas_em_uso(engine_alvo)
+    resumo = ", ".join(f"{nome}={valor}" for nome, valor in valores.items() if nome != "perfil")
+    print(f"✅ SQLite (perfil '{valores['perfil']}'): {resumo}")
+    return valores
+
+
+engine = criar_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -21,4 +88,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
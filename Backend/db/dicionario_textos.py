@@ -0,0 +1,108 @@
+"""
+Cache em memória texto -> ID da tabela simulacao_texto (dicionário das colunas de texto
+das simulações).
+
+Os mesmos poucos textos (cursos, instituições, modalidades, "Bolsa Parcial"...) se repetem em
+milhões de simulações: cada um é gravado uma vez em simulacao_texto e as simulações guardam só
+o ID. Textos já conhecidos saem do cache sem ida ao banco; os novos entram com
+INSERT OR IGNORE + SELECT na transação de quem está gravando.
+
+Um ID novo só vai para o cache compartilhado depois do commit dessa transação: em caso de
+rollback, o texto não existe no banco e o ID não pode ser reaproveitado. O cache é separado por
+engine (um banco de teste não herda os IDs do banco real).
+"""
+import threading
+import weakref
+from typing import Dict, Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import models
+
+_CHAVE_PENDENTES = "textos_simulacao_pendentes"
+# Limite de parâmetros por comando (o SQLite aceita no mínimo 999)
+_MAX_PARAMETROS = 500
+
+
+class DicionarioTextos:
+
+    def __init__(self):
+        self._ids: "weakref.WeakKeyDictionary[Engine, Dict[str, int]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.novos = 0
+
+    def ids(self, db: Session, textos: Iterable[str]) -> Dict[str, int]:
+        """ID de cada texto, criando os que ainda não existem (sem commit)."""
+        cache = self._ids.get(db.get_bind(), {})
+        pendentes: Dict[str, int] = db.info.get(_CHAVE_PENDENTES, {})
+        resultado: Dict[str, int] = {}
+        faltando = []
+        textos = set(textos)
+        for texto in textos:
+            id_texto = cache.get(texto)
+            if id_texto is None:
+                id_texto = pendentes.get(texto)
+            if id_texto is None:
+                faltando.append(texto)
+            else:
+                resultado[texto] = id_texto
+        novos: Dict[str, int] = {}
+        if faltando:
+            novos = self._criar(db, faltando)
+            db.info.setdefault(_CHAVE_PENDENTES, {}).update(novos)
+            resultado.update(novos)
+        # Chamado pelas requisições e pela thread de gravação em lotes
+        with self._lock:
+            self.consultas += len(textos)
+            self.novos += len(novos)
+        return resultado
+
+    def _criar(self, db: Session, textos: list) -> Dict[str, int]:
+        tabela = models.SimulacaoTexto
+        novos: Dict[str, int] = {}
+        for inicio in range(0, len(textos), _MAX_PARAMETROS):
+            parte = textos[inicio:inicio + _MAX_PARAMETROS]
+            db.execute(
+                sqlite_insert(tabela).on_conflict_do_nothing(index_elements=[tabela.texto]),
+                [{"texto": texto} for texto in parte],
+            )
+            for texto, id_texto in db.execute(select(tabela.texto, tabela.ID).where(tabela.texto.in_(parte))):
+                novos[texto] = id_texto
+        return novos
+
+    def publicar(self, db: Session) -> None:
+        """Após o commit: os IDs criados na transação passam a valer para todos."""
+        pendentes = db.info.pop(_CHAVE_PENDENTES, None)
+        if pendentes:
+            with self._lock:
+                self._ids.setdefault(db.get_bind(), {}).update(pendentes)
+
+    def descartar(self, db: Session) -> None:
+        db.info.pop(_CHAVE_PENDENTES, None)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "textos_em_cache": sum(len(ids) for ids in list(self._ids.values())),
+                "consultas": self.consultas,
+                "textos_novos": self.novos,
+            }
+
+
+DICIONARIO_TEXTOS = DicionarioTextos()
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_textos(sessao: Session) -> None:
+    DICIONARIO_TEXTOS.publicar(sessao)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_textos(sessao: Session, transacao) -> None:
+    # Rollback ou close sem commit (após um commit, publicar já esvaziou os pendentes)
+    if transacao.parent is None:
+        DICIONARIO_TEXTOS.descartar(sessao)
@@ -0,0 +1,148 @@
+"""
+Esquema das features do modelo: as 10 entradas da API, as 8 que passam pelo One-Hot e as
+colunas que o codificador da API (ml_model.CodificadorOHE) sabe preencher.
+
+O bundle só é aceito (ao gerar e ao carregar) se as colunas seguirem esse esquema
+(`problemas_do_esquema`). O notebook monta a matriz de treino com `montar_matriz_treino`, que
+aplica a mesma normalização e o mesmo agrupamento Top-N da API: o modelo é treinado exatamente
+com as colunas que a API preenche.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .vocabulario import normalizar_nome
+
+# As 10 features de entrada (dicionário bruto) e as 8 que passam pelo OHE
+COLUNAS_DE_ENTRADA = [
+    'IDADE',
+    'SEXO_BENEFICIARIO_BOLSA', 'STATUS_DEFICIENCIA_TEXT',
+    'RACA_BENEFICIARIO_BOLSA', 'REGIAO_BENEFICIARIO_BOLSA',
+    'MODALIDADE_ENSINO_BOLSA', 'NOME_TURNO_CURSO_BOLSA',
+    'MODALIDADE_CONCORRENCIA', # Mantida na entrada raw
+    'NOME_IES_BOLSA', 'NOME_CURSO_BOLSA'
+]
+
+COLUNAS_PARA_OHE = [
+    'SEXO_BENEFICIARIO_BOLSA',
+    'STATUS_DEFICIENCIA_TEXT',
+    'RACA_BENEFICIARIO_BOLSA',
+    'REGIAO_BENEFICIARIO_BOLSA',
+    'MODALIDADE_ENSINO_BOLSA',
+    'NOME_TURNO_CURSO_BOLSA',
+    'NOME_IES_AGRUPADO',
+    'NOME_CURSO_AGRUPADO'
+]
+
+COLUNA_IDADE = 'IDADE'
+
+# Feature agrupada -> (coluna de entrada, coluna dos valores fora do Top-N)
+AGRUPAMENTOS: Dict[str, Tuple[str, str]] = {
+    'NOME_IES_AGRUPADO': ('NOME_IES_BOLSA', 'OUTRAS_IES'),
+    'NOME_CURSO_AGRUPADO': ('NOME_CURSO_BOLSA', 'OUTROS_CURSOS'),
+}
+
+# Valores (já em maiúsculas) que o pipeline trata como nulos -> categoria 'NA_DB'
+_VALORES_NULOS = frozenset(['NAN', 'NONE', 'NONETYPE'])
+
+
+def normalizar_categoria(valor: Any) -> str:
+    """Equivalente a `astype(str).str.upper()` + substituição dos nulos por 'NA_DB'."""
+    if valor is None:
+        return 'NA_DB'
+    texto = str(valor).upper()
+    return 'NA_DB' if texto in _VALORES_NULOS else texto
+
+
+def problemas_do_esquema(colunas: Iterable[str], top_ies: Iterable[str], top_cursos: Iterable[str]) -> List[str]:
+    """
+    Diferenças entre as colunas de um modelo e o que o codificador da API produz: IDADE, só colunas
+    '<FEATURE>_<valor>' das 8 features OHE (pelo menos uma por feature), OUTRAS_IES/OUTROS_CURSOS
+    presentes e uma coluna para cada nome do Top-N (e nenhuma para nomes fora dele).
+    Lista vazia quando o esquema confere.
+    """
+    colunas = list(colunas)
+    problemas = []
+    if COLUNA_IDADE not in colunas:
+        problemas.append(f"coluna '{COLUNA_IDADE}' ausente")
+
+    sufixos: Dict[str, set] = {feature: set() for feature in COLUNAS_PARA_OHE}
+    desconhecidas = []
+    for coluna in colunas:
+        if coluna == COLUNA_IDADE:
+            continue
+        feature = next((feature for feature in COLUNAS_PARA_OHE if coluna.startswith(feature + '_')), None)
+        if feature is None:
+            desconhecidas.append(coluna)
+        else:
+            sufixos[feature].add(normalizar_nome(coluna[len(feature) + 1:]))
+    if desconhecidas:
+        exemplos = ", ".join(f"'{coluna}'" for coluna in desconhecidas[:5])
+        problemas.append(f"{len(desconhecidas)} colunas fora das features do codificador (ex: {exemplos})")
+
+    for feature in COLUNAS_PARA_OHE:
+        if not sufixos[feature]:
+            problemas.append(f"nenhuma coluna '{feature}_*'")
+
+    vocabularios = {'NOME_IES_AGRUPADO': top_ies, 'NOME_CURSO_AGRUPADO': top_cursos}
+    for feature, (_, fallback) in AGRUPAMENTOS.items():
+        vocabulario = {normalizar_nome(valor) for valor in vocabularios[feature]}
+        if normalizar_nome(fallback) not in sufixos[feature]:
+            problemas.append(f"coluna '{feature}_{fallback}' ausente")
+        sem_coluna = vocabulario - sufixos[feature]
+        if sem_coluna:
+            problemas.append(f"{len(sem_coluna)} nomes do Top-N de {feature} sem coluna (ex: {sorted(sem_coluna)[:3]})")
+        fora_do_top = sufixos[feature] - vocabulario - {normalizar_nome(fallback)}
+        if fora_do_top:
+            problemas.append(f"{len(fora_do_top)} colunas {feature} fora do Top-N (ex: {sorted(fora_do_top)[:3]})")
+    return problemas
+
+
+def escolher_top_n(valores: Any, n: int) -> List[str]:
+    """
+    Os `n` nomes mais frequentes de uma Series, contados pela forma normalizada (grafias diferentes
+    do mesmo nome somam juntas, como na API), cada um representado pela grafia mais frequente.
+    """
+    contagem = valores.astype(str).value_counts()
+    chaves = contagem.index.map(normalizar_nome)
+    grupos = contagem.groupby(chaves)
+    totais = grupos.sum().sort_values(ascending=False, kind='stable')
+    representantes = grupos.idxmax()
+    return [representantes[chave] for chave in totais.index[:n]]
+
+
+def montar_matriz_treino(dados: Any, top_ies: Iterable[str], top_cursos: Iterable[str]) -> Any:
+    """
+    Matriz One-Hot de treino (DataFrame) no esquema da API, a partir das colunas de entrada
+    (COLUNAS_DE_ENTRADA; MODALIDADE_CONCORRENCIA não é usada). Cada valor é normalizado como na API
+    (nulos -> NA_DB, sem acentos, casefold); IES e cursos fora do Top-N vão para OUTRAS_IES /
+    OUTROS_CURSOS. Cada coluna leva a grafia mais frequente do valor, então o codificador da API
+    preenche exatamente as mesmas colunas para as mesmas entradas.
+    """
+    import pandas as pd
+
+    origens: Dict[str, Tuple[str, Optional[Iterable[str]], Optional[str]]] = {
+        feature: (feature, None, None) for feature in COLUNAS_PARA_OHE
+    }
+    origens['NOME_IES_AGRUPADO'] = ('NOME_IES_BOLSA', top_ies, 'OUTRAS_IES')
+    origens['NOME_CURSO_AGRUPADO'] = ('NOME_CURSO_BOLSA', top_cursos, 'OUTROS_CURSOS')
+
+    necessarias = [COLUNA_IDADE] + [origem for origem, _, _ in origens.values()]
+    faltando = [coluna for coluna in necessarias if coluna not in dados.columns]
+    if faltando:
+        raise ValueError(f"Colunas de entrada ausentes: {faltando}")
+
+    matriz = {COLUNA_IDADE: pd.to_numeric(dados[COLUNA_IDADE], errors='coerce').fillna(0)}
+    for feature in COLUNAS_PARA_OHE:
+        origem, vocabulario, fallback = origens[feature]
+        categorias = dados[origem].map(normalizar_categoria)
+        chaves = categorias.map(normalizar_nome)
+        if vocabulario is None:
+            rotulos = dados[origem].astype(str).where(categorias != 'NA_DB', 'NA_DB')
+            grafias = rotulos.groupby(chaves).agg(lambda grupo: grupo.value_counts().idxmax()).to_dict()
+        else:
+            grafias = {normalizar_nome(valor): valor for valor in vocabulario}
+            chave_fallback = normalizar_nome(fallback)
+            chaves = chaves.where(chaves.isin(grafias.keys()), chave_fallback)
+            grafias[chave_fallback] = fallback
+        for chave, grafia in sorted(grafias.items(), key=lambda item: item[1]):
+            matriz[f"{feature}_{grafia}"] = (chaves == chave).astype(int)
+    return pd.DataFrame(matriz, index=dados.index)
@@ -0,0 +1,204 @@
+"""
+Exportação do histórico de simulações em CSV ou Parquet, em streaming.
+
+As linhas são lidas em janelas pela chave primária (`WHERE ID > :ultimo ORDER BY ID LIMIT n`),
+cada janela em uma leitura curta, e escritas em pedaços no formato pedido: a memória fica
+limitada a uma janela, independente do tamanho do histórico. O maior ID é fixado no início, de
+modo que a exportação corresponde ao histórico daquele instante, e as gravações da API
+continuam normalmente enquanto ela roda (nenhuma transação de leitura fica aberta durante toda
+a exportação, o que no modo WAL impediria o checkpoint e faria o -wal crescer).
+
+Parquet precisa do pacote opcional `pyarrow` (cada janela vira um row group).
+
+Uso pela linha de comando:
+    python -m db.exportacao --saida simulacoes.csv [--formato parquet] [--inicio 2024-01-01]
+                            [--fim 2024-07-01] [--colunas data_simulacao,nome_curso,classificacao]
+"""
+import argparse
+import csv
+import io
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATOS = ("csv", "parquet")
+COLUNAS_EXPORTAVEIS = [coluna.name for coluna in models.Simulacao.__table__.columns]
+TAMANHO_JANELA = 5000
+
+
+class ExportacaoInvalida(Exception):
+    pass
+
+
+def resolver_colunas(colunas: Optional[Sequence[str]]) -> List[str]:
+    """Valida a lista de colunas pedida (vazia = todas), mantendo a ordem informada."""
+    if not colunas:
+        return list(COLUNAS_EXPORTAVEIS)
+    desconhecidas = [coluna for coluna in colunas if coluna not in COLUNAS_EXPORTAVEIS]
+    if desconhecidas:
+        raise ExportacaoInvalida(
+            f"Colunas desconhecidas: {', '.join(desconhecidas)}. Disponíveis: {', '.join(COLUNAS_EXPORTAVEIS)}."
+        )
+    return list(dict.fromkeys(colunas))
+
+
+def verificar_formato(formato: str) -> None:
+    if formato not in FORMATOS:
+        raise ExportacaoInvalida(f"Formato '{formato}' inválido. Use: {', '.join(FORMATOS)}.")
+    if formato == "parquet" and pq is None:
+        raise ExportacaoInvalida("Exportação em Parquet requer o pacote 'pyarrow' (pip install pyarrow).")
+
+
+def janelas(
+    fabrica_sessao: Callable[[], Session],
+    colunas: List[str],
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    tamanho_janela: int = TAMANHO_JANELA,
+) -> Iterator[List[tuple]]:
+    """Linhas (tuplas na ordem de `colunas`) em janelas de até `tamanho_janela`, por ID crescente."""
+    simulacao = models.Simulacao
+    filtros = []
+    if inicio is not None:
+        filtros.append(simulacao.data_simulacao >= inicio)
+    if fim is not None:
+        filtros.append(simulacao.data_simulacao < fim)
+
+    with fabrica_sessao() as db:
+        # Na tabela, não na view: o max(ID) sai direto da chave primária
+        maior_id = db.scalar(select(func.max(models.SimulacaoDados.ID)))
+    if maior_id is None:
+        return
+
+    # O ID vai na consulta para avançar a janela, mesmo que não tenha sido pedido
+    selecionadas = [simulacao.ID] + [getattr(simulacao, coluna) for coluna in colunas]
+    ultimo_id = 0
+    while ultimo_id < maior_id:
+        with fabrica_sessao() as db:
+            linhas = db.execute(
+                select(*selecionadas)
+                .where(simulacao.ID > ultimo_id, simulacao.ID <= maior_id, *filtros)
+                .order_by(simulacao.ID)
+                .limit(tamanho_janela)
+            ).all()
+        if not linhas:
+            return
+        ultimo_id = linhas[-1][0]
+        yield [tuple(linha[1:]) for linha in linhas]
+
+
+def _csv(lotes: Iterator[List[tuple]], colunas: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for lote in lotes:
+        escritor.writerows(
+            tuple(valor.isoformat(sep=" ") if isinstance(valor, datetime) else valor for valor in linha)
+            for linha in lote
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _SaidaDrenavel(io.RawIOBase):
+    """Arquivo só de escrita cujo conteúdo é retirado (drenado) a cada row group gravado."""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def drenar(self) -> bytes:
+        dados, self._partes = b"".join(self._partes), []
+        return dados
+
+
+def _parquet(lotes: Iterator[List[tuple]], colunas: List[str]) -> Iterator[bytes]:
+    tipos = {coluna.name: coluna.type.python_type for coluna in models.Simulacao.__table__.columns}
+    para_arrow = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), datetime: pa.timestamp("us"), str: pa.string()}
+    esquema = pa.schema([(coluna, para_arrow.get(tipos[coluna], pa.string())) for coluna in colunas])
+
+    saida = _SaidaDrenavel()
+    escritor = pq.ParquetWriter(saida, esquema, compression="snappy")
+    try:
+        for lote in lotes:
+            tabela = pa.Table.from_arrays(
+                [pa.array(list(valores), type=campo.type) for valores, campo in zip(zip(*lote), esquema)],
+                schema=esquema,
+            )
+            escritor.write_table(tabela)
+            yield saida.drenar()
+    finally:
+        escritor.close()
+    yield saida.drenar()
+
+
+def exportar(
+    fabrica_sessao: Callable[[], Session],
+    formato: str = "csv",
+    colunas: Optional[Sequence[str]] = None,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    tamanho_janela: int = TAMANHO_JANELA,
+) -> Iterator[bytes]:
+    """
+    Pedaços do arquivo exportado, prontos para um StreamingResponse ou para gravar em disco.
+    Filtro de data: `inicio` <= data_simulacao < `fim`. Levanta ExportacaoInvalida antes do primeiro pedaço.
+    """
+    verificar_formato(formato)
+    colunas = resolver_colunas(colunas)
+    lotes = janelas(fabrica_sessao, colunas, inicio, fim, tamanho_janela)
+    return _parquet(lotes, colunas) if formato == "parquet" else _csv(lotes, colunas)
+
+
+def _principal() -> None:
+    parser = argparse.ArgumentParser(description="Exporta o histórico de simulações (CSV ou Parquet).")
+    parser.add_argument("--saida", required=True, help="Arquivo de destino.")
+    parser.add_argument("--formato", choices=FORMATOS, default=None, help="Padrão: pela extensão da saída.")
+    parser.add_argument("--inicio", type=datetime.fromisoformat, default=None, help="Data inicial (inclusiva).")
+    parser.add_argument("--fim", type=datetime.fromisoformat, default=None, help="Data final (exclusiva).")
+    parser.add_argument("--colunas", default="", help="Colunas separadas por vírgula (padrão: todas).")
+    args = parser.parse_args()
+
+    from .database import SessionLocal
+    formato = args.formato or ("parquet" if args.saida.endswith(".parquet") else "csv")
+    colunas = [coluna.strip() for coluna in args.colunas.split(",") if coluna.strip()]
+    inicio = time.perf_counter()
+    try:
+        pedacos = exportar(SessionLocal, formato, colunas, args.inicio, args.fim)
+    except ExportacaoInvalida as e:
+        parser.error(str(e))
+    tamanho = 0
+    with open(args.saida, "wb") as arquivo:
+        for pedaco in pedacos:
+            arquivo.write(pedaco)
+            tamanho += len(pedaco)
+    print(f"✅ Exportação concluída: {args.saida} ({tamanho / 1e6:.1f} MB) em {time.perf_counter() - inicio:.1f} s.")
+
+
+if __name__ == "__main__":
+    _principal()
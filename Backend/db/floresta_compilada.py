@@ -0,0 +1,138 @@
+"""
+Avaliador "compilado" de RandomForestClassifier para a latência de uma linha.
+
+As árvores do sklearn são exportadas uma única vez (no carregamento) para arrays numpy
+contíguos (feature, limiar, filho esquerdo, filho direito, valor da folha), com todos os nós
+de todas as árvores em uma única numeração. A avaliação desce todas as árvores de todas as
+linhas ao mesmo tempo, um nível por iteração, sem a validação de entrada, o joblib e o
+overhead por árvore do `predict` do sklearn.
+"""
+from typing import Any, Dict, Tuple
+import numpy as np
+
+
+class FlorestaCompilada:
+    """Floresta de decisão em arrays planos, avaliada de forma vetorizada."""
+
+    # Nomes dos arrays que definem a floresta (usados também na exportação do bundle)
+    ARRAYS = ('feature', 'limiar', 'esquerda', 'direita', 'valores', 'raizes', 'classes')
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        limiar: np.ndarray,
+        esquerda: np.ndarray,
+        direita: np.ndarray,
+        valores: np.ndarray,
+        raizes: np.ndarray,
+        classes: np.ndarray,
+        profundidade_maxima: int,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.limiar = limiar
+        self.esquerda = esquerda
+        self.direita = direita
+        self.valores = valores
+        self.raizes = raizes
+        self.classes = classes
+        self.profundidade_maxima = int(profundidade_maxima)
+        self.n_features = int(n_features)
+        self.n_arvores = len(raizes)
+        # Folhas apontam para si mesmas (é assim que são reconhecidas na descida)
+        self._eh_folha = esquerda == np.arange(len(esquerda))
+
+    @classmethod
+    def de_sklearn(cls, modelo: Any) -> "FlorestaCompilada":
+        """Exporta um RandomForestClassifier (saída única) já treinado."""
+        estimadores = getattr(modelo, 'estimators_', None)
+        if not estimadores or not hasattr(estimadores[0], 'tree_'):
+            raise TypeError(f"Modelo {type(modelo).__name__} não é uma floresta de árvores do sklearn.")
+        if getattr(modelo, 'n_outputs_', 1) != 1:
+            raise TypeError("Apenas florestas de saída única podem ser compiladas.")
+
+        features, limiares, esquerdas, direitas, valores, raizes = [], [], [], [], [], []
+        deslocamento = 0
+        profundidade = 0
+        for estimador in estimadores:
+            arvore = estimador.tree_
+            n_nos = arvore.node_count
+            indices = np.arange(deslocamento, deslocamento + n_nos, dtype=np.int64)
+            folha = arvore.children_left == -1
+
+            # Folhas: feature 0 (qualquer índice válido) e filhos apontando para o próprio nó
+            features.append(np.where(folha, 0, arvore.feature).astype(np.int64))
+            limiares.append(arvore.threshold.astype(np.float64))
+            esquerdas.append(np.where(folha, indices, arvore.children_left + deslocamento))
+            direitas.append(np.where(folha, indices, arvore.children_right + deslocamento))
+
+            # Mesma normalização do DecisionTreeClassifier.predict_proba
+            valor = arvore.value[:, 0, :].astype(np.float64)
+            normalizador = valor.sum(axis=1)[:, np.newaxis]
+            normalizador[normalizador == 0.0] = 1.0
+            valores.append(valor / normalizador)
+
+            raizes.append(deslocamento)
+            deslocamento += n_nos
+            profundidade = max(profundidade, arvore.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            limiar=np.concatenate(limiares),
+            esquerda=np.concatenate(esquerdas),
+            direita=np.concatenate(direitas),
+            valores=np.ascontiguousarray(np.concatenate(valores)),
+            raizes=np.asarray(raizes, dtype=np.int64),
+            classes=np.asarray(modelo.classes_),
+            profundidade_maxima=profundidade,
+            n_features=modelo.n_features_in_,
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {nome: getattr(self, nome) for nome in self.ARRAYS}
+
+    def folhas(self, X: np.ndarray) -> np.ndarray:
+        """Índice (global) da folha alcançada em cada árvore: matriz (n_linhas, n_arvores)."""
+        # O sklearn compara X em float32 com limiares em float64; repetimos exatamente isso
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Esperado X com {self.n_features} colunas, recebido {X.shape}.")
+
+        n_linhas = X.shape[0]
+        X_plano = np.ascontiguousarray(X).ravel()
+
+        # Uma descida por par (linha, árvore), em ordem linha-major; só as que ainda não
+        # chegaram em folha continuam no laço, então árvores rasas saem logo da conta.
+        nos = np.tile(self.raizes, n_linhas)
+        ativos = np.flatnonzero(~self._eh_folha[nos])
+        atuais = nos[ativos]
+        base = (ativos // self.n_arvores) * self.n_features
+        while ativos.size:
+            vai_para_esquerda = X_plano[base + self.feature[atuais]] <= self.limiar[atuais]
+            atuais = np.where(vai_para_esquerda, self.esquerda[atuais], self.direita[atuais])
+            chegou = self._eh_folha[atuais]
+            if chegou.any():
+                nos[ativos[chegou]] = atuais[chegou]
+                continua = ~chegou
+                ativos, atuais, base = ativos[continua], atuais[continua], base[continua]
+        return nos.reshape(n_linhas, self.n_arvores)
+
+    def avaliar(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna (probabilidades, votos), ambos (n_linhas, n_classes).
+        `probabilidades` é a média das probabilidades das folhas (igual ao predict_proba do sklearn);
+        `votos` é a fração de árvores cuja folha elege cada classe, obtida da mesma descida.
+        """
+        valores_folhas = self.valores[self.folhas(X)]  # (n_linhas, n_arvores, n_classes)
+        probabilidades = valores_folhas.sum(axis=1) / self.n_arvores
+
+        n_classes = len(self.classes)
+        eleitas = valores_folhas.argmax(axis=2)
+        votos = np.stack([(eleitas == classe).mean(axis=1) for classe in range(n_classes)], axis=1)
+        return probabilidades, votos
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.valores[self.folhas(X)].sum(axis=1) / self.n_arvores
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
@@ -0,0 +1,224 @@
+"""
+Gravação do histórico de simulações em segundo plano (write-behind).
+
+No modo síncrono, cada /simular-direto faz INSERT + commit na própria requisição, e o lock de
+escrita único do SQLite vira o teto de vazão das predições, embora ninguém leia a linha de volta.
+Com GRAVACAO_ASSINCRONA, a linha entra em uma fila limitada em memória e uma thread dedicada
+grava lotes de até GRAVACAO_MAX_LOTE linhas (ou o que chegou em GRAVACAO_INTERVALO_MS) com um
+único INSERT em lote e um commit (`crud.registrar_simulacoes_lote`). Se o lote falhar, ele é
+dividido ao meio até isolar as linhas com erro; só essas são descartadas (perdidas_erro).
+
+Ao encerrar a API, `parar` grava o que ainda estiver na fila. Linhas ainda na fila se perdem
+se o processo morrer sem esse encerramento.
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .database import SessionLocal
+from .config import (
+    GRAVACAO_ASSINCRONA,
+    GRAVACAO_INTERVALO_MS,
+    GRAVACAO_MAX_LOTE,
+    GRAVACAO_MAX_FILA,
+    GRAVACAO_POLITICA_FILA_CHEIA,
+)
+
+POLITICAS_FILA_CHEIA = ("sincrono", "descartar")
+
+
+class GravadorSimulacoes:
+    """Fila limitada de linhas da tabela simulacao, gravadas em lotes por uma thread dedicada."""
+
+    def __init__(
+        self,
+        fabrica_sessao: Callable[[], Session],
+        intervalo_ms: float,
+        max_lote: int,
+        max_fila: int,
+        politica_fila_cheia: str,
+    ):
+        if politica_fila_cheia not in POLITICAS_FILA_CHEIA:
+            print(f"⚠️ Política de fila cheia '{politica_fila_cheia}' desconhecida; usando 'sincrono'.")
+            politica_fila_cheia = "sincrono"
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo_s = max(0.0, intervalo_ms) / 1000.0
+        self.max_lote = max(1, max_lote)
+        self.max_fila = max(1, max_fila)
+        self.politica_fila_cheia = politica_fila_cheia
+
+        self._fila: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=self.max_fila)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.enfileiradas = 0
+        self.gravadas = 0
+        self.lotes = 0
+        self.fila_maxima = 0
+        self.descartadas_fila_cheia = 0
+        self.desviadas_sincrono = 0
+        self.lotes_com_erro = 0
+        self.perdidas_erro = 0
+        self.tempo_gravacao_s = 0.0
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="gravador-simulacoes", daemon=True)
+                self._thread.start()
+
+    def parar(self, timeout: float = 10.0) -> None:
+        """Grava o que já está na fila e encerra a thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._fila.put(None)
+            thread.join(timeout)
+
+    def enviar(self, registro: dict) -> bool:
+        """
+        Enfileira uma linha do histórico. Retorna False quando o chamador deve gravá-la
+        ele mesmo (fila cheia com a política 'sincrono').
+        """
+        if self._thread is None:
+            self.iniciar()
+        # A data é a da simulação, não a da gravação do lote
+        registro.setdefault("data_simulacao", datetime.utcnow())
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            with self._lock:
+                if self.politica_fila_cheia == "descartar":
+                    self.descartadas_fila_cheia += 1
+                    return True
+                self.desviadas_sincrono += 1
+                return False
+        profundidade = self._fila.qsize()
+        with self._lock:
+            self.enfileiradas += 1
+            if profundidade > self.fila_maxima:
+                self.fila_maxima = profundidade
+        return True
+
+    def _coletar_lote(self, primeiro: dict) -> tuple:
+        """Junta linhas até encher o lote ou estourar o intervalo. Retorna (lote, encerrar)."""
+        lote = [primeiro]
+        limite = time.monotonic() + self.intervalo_s
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _tentar(self, lote: List[dict]) -> Optional[Exception]:
+        """Grava o lote em uma transação própria. Retorna o erro (já com rollback) ou None."""
+        db = self.fabrica_sessao()
+        try:
+            crud.registrar_simulacoes_lote(db, lote)
+        except Exception as e:
+            return e
+        finally:
+            db.close()
+        return None
+
+    def _gravar_em_partes(self, lote: List[dict]) -> tuple:
+        """
+        Divide ao meio o lote que falhou, até isolar as linhas com problema: uma linha inválida
+        não leva junto as outras do lote. Retorna (gravadas, perdidas).
+        """
+        meio = len(lote) // 2
+        gravadas = perdidas = 0
+        for metade in (lote[:meio], lote[meio:]):
+            erro = self._tentar(metade)
+            if erro is None:
+                gravadas += len(metade)
+            elif len(metade) == 1:
+                perdidas += 1
+                print(f"⚠️ Simulação descartada do histórico. Detalhe: {erro}")
+            else:
+                gravadas_parte, perdidas_parte = self._gravar_em_partes(metade)
+                gravadas += gravadas_parte
+                perdidas += perdidas_parte
+        return gravadas, perdidas
+
+    def _gravar(self, lote: List[dict]) -> None:
+        inicio = time.perf_counter()
+        erro = self._tentar(lote)
+        if erro is None:
+            gravadas, perdidas = len(lote), 0
+        elif len(lote) == 1:
+            gravadas, perdidas = 0, 1
+            print(f"⚠️ Simulação descartada do histórico. Detalhe: {erro}")
+        else:
+            print(f"⚠️ Falha ao gravar {len(lote)} simulações do histórico; regravando em partes. Detalhe: {erro}")
+            gravadas, perdidas = self._gravar_em_partes(lote)
+        with self._lock:
+            self.tempo_gravacao_s += time.perf_counter() - inicio
+            self.lotes += 1
+            self.gravadas += gravadas
+            self.perdidas_erro += perdidas
+            if erro is not None:
+                self.lotes_com_erro += 1
+
+    def _executar(self) -> None:
+        encerrar = False
+        while not encerrar:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                break
+            lote, encerrar = self._coletar_lote(primeiro)
+            self._gravar(lote)
+        # Itens que chegaram depois do sinal de parada
+        restantes = []
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                restantes.append(item)
+        for inicio in range(0, len(restantes), self.max_lote):
+            self._gravar(restantes[inicio:inicio + self.max_lote])
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return self._estatisticas()
+
+    def _estatisticas(self) -> dict:
+        return {
+            "ativo": GRAVACAO_ASSINCRONA,
+            "intervalo_ms": self.intervalo_s * 1000.0,
+            "max_lote": self.max_lote,
+            "max_fila": self.max_fila,
+            "politica_fila_cheia": self.politica_fila_cheia,
+            "fila_atual": self._fila.qsize(),
+            "fila_maxima": self.fila_maxima,
+            "enfileiradas": self.enfileiradas,
+            "gravadas": self.gravadas,
+            "lotes": self.lotes,
+            "tamanho_medio_lote": round(self.gravadas / self.lotes, 2) if self.lotes else 0.0,
+            "descartadas_fila_cheia": self.descartadas_fila_cheia,
+            "desviadas_sincrono": self.desviadas_sincrono,
+            "lotes_com_erro": self.lotes_com_erro,
+            "perdidas_erro": self.perdidas_erro,
+            "tempo_medio_lote_ms": round(self.tempo_gravacao_s * 1000.0 / self.lotes, 3) if self.lotes else 0.0,
+        }
+
+
+GRAVADOR = GravadorSimulacoes(
+    fabrica_sessao=SessionLocal,
+    intervalo_ms=GRAVACAO_INTERVALO_MS,
+    max_lote=GRAVACAO_MAX_LOTE,
+    max_fila=GRAVACAO_MAX_FILA,
+    politica_fila_cheia=GRAVACAO_POLITICA_FILA_CHEIA,
+)
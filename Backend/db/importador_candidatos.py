@@ -0,0 +1,266 @@
+"""
+Importação em massa de candidatos (com instituição, curso e inscrição).
+
+Em vez de um `flush` e dois SELECTs (get_or_create) por candidato, as instituições (por sigla)
+e os cursos (por nome + instituição) já existentes são carregados uma única vez em dicionários.
+Cada bloco de candidatos vira poucos comandos: um INSERT em lote para as instituições novas,
+um para os cursos novos, um para os candidatos e um para as inscrições. Repetições dentro do
+próprio lote são resolvidas nos dicionários, sem ida ao banco.
+
+As senhas são convertidas em hash bcrypt em um pool de processos (pass_utils). O hash do
+próximo bloco é enviado ao pool antes de o bloco atual ser inserido, de modo que o banco e os
+processos de hash trabalham ao mesmo tempo.
+
+O importador não faz commit: quem chama decide se o lote inteiro é uma transação
+(create_candidatos_lote) ou se cada bloco é confirmado ao final (importação em streaming).
+
+Para arquivos grandes, `registros_ndjson` e `registros_csv` leem o corpo da requisição
+incrementalmente e entregam um registro (dict) por vez, com o número da linha de origem.
+Uma linha (ou registro CSV) acima de IMPORTACAO_MAX_BYTES_LINHA interrompe a leitura com
+LinhaMuitoLonga, em vez de acumular o corpo inteiro em memória.
+"""
+import csv
+import json
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .config import IMPORTACAO_MAX_BYTES_LINHA
+from .auth.pass_utils import hash_senhas_em_paralelo
+from .config import IMPORTACAO_TAMANHO_BLOCO
+
+ANO_SISU_PADRAO = 2024
+
+
+def _em_blocos(itens: Iterable, tamanho: int) -> Iterator[list]:
+    bloco = []
+    for item in itens:
+        bloco.append(item)
+        if len(bloco) >= tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+class ImportadorCandidatos:
+    """Insere candidatos em blocos, reaproveitando instituições e cursos já conhecidos."""
+
+    def __init__(self, db: Session, tamanho_bloco: int = IMPORTACAO_TAMANHO_BLOCO):
+        self.db = db
+        self.tamanho_bloco = max(1, tamanho_bloco)
+
+        # Pré-carga: sigla -> ID e (nome_curso, ID_instituicao) -> ID
+        self.instituicoes: Dict[str, int] = {
+            sigla: id_instituicao
+            for id_instituicao, sigla in db.execute(select(models.Instituicao.ID, models.Instituicao.sigla))
+        }
+        self.cursos: Dict[Tuple[str, int], int] = {
+            (nome_curso, id_instituicao): id_curso
+            for id_curso, nome_curso, id_instituicao in db.execute(
+                select(models.Curso.ID, models.Curso.nome_curso, models.Curso.ID_instituicao)
+            )
+        }
+
+        self.linhas = 0
+        self.blocos = 0
+        self.instituicoes_criadas = 0
+        self.cursos_criados = 0
+        self._inicio = time.perf_counter()
+
+    def importar(self, candidatos: Iterable[schemas.CandidatoCompleto]) -> dict:
+        """Importa todos os candidatos, um bloco por vez. Retorna o resumo."""
+        pendente = None
+        for bloco in _em_blocos(candidatos, self.tamanho_bloco):
+            hashes = self.preparar_hashes(bloco)
+            if pendente:
+                self.inserir_bloco(*pendente)
+            pendente = (bloco, hashes)
+        if pendente:
+            self.inserir_bloco(*pendente)
+        return self.resumo()
+
+    def preparar_hashes(self, bloco: List[schemas.CandidatoCompleto]) -> List[Future]:
+        """Envia as senhas do bloco ao pool de hash sem esperar (ver `inserir_bloco`)."""
+        return hash_senhas_em_paralelo([candidato.senha for candidato in bloco])
+
+    def inserir_bloco(self, bloco: List[schemas.CandidatoCompleto], hashes: Optional[List[Future]] = None) -> None:
+        """
+        Insere um bloco de candidatos com um INSERT em lote por tabela.
+        `hashes` vem de `preparar_hashes`; sem ele, os hashes são gerados aqui.
+        """
+        if not bloco:
+            return
+        if hashes is None:
+            hashes = self.preparar_hashes(bloco)
+        senhas = [senha for futuro in hashes for senha in futuro.result()]
+        ids_instituicao = self._garantir_instituicoes(bloco)
+        ids_curso = self._garantir_cursos(bloco, ids_instituicao)
+
+        linhas_candidato = [
+            {**candidato.model_dump(exclude={'instituicao', 'curso', 'modalidade_concorrencia'}), "senha": senha}
+            for candidato, senha in zip(bloco, senhas)
+        ]
+        ids_candidato = self.db.scalars(
+            insert(models.Candidato).returning(models.Candidato.ID, sort_by_parameter_order=True),
+            linhas_candidato,
+        ).all()
+
+        self.db.execute(insert(models.Inscricao), [
+            {
+                "ano_sisu": ANO_SISU_PADRAO,
+                "modalidade": candidato.modalidade_concorrencia,
+                "ID_Candidato": id_candidato,
+                "ID_curso": id_curso,
+            }
+            for candidato, id_candidato, id_curso in zip(bloco, ids_candidato, ids_curso)
+        ])
+
+        self.linhas += len(bloco)
+        self.blocos += 1
+
+    def _garantir_instituicoes(self, bloco: List[schemas.CandidatoCompleto]) -> List[int]:
+        novas: Dict[str, dict] = {}
+        for candidato in bloco:
+            sigla = candidato.instituicao.sigla
+            if sigla not in self.instituicoes and sigla not in novas:
+                novas[sigla] = candidato.instituicao.model_dump()
+        if novas:
+            criadas = self.db.execute(
+                insert(models.Instituicao).returning(models.Instituicao.ID, models.Instituicao.sigla),
+                list(novas.values()),
+            )
+            for id_instituicao, sigla in criadas:
+                self.instituicoes[sigla] = id_instituicao
+            self.instituicoes_criadas += len(novas)
+        return [self.instituicoes[candidato.instituicao.sigla] for candidato in bloco]
+
+    def _garantir_cursos(self, bloco: List[schemas.CandidatoCompleto], ids_instituicao: List[int]) -> List[int]:
+        novos: Dict[Tuple[str, int], dict] = {}
+        for candidato, id_instituicao in zip(bloco, ids_instituicao):
+            chave = (candidato.curso.nome_curso, id_instituicao)
+            if chave not in self.cursos and chave not in novos:
+                novos[chave] = {**candidato.curso.model_dump(), "ID_instituicao": id_instituicao}
+        if novos:
+            criados = self.db.execute(
+                insert(models.Curso).returning(models.Curso.ID, models.Curso.nome_curso, models.Curso.ID_instituicao),
+                list(novos.values()),
+            )
+            for id_curso, nome_curso, id_instituicao in criados:
+                self.cursos[(nome_curso, id_instituicao)] = id_curso
+            self.cursos_criados += len(novos)
+        return [
+            self.cursos[(candidato.curso.nome_curso, id_instituicao)]
+            for candidato, id_instituicao in zip(bloco, ids_instituicao)
+        ]
+
+    def resumo(self) -> dict:
+        segundos = time.perf_counter() - self._inicio
+        return {
+            "linhas": self.linhas,
+            "blocos": self.blocos,
+            "instituicoes_criadas": self.instituicoes_criadas,
+            "cursos_criados": self.cursos_criados,
+            "segundos": round(segundos, 3),
+            "linhas_por_s": round(self.linhas / segundos, 1) if segundos > 0 else 0.0,
+        }
+
+
+# --------------------------------------
+# LEITURA INCREMENTAL (NDJSON / CSV)
+# --------------------------------------
+
+class LinhaMuitoLonga(Exception):
+    """Linha ou registro acima do limite de tamanho da importação em streaming."""
+
+    def __init__(self, numero: int, limite: int):
+        super().__init__(f"A linha {numero} passa do limite de {limite} bytes.")
+        self.numero = numero
+        self.limite = limite
+
+
+async def _linhas(partes: AsyncIterator[bytes], limite: int = IMPORTACAO_MAX_BYTES_LINHA) -> AsyncIterator[str]:
+    """Quebra o corpo (recebido em pedaços) em linhas de texto, com o '\n' no final."""
+    pendente = b""
+    primeira = True
+    numero = 0
+    async for parte in partes:
+        pendente += parte
+        *completas, pendente = pendente.split(b"\n")
+        for linha in completas:
+            numero += 1
+            if len(linha) > limite:
+                raise LinhaMuitoLonga(numero, limite)
+            texto = linha.decode("utf-8-sig" if primeira else "utf-8")
+            primeira = False
+            yield texto + "\n"
+        if len(pendente) > limite:
+            raise LinhaMuitoLonga(numero + 1, limite)
+    if pendente:
+        yield pendente.decode("utf-8-sig" if primeira else "utf-8")
+
+
+async def registros_ndjson(partes: AsyncIterator[bytes],
+                           limite: int = IMPORTACAO_MAX_BYTES_LINHA) -> AsyncIterator[Tuple[int, Any]]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas. JSON inválido vira uma exceção no item."""
+    numero = 0
+    async for linha in _linhas(partes, limite):
+        numero += 1
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield numero, ValueError(f"JSON inválido: {e.msg}")
+
+
+def _aninhar(cabecalho: List[str], valores: List[str]) -> Dict[str, Any]:
+    """Colunas 'instituicao.sigla' / 'curso.nome_curso' viram os objetos aninhados; vazio = ausente."""
+    registro: Dict[str, Any] = {}
+    for coluna, valor in zip(cabecalho, valores):
+        if valor == "":
+            continue
+        destino = registro
+        *caminho, campo = coluna.split(".")
+        for parte in caminho:
+            destino = destino.setdefault(parte, {})
+        destino[campo] = valor
+    return registro
+
+
+async def registros_csv(partes: AsyncIterator[bytes],
+                        limite: int = IMPORTACAO_MAX_BYTES_LINHA) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    CSV com cabeçalho (ex: nome,email,senha,...,instituicao.sigla,curso.nome_curso).
+    Campos entre aspas podem conter quebras de linha: as linhas são acumuladas até as aspas fecharem
+    (o registro inteiro também respeita o limite de tamanho).
+    """
+    cabecalho: Optional[List[str]] = None
+    registro, aspas, numero, inicio = "", 0, 0, 0
+    async for linha in _linhas(partes, limite):
+        numero += 1
+        if not registro:
+            inicio = numero
+        registro += linha
+        if len(registro) > limite:
+            raise LinhaMuitoLonga(inicio, limite)
+        aspas += linha.count('"')
+        if aspas % 2:
+            continue  # Ainda dentro de um campo entre aspas
+        texto, registro, aspas = registro, "", 0
+        if not texto.strip():
+            continue
+        valores = next(csv.reader([texto]))
+        if cabecalho is None:
+            cabecalho = [coluna.strip() for coluna in valores]
+            continue
+        if len(valores) != len(cabecalho):
+            yield inicio, ValueError(f"Esperadas {len(cabecalho)} colunas, encontradas {len(valores)}.")
+            continue
+        yield inicio, _aninhar(cabecalho, valores)
+    if registro.strip():
+        yield inicio, ValueError("Campo entre aspas não foi fechado até o fim do arquivo.")
@@ -0,0 +1,91 @@
+"""
+Ajustes de esquema aplicados na inicialização, para bancos já existentes.
+
+`Base.metadata.create_all` só cria tabelas que ainda não existem (e os índices delas);
+índices declarados depois nos modelos não chegam às tabelas antigas. Aqui eles são criados
+se estiverem faltando (CREATE INDEX IF NOT EXISTS), sem recriar nada.
+
+`preparar_visao_simulacao` (chamada ao fim de cada create_all) converte a antiga tabela
+simulacao, com textos por extenso, para simulacao_dados + simulacao_texto e cria no lugar
+dela a view `simulacao`, com as mesmas colunas.
+"""
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base
+
+
+def criar_indices_ausentes(engine: Engine) -> list:
+    """Cria os índices declarados nos modelos que ainda não existem no banco. Retorna os nomes criados."""
+    inspetor = inspect(engine)
+    tabelas_existentes = set(inspetor.get_table_names())
+    # Lidos do sqlite_master: o inspetor não devolve índices de expressão (ex: lower(nome_curso))
+    with engine.connect() as conexao:
+        existentes = set(conexao.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    criados = []
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name not in tabelas_existentes:
+            continue
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                indice.create(bind=engine)
+                criados.append(indice.name)
+    if criados:
+        print(f"✅ Índices criados no banco: {', '.join(criados)}")
+    return criados
+
+
+def _sql_visao_simulacao(colunas_texto) -> list:
+    juncoes = "\n".join(
+        f"JOIN simulacao_texto t_{coluna} ON t_{coluna}.ID = d.{coluna}_id" for coluna in colunas_texto
+    )
+    selecao = ", ".join(f"t_{coluna}.texto AS {coluna}" for coluna in colunas_texto)
+    valores_texto = ", ".join(f"(NEW.{coluna})" for coluna in colunas_texto)
+    colunas_id = ", ".join(f"{coluna}_id" for coluna in colunas_texto)
+    busca_ids = ", ".join(f"(SELECT ID FROM simulacao_texto WHERE texto = NEW.{coluna})" for coluna in colunas_texto)
+    return [
+        f"""CREATE VIEW IF NOT EXISTS simulacao AS
+            SELECT d.ID, d.data_simulacao, d.idade, d.pcd, {selecao}
+            FROM simulacao_dados d
+            {juncoes}""",
+        f"""CREATE TRIGGER IF NOT EXISTS simulacao_inserir INSTEAD OF INSERT ON simulacao
+            BEGIN
+                INSERT OR IGNORE INTO simulacao_texto (texto) VALUES {valores_texto};
+                INSERT INTO simulacao_dados (ID, data_simulacao, idade, pcd, {colunas_id})
+                VALUES (NEW.ID, COALESCE(NEW.data_simulacao, datetime('now')), NEW.idade, NEW.pcd, {busca_ids});
+            END""",
+        """CREATE TRIGGER IF NOT EXISTS simulacao_apagar INSTEAD OF DELETE ON simulacao
+            BEGIN
+                DELETE FROM simulacao_dados WHERE ID = OLD.ID;
+            END""",
+    ]
+
+
+def _migrar_tabela_simulacao(conexao: Connection, colunas_texto) -> int:
+    """Copia a antiga tabela simulacao (textos por extenso) para simulacao_dados e a remove."""
+    inicio = time.perf_counter()
+    uniao = " UNION ".join(f"SELECT {coluna} FROM simulacao" for coluna in colunas_texto)
+    conexao.execute(text(f"INSERT OR IGNORE INTO simulacao_texto (texto) {uniao}"))
+    colunas_id = ", ".join(f"{coluna}_id" for coluna in colunas_texto)
+    ids = ", ".join(f"t_{coluna}.ID" for coluna in colunas_texto)
+    juncoes = " ".join(f"JOIN simulacao_texto t_{coluna} ON t_{coluna}.texto = s.{coluna}" for coluna in colunas_texto)
+    copiadas = conexao.execute(text(
+        f"INSERT INTO simulacao_dados (ID, data_simulacao, idade, pcd, {colunas_id}) "
+        f"SELECT s.ID, s.data_simulacao, s.idade, s.pcd, {ids} FROM simulacao s {juncoes}"
+    )).rowcount
+    conexao.execute(text("DROP TABLE simulacao"))
+    print(f"✅ Histórico de simulações convertido para o armazenamento com dicionário: "
+          f"{copiadas} linhas em {time.perf_counter() - inicio:.1f} s (rode VACUUM para liberar o espaço antigo).")
+    return copiadas
+
+
+def preparar_visao_simulacao(conexao: Connection) -> None:
+    from .models import COLUNAS_TEXTO_SIMULACAO
+
+    tipo = conexao.execute(text("SELECT type FROM sqlite_master WHERE name = 'simulacao'")).scalar()
+    if tipo == "table":
+        _migrar_tabela_simulacao(conexao, COLUNAS_TEXTO_SIMULACAO)
+    for comando in _sql_visao_simulacao(COLUNAS_TEXTO_SIMULACAO):
+        conexao.execute(text(comando))
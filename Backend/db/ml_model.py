@@ -1,22 +1,27 @@
 import os
+import time
+import warnings
 import numpy as np
 import pandas as pd
-from typing import Dict, Any
-import joblib
-
-# Paths (Assumindo recursos estão na mesma pasta)
-MODELO_PATH = os.path.join(os.path.dirname(__file__), "modelo_rf.pkl")
-COLUNAS_PATH = os.path.join(os.path.dirname(__file__), "colunas_esperadas.pkl")
-IES_PATH = os.path.join(os.path.dirname(__file__), "top_ies_agrupadas.pkl")
-CURSO_PATH = os.path.join(os.path.dirname(__file__), "top_cursos_agrupados.pkl")
-
-# Variáveis globais para armazenar os recursos
-MODELO_DE_IA = None
-COLUNAS_ESPERADAS = None 
-TOP_IES = None 
-TOP_CURSOS = None 
-
-# Lista COLUNAS_FIM original (manter por compatibilidade se estiver sendo usada em outro lugar, mas COLUNAS_ESPERADAS será carregada do PKL)
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from .cache_predicoes import CachePredicoes
+from .cronometro import etapa
+from .vocabulario import IndiceVocabulario, escolher_grafia, grafias_repetidas, normalizar_nome
+from .esquema_features import COLUNAS_DE_ENTRADA, COLUNAS_PARA_OHE, normalizar_categoria as _normalizar_categoria
+from .floresta_compilada import FlorestaCompilada
+from .bundle_modelo import BUNDLE_PADRAO, BundleInvalido, carregar_bundle, conferir_floresta
+from .config import CACHE_PREDICOES_CAPACIDADE, BACKEND_INFERENCIA, CONFERIR_FLORESTA_NA_CARGA, LIMITE_LINHAS_COMPILADO, MODELO_BUNDLE
+
+# Bundle único com todos os artefatos do modelo
+# (gerado pelo notebook ou, a partir dos PKLs antigos, por `python -m db.bundle_modelo converter`)
+MODELO_BUNDLE_PATH = MODELO_BUNDLE or BUNDLE_PADRAO
+
+# Cache LRU das predições, vinculado à impressão digital do modelo em uso
+CACHE_PREDICOES = CachePredicoes(CACHE_PREDICOES_CAPACIDADE)
+
+# Lista COLUNAS_FIM original (manter por compatibilidade se estiver sendo usada em outro lugar, mas as colunas esperadas vêm do bundle)
 COLUNAS_FIM = [
     'IDADE',
     'RACA_BENEFICIARIO_BOLSA_Amarela',
@@ -195,58 +200,454 @@ COLUNAS_FIM = [
     'STATUS_DEFICIENCIA_TEXT_Sim'
 ]
 
+# O modelo foi treinado com DataFrame; a predição com numpy é intencional (sem feature names)
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+def _converter_idade(valor: Any) -> float:
+    """Equivalente a `pd.to_numeric(errors='coerce').fillna(0)` para um único valor."""
+    if valor is None:
+        return 0.0
+    if isinstance(valor, (bool, np.bool_, int, float, np.number)):
+        numero = float(valor)
+    else:
+        texto = str(valor)
+        if '_' in texto:
+            return 0.0
+        try:
+            numero = float(texto)
+        except ValueError:
+            return 0.0
+    return 0.0 if numero != numero else numero
+
+
+class CodificadorOHE:
+    """
+    Codificador One-Hot pré-compilado, sem pandas.
+
+    Construído uma única vez (no carregamento) a partir de COLUNAS_ESPERADAS, TOP_IES e TOP_CURSOS
+    (e das colunas preferidas do bundle, para colunas com o mesmo nome normalizado):
+    cada valor de feature, já normalizado (sem acentos, casefold), é mapeado direto para o índice da
+    sua coluna por um IndiceVocabulario, e a linha é preenchida em um array numpy pré-alocado.
+    O resultado é idêntico ao de `pre_processar_features`.
+    """
+
+    def __init__(self, colunas_esperadas: Sequence[str], top_ies: Iterable[str], top_cursos: Iterable[str],
+                 colunas_preferidas: Iterable[str] = ()):
+        self.colunas = list(colunas_esperadas)
+        self.n_colunas = len(self.colunas)
+        self.top_ies = frozenset(top_ies)
+        self.top_cursos = frozenset(top_cursos)
+        self.colunas_preferidas = frozenset(colunas_preferidas)
+
+        posicoes = {nome: indice for indice, nome in enumerate(self.colunas)}
+        self.indice_idade = posicoes.get('IDADE')
+
+        # Para cada feature OHE: valor normalizado -> índice da coluna "<FEATURE>_<valor>".
+        # Valores sem coluna correspondente são descartados, exatamente como no reindex;
+        # IES e cursos fora do Top-N vão para a coluna OUTRAS_IES / OUTROS_CURSOS.
+        agrupamentos = {
+            'NOME_IES_AGRUPADO': (self.top_ies, 'OUTRAS_IES'),
+            'NOME_CURSO_AGRUPADO': (self.top_cursos, 'OUTROS_CURSOS'),
+        }
+        self.indices: List[IndiceVocabulario] = []
+        for feature in COLUNAS_PARA_OHE:
+            prefixo = feature + '_'
+            colunas = {
+                nome[len(prefixo):]: indice
+                for nome, indice in posicoes.items() if nome.startswith(prefixo)
+            }
+            preferidas = {nome[len(prefixo):] for nome in self.colunas_preferidas if nome.startswith(prefixo)}
+            vocabulario, fallback = agrupamentos.get(feature, (None, None))
+            self.indices.append(IndiceVocabulario.de_colunas(feature, colunas, vocabulario, fallback, preferidas))
+
+    def estatisticas(self) -> dict:
+        """Taxa de acerto de cada vocabulário (exposta em /metricas)."""
+        return {indice.nome: indice.estatisticas() for indice in self.indices}
+
+    def chave(self, features: Dict[str, Any], contar: bool = True) -> Tuple:
+        """
+        Forma normalizada das features, já com o agrupamento Top-N aplicado:
+        (idade, índice OHE de cada uma das 8 categorias). Entradas com a mesma chave
+        produzem exatamente a mesma linha, por isso ela serve de chave para o cache.
+        """
+        idade, indices = self._indices(features, contar)
+        return (idade,) + indices
+
+    def _indices(self, features: Dict[str, Any], contar: bool = True) -> Tuple[float, Tuple[int, ...]]:
+        """Retorna (idade, índices das colunas OHE ativas); -1 quando a categoria não tem coluna."""
+        try:
+            idade = features['IDADE']
+            valores = [
+                features['SEXO_BENEFICIARIO_BOLSA'],
+                features['STATUS_DEFICIENCIA_TEXT'],
+                features['RACA_BENEFICIARIO_BOLSA'],
+                features['REGIAO_BENEFICIARIO_BOLSA'],
+                features['MODALIDADE_ENSINO_BOLSA'],
+                features['NOME_TURNO_CURSO_BOLSA'],
+                features['NOME_IES_BOLSA'],
+                features['NOME_CURSO_BOLSA'],
+            ]
+            features['MODALIDADE_CONCORRENCIA']  # Exigida na entrada, mas não entra no OHE
+        except KeyError as e:
+            raise Exception(f"A feature essencial {e} está faltando no dicionário de entrada.")
+
+        # O agrupamento Top-N já está nos índices de IES e cursos
+        indices = tuple(
+            indice.indice(normalizar_nome(_normalizar_categoria(valor)), contar)
+            for indice, valor in zip(self.indices, valores)
+        )
+        return _converter_idade(idade), indices
+
+    def _preencher(self, linha: np.ndarray, idade: float, indices: Tuple[int, ...]) -> None:
+        if self.indice_idade is not None:
+            linha[self.indice_idade] = idade
+        for indice in indices:
+            if indice >= 0:
+                linha[indice] = 1.0
+
+    def codificar(self, features: Union[Dict[str, Any], Sequence[Dict[str, Any]]], contar: bool = True) -> np.ndarray:
+        """
+        Codifica um dicionário (ou uma lista de dicionários) de features.
+        Retorna sempre uma matriz (n_linhas, n_colunas) em float64, pronta para o `predict`.
+        """
+        lista = [features] if isinstance(features, dict) else features
+        matriz = np.zeros((len(lista), self.n_colunas), dtype=np.float64)
+        for linha, item in zip(matriz, lista):
+            idade, indices = self._indices(item, contar)
+            self._preencher(linha, idade, indices)
+        return matriz
+
+    def matriz_de_chaves(self, chaves: Sequence[Tuple]) -> np.ndarray:
+        """Monta a matriz (n_linhas, n_colunas) a partir de chaves geradas por `chave`."""
+        matriz = np.zeros((len(chaves), self.n_colunas), dtype=np.float64)
+        for linha, chave in zip(matriz, chaves):
+            self._preencher(linha, chave[0], chave[1:])
+        return matriz
+
+
+class EstimadorSobDemanda:
+    """
+    Estimador do sklearn desserializado do bundle só no primeiro uso (lotes grandes no backend
+    'compilado'): a carga normal não paga o unpickling nem a memória do estimador.
+    """
+
+    def __init__(self, ler_estimador):
+        self._ler_estimador = ler_estimador
+        self._estimador = None
+        self._lock = threading.Lock()
+
+    @property
+    def carregado(self) -> bool:
+        return self._estimador is not None
+
+    def predict(self, matriz: np.ndarray) -> np.ndarray:
+        if self._estimador is None:
+            with self._lock:
+                if self._estimador is None:
+                    self._estimador = self._ler_estimador()
+        return self._estimador.predict(matriz)
+
+
+class ContextoModelo(NamedTuple):
+    """
+    Tudo o que a predição precisa, em um único objeto imutável.
+    A troca de modelo substitui a referência ao contexto de uma vez só (atribuição atômica):
+    cada requisição lê o contexto uma vez e nunca enxerga uma combinação de recursos antigos e novos.
+    """
+    modelo: Any  # Estimador do sklearn (no backend 'compilado', um EstimadorSobDemanda)
+    colunas: List[str]
+    top_ies: frozenset
+    top_cursos: frozenset
+    codificador: "CodificadorOHE"
+    floresta: Optional[FlorestaCompilada]  # None quando o backend é o sklearn
+    impressao: str  # Hash do conteúdo dos artefatos; escopo do cache de predições
+    versao: str
+    origem: str
+    carregado_em: str
+
+
+# Contexto em uso (substituído por inteiro em recarregar_modelo)
+_CONTEXTO: Optional[ContextoModelo] = None
+_LOCK_CARGA = threading.Lock()
+
+# Situação da última recarga (exposta em /admin/modelo)
+ESTADO_RECARGA: Dict[str, Any] = {"estado": "ocioso", "ultimo_erro": None, "ultima_troca": None}
+
+
+def _verificar_codificador(codificador: CodificadorOHE) -> None:
+    """Confere, no carregamento, se o codificador compilado bate com o caminho em pandas."""
+    amostras = [
+        {
+            'IDADE': 18, 'SEXO_BENEFICIARIO_BOLSA': 'F', 'STATUS_DEFICIENCIA_TEXT': 'Não',
+            'RACA_BENEFICIARIO_BOLSA': 'Parda', 'REGIAO_BENEFICIARIO_BOLSA': 'Nordeste',
+            'MODALIDADE_ENSINO_BOLSA': 'Presencial', 'NOME_TURNO_CURSO_BOLSA': 'Noturno',
+            'MODALIDADE_CONCORRENCIA': 'Ampla concorrência',
+            'NOME_IES_BOLSA': next(iter(sorted(codificador.top_ies)), ''),
+            'NOME_CURSO_BOLSA': next(iter(sorted(codificador.top_cursos)), ''),
+        },
+        {
+            'IDADE': None, 'SEXO_BENEFICIARIO_BOLSA': 'M', 'STATUS_DEFICIENCIA_TEXT': None,
+            'RACA_BENEFICIARIO_BOLSA': 'Branca', 'REGIAO_BENEFICIARIO_BOLSA': 'Sul',
+            'MODALIDADE_ENSINO_BOLSA': 'EAD', 'NOME_TURNO_CURSO_BOLSA': 'Curso a distância',
+            'MODALIDADE_CONCORRENCIA': 'Cotas',
+            'NOME_IES_BOLSA': 'INSTITUIÇÃO FORA DO TOP', 'NOME_CURSO_BOLSA': 'Curso fora do top',
+        },
+        {
+            # Mesmos nomes do vocabulário em outra grafia (caixa, acentos e espaços)
+            'IDADE': '31', 'SEXO_BENEFICIARIO_BOLSA': 'f', 'STATUS_DEFICIENCIA_TEXT': 'SIM',
+            'RACA_BENEFICIARIO_BOLSA': 'indigena', 'REGIAO_BENEFICIARIO_BOLSA': ' centro-oeste ',
+            'MODALIDADE_ENSINO_BOLSA': 'presencial', 'NOME_TURNO_CURSO_BOLSA': 'CURSO A DISTANCIA',
+            'MODALIDADE_CONCORRENCIA': 'Cotas',
+            'NOME_IES_BOLSA': next(iter(sorted(codificador.top_ies)), '').lower(),
+            'NOME_CURSO_BOLSA': '  ' + next(iter(sorted(codificador.top_cursos)), '').upper(),
+        },
+    ]
+    for amostra in amostras:
+        esperado = _pre_processar_pandas(
+            amostra, codificador.colunas, codificador.top_ies, codificador.top_cursos, codificador.colunas_preferidas
+        ).to_numpy(dtype=np.float64)
+        if not np.array_equal(codificador.codificar(amostra, contar=False), esperado):
+            raise Exception("O codificador OHE compilado diverge do pré-processamento em pandas.")
+
+
+def _chaves_sinteticas(codificador: CodificadorOHE, n_amostras: int, semente: int = 0) -> List[Tuple]:
+    """Perfis aleatórios (já como chaves do codificador) para conferência e aquecimento."""
+    rng = np.random.default_rng(semente)
+    return [
+        (float(rng.integers(14, 80)),) + tuple(
+            int(rng.choice(list(indice.mapa.values()) + [indice.indice_fallback]))
+            for indice in codificador.indices
+        )
+        for _ in range(n_amostras)
+    ]
+
+
+def _prever(contexto: ContextoModelo, matriz: np.ndarray) -> np.ndarray:
+    """Predição de uma matriz já codificada, no backend de inferência do contexto."""
+    floresta, modelo = contexto.floresta, contexto.modelo
+    if floresta is not None and (modelo is None or len(matriz) < LIMITE_LINHAS_COMPILADO):
+        return floresta.predict(matriz)
+    return modelo.predict(matriz)
+
+
+def estatisticas_inferencia() -> dict:
+    """Resumo do backend de inferência em uso (exposto em /metricas)."""
+    contexto = _CONTEXTO
+    floresta = contexto.floresta if contexto is not None else None
+    return {
+        "backend_configurado": BACKEND_INFERENCIA,
+        "backend_em_uso": "compilado" if floresta is not None else "sklearn",
+        "limite_linhas_compilado": LIMITE_LINHAS_COMPILADO,
+        "versao_modelo": contexto.versao if contexto is not None else None,
+        "estimador_sklearn_carregado": (
+            contexto is not None and contexto.modelo is not None
+            and getattr(contexto.modelo, "carregado", True)
+        ),
+        "arvores": floresta.n_arvores if floresta is not None else None,
+        "nos": int(len(floresta.feature)) if floresta is not None else None,
+        "profundidade_maxima": floresta.profundidade_maxima if floresta is not None else None,
+    }
+
+
+def estatisticas_vocabulario() -> dict:
+    """Acertos e itens fora do vocabulário por feature OHE, desde a carga do modelo atual."""
+    contexto = _CONTEXTO
+    return contexto.codificador.estatisticas() if contexto is not None else {}
+
+
+def _memoria_residente_mb() -> float:
+    """Memória residente (RSS) do processo atual em MB."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Fora do Linux: pico de RSS (em KB no Linux, em bytes no macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _floresta_confere(bundle: Dict[str, Any]) -> bool:
+    """
+    A paridade entre a floresta compilada e o estimador é conferida ao gerar o bundle e fica no
+    manifesto (coberto pelo checksum): a carga confia nesse registro. Com CONFERIR_FLORESTA_NA_CARGA,
+    a conferência é refeita aqui (desserializando o estimador) e uma divergência devolve False.
+    """
+    if not CONFERIR_FLORESTA_NA_CARGA:
+        if not bundle["floresta_conferida"]:
+            print(
+                "⚠️ O bundle não registra a conferência da floresta compilada (gerado antes desse registro); "
+                "gere o bundle novamente com 'python -m db.bundle_modelo converter' (ou confira com 'verificar')."
+            )
+        return True
+    try:
+        conferir_floresta(bundle["floresta"], bundle["ler_estimador"]())
+    except Exception as e:
+        print(f"⚠️ Floresta compilada recusada ({e}); usando o backend 'sklearn'.")
+        return False
+    return True
+
+
+def _carregar_de_bundle(caminho: str) -> ContextoModelo:
+    """
+    Monta o contexto a partir do bundle: checksum e consistência conferidos em uma única leitura,
+    arrays da floresta mapeados em memória. No backend 'compilado' o estimador do sklearn só é
+    desserializado se chegar um lote acima de LIMITE_LINHAS_COMPILADO (ou, com
+    CONFERIR_FLORESTA_NA_CARGA, para refazer a conferência da floresta; se ela divergir, o
+    contexto usa o sklearn).
+    """
+    usar_sklearn = BACKEND_INFERENCIA != 'compilado'
+    bundle = carregar_bundle(caminho, carregar_estimador=usar_sklearn)
+
+    estimador = bundle["estimador"]
+    if not usar_sklearn and not _floresta_confere(bundle):
+        usar_sklearn = True
+        estimador = bundle["ler_estimador"]()
+
+    codificador = CodificadorOHE(
+        bundle["colunas"], bundle["top_ies"], bundle["top_cursos"], bundle["colunas_preferidas"]
+    )
+    _verificar_codificador(codificador)
+    manifesto = bundle["manifesto"]
+    return ContextoModelo(
+        modelo=estimador if usar_sklearn else EstimadorSobDemanda(bundle["ler_estimador"]),
+        colunas=codificador.colunas,
+        top_ies=codificador.top_ies,
+        top_cursos=codificador.top_cursos,
+        codificador=codificador,
+        floresta=None if usar_sklearn else bundle["floresta"],
+        impressao=manifesto["sha256_conteudo"],
+        versao=manifesto["versao"],
+        origem=f"{os.path.basename(caminho)} ({bundle['bytes_mapeados'] / (1024 * 1024):.1f} MB mapeados)",
+        carregado_em=_agora(),
+    )
+
+
+def _aquecer(contexto: ContextoModelo, n_amostras: int = 8) -> None:
+    """Faz algumas predições no contexto novo antes da troca (e falha se algo estiver errado)."""
+    chaves = _chaves_sinteticas(contexto.codificador, n_amostras, semente=1)
+    for chave in chaves[:2]:
+        _prever(contexto, contexto.codificador.matriz_de_chaves([chave]))
+    predicoes = _prever(contexto, contexto.codificador.matriz_de_chaves(chaves))
+    if len(predicoes) != n_amostras:
+        raise Exception("O aquecimento do modelo retornou um número inesperado de predições.")
+
+
+def _montar_contexto(caminho_bundle: Optional[str] = None) -> ContextoModelo:
+    inicio = time.perf_counter()
+    contexto = _carregar_de_bundle(caminho_bundle or MODELO_BUNDLE_PATH)
+    _aquecer(contexto)
+
+    print(
+        f"✅ Recursos de IA carregados com sucesso! Origem: {contexto.origem}; versão {contexto.versao}; "
+        f"tempo de carga {(time.perf_counter() - inicio) * 1000:.1f} ms; "
+        f"memória residente {_memoria_residente_mb():.1f} MB."
+    )
+    return contexto
+
+
+def obter_contexto() -> ContextoModelo:
+    """Contexto do modelo em uso (carrega na primeira chamada)."""
+    contexto = _CONTEXTO
+    if contexto is None:
+        carregar_recursos_ia()
+        contexto = _CONTEXTO
+    return contexto
+
+
 def carregar_recursos_ia():
-    """Carrega o modelo treinado e os recursos auxiliares."""
-    global MODELO_DE_IA, COLUNAS_ESPERADAS, TOP_IES, TOP_CURSOS
+    """
+    Carrega o modelo treinado e os recursos auxiliares a partir do bundle (MODELO_BUNDLE_PATH).
+    Artefatos corrompidos ou inconsistentes entre si são recusados já na carga.
+    """
+    global _CONTEXTO
     
-    if MODELO_DE_IA is None:
-        try:
-            MODELO_DE_IA = joblib.load(MODELO_PATH) 
-            COLUNAS_ESPERADAS = joblib.load(COLUNAS_PATH) 
-            TOP_IES = joblib.load(IES_PATH) 
-            TOP_CURSOS = joblib.load(CURSO_PATH) 
-            
-            # Checagem de integridade (opcional, mas recomendado)
-            if hasattr(MODELO_DE_IA, 'n_features_in_') and len(COLUNAS_ESPERADAS) != MODELO_DE_IA.n_features_in_:
+    with _LOCK_CARGA:
+        if _CONTEXTO is None:
+            try:
+                _CONTEXTO = _montar_contexto()
+            except FileNotFoundError as e:
                 raise Exception(
-                    f"Inconsistência de Features: Colunas Esperadas ({len(COLUNAS_ESPERADAS)}) != Modelo ({MODELO_DE_IA.n_features_in_})."
+                    f"Arquivo de recurso de IA não encontrado: {e}. Gere o bundle com "
+                    f"'python -m db.bundle_modelo converter' a partir dos arquivos PKL."
                 )
+            except BundleInvalido as e:
+                raise Exception(f"Bundle do modelo recusado: {e}")
+            except Exception as e:
+                raise Exception(f"Erro ao carregar o modelo ou recursos de IA. Detalhe: {e}")
+
+    return _CONTEXTO.modelo
+
+
+def recarregar_modelo(caminho_bundle: Optional[str] = None) -> ContextoModelo:
+    """
+    Carrega um novo modelo (bundle informado, ou a origem padrão) sem parar o serviço:
+    monta e valida um contexto novo (contagem de features, conferências, aquecimento) e só então
+    troca o contexto em uso de uma só vez. Se qualquer etapa falhar, o modelo atual continua ativo.
+    """
+    global _CONTEXTO
 
-            print("✅ Recursos de IA carregados com sucesso!")
-        except FileNotFoundError as e:
-            raise Exception(f"Arquivo de recurso de IA não encontrado: {e}. Certifique-se de ter os arquivos PKL na pasta correta.")
+    with _LOCK_CARGA:
+        ESTADO_RECARGA.update(estado="carregando", ultimo_erro=None)
+        try:
+            novo = _montar_contexto(caminho_bundle)
         except Exception as e:
-            raise Exception(f"Erro ao carregar o modelo ou recursos de IA. Detalhe: {e}")
+            ESTADO_RECARGA.update(estado="erro", ultimo_erro=str(e))
+            raise
+        anterior, _CONTEXTO = _CONTEXTO, novo
+        ESTADO_RECARGA.update(estado="ocioso", ultima_troca=_agora())
 
-    return MODELO_DE_IA
+    print(f"🔄 Modelo trocado: {anterior.versao if anterior else '-'} -> {novo.versao}")
+    return novo
+
+
+def descrever_modelo() -> dict:
+    """Resumo do modelo em uso e da última recarga (exposto em /admin/modelo)."""
+    contexto = _CONTEXTO
+    return {
+        "versao": contexto.versao if contexto else None,
+        "origem": contexto.origem if contexto else None,
+        "impressao": contexto.impressao if contexto else None,
+        "carregado_em": contexto.carregado_em if contexto else None,
+        "n_features": len(contexto.colunas) if contexto else None,
+        "recarga": dict(ESTADO_RECARGA),
+    }
 
-# Garante que o modelo seja carregado quando o módulo for importado
-try:
-    carregar_recursos_ia() 
-except Exception as e:
-    # A exceção será propagada se o carregamento falhar, mas o código continua para análise
-    print(f"Erro de carregamento inicial: {e}") 
 
 def pre_processar_features(features: Dict[str, Any]) -> pd.DataFrame:
     """
     Transforma o dicionário de features no formato DataFrame esperado pelo modelo (OHE),
     garantindo que o número de colunas seja EXATO (175).
+
+    Caminho de referência em pandas: o serviço usa `codificar_features` (CodificadorOHE),
+    que produz exatamente os mesmos valores sem montar DataFrames.
     """
-    global COLUNAS_ESPERADAS, TOP_IES, TOP_CURSOS
-    
-    # Garantir que os recursos estejam carregados antes de usar as globais
-    if COLUNAS_ESPERADAS is None or TOP_IES is None or TOP_CURSOS is None:
-         carregar_recursos_ia() 
-         
+    contexto = obter_contexto()
+    return _pre_processar_pandas(
+        features, contexto.colunas, contexto.top_ies, contexto.top_cursos, contexto.codificador.colunas_preferidas
+    )
+
+def _normalizar_coluna(coluna: str) -> str:
+    """'NOME_CURSO_AGRUPADO_Análise E Sistemas' -> 'NOME_CURSO_AGRUPADO_analise e sistemas'."""
+    for feature in COLUNAS_PARA_OHE:
+        if coluna.startswith(feature + '_'):
+            return feature + '_' + normalizar_nome(coluna[len(feature) + 1:])
+    return coluna
+
+def _pre_processar_pandas(
+    features: Dict[str, Any],
+    colunas_esperadas: Sequence[str],
+    top_ies: Iterable[str],
+    top_cursos: Iterable[str],
+    colunas_preferidas: Iterable[str] = (),
+) -> pd.DataFrame:
+    """Implementação em pandas de `pre_processar_features`, com os recursos explícitos."""
     # 1. Lista de EXATAMENTE as 10 features de entrada
-    colunas_de_entrada = [
-        'IDADE', 
-        'SEXO_BENEFICIARIO_BOLSA', 'STATUS_DEFICIENCIA_TEXT', 
-        'RACA_BENEFICIARIO_BOLSA', 'REGIAO_BENEFICIARIO_BOLSA', 
-        'MODALIDADE_ENSINO_BOLSA', 'NOME_TURNO_CURSO_BOLSA', 
-        'MODALIDADE_CONCORRENCIA', # Mantida na entrada raw
-        'NOME_IES_BOLSA', 'NOME_CURSO_BOLSA'
-    ]
+    colunas_de_entrada = COLUNAS_DE_ENTRADA
     
     # 2. Cria DataFrame e Seleciona Apenas as 10 Features
     try:
@@ -260,13 +661,17 @@ def pre_processar_features(features: Dict[str, Any]) -> pd.DataFrame:
     for col in cols_categoricas_raw:
         # Garante que nulos/tipos estranhos sejam tratados como uma categoria 'NA_DB'
         df[col] = df[col].astype(str).str.upper().replace(['NAN', 'NONE', 'NONETYPE', 'NONE', 'NONETYPE', 'nan'], 'NA_DB').fillna('NA_DB')
+        # Forma normalizada (sem acentos, casefold, espaços colapsados), a mesma das colunas abaixo
+        df[col] = df[col].map(normalizar_nome)
         
-    # 4. Agrupamento Top-N
+    # 4. Agrupamento Top-N (comparando as formas normalizadas)
+    top_ies_normalizado = {normalizar_nome(nome) for nome in top_ies}
+    top_cursos_normalizado = {normalizar_nome(nome) for nome in top_cursos}
     df['NOME_IES_AGRUPADO'] = df['NOME_IES_BOLSA'].apply(
-        lambda x: x if x in TOP_IES else 'OUTRAS_IES'
+        lambda x: x if x in top_ies_normalizado else normalizar_nome('OUTRAS_IES')
     )
     df['NOME_CURSO_AGRUPADO'] = df['NOME_CURSO_BOLSA'].apply(
-        lambda x: x if x in TOP_CURSOS else 'OUTROS_CURSOS'
+        lambda x: x if x in top_cursos_normalizado else normalizar_nome('OUTROS_CURSOS')
     )
     
     # 5. Drop das colunas RAW originais e da coluna MODALIDADE_CONCORRENCIA (CRÍTICO!)
@@ -278,16 +683,7 @@ def pre_processar_features(features: Dict[str, Any]) -> pd.DataFrame:
     )
 
     # 6. Codificação (OHE) - APENAS AS 8 FEATURES USADAS NO TREINAMENTO
-    colunas_para_ohe = [
-        'SEXO_BENEFICIARIO_BOLSA', 
-        'STATUS_DEFICIENCIA_TEXT', 
-        'RACA_BENEFICIARIO_BOLSA', 
-        'REGIAO_BENEFICIARIO_BOLSA', 
-        'MODALIDADE_ENSINO_BOLSA', 
-        'NOME_TURNO_CURSO_BOLSA', 
-        'NOME_IES_AGRUPADO', 
-        'NOME_CURSO_AGRUPADO'               
-    ]
+    colunas_para_ohe = COLUNAS_PARA_OHE
     
     # Aplica a codificação OHE (A IDADE fica de fora do OHE por ser numérica)
     df_encoded = pd.get_dummies(
@@ -301,38 +697,131 @@ def pre_processar_features(features: Dict[str, Any]) -> pd.DataFrame:
     # 7. Alinhamento Crítico de Colunas (reindex para 175 features)
     # Garante que o DataFrame final tenha exatamente 175 colunas na ordem correta, 
     # preenchendo colunas ausentes com 0.
-    df_final = df_encoded.reindex(columns=COLUNAS_ESPERADAS, fill_value=0)
+    # As colunas OHE são procuradas pelo nome normalizado e voltam aos nomes originais.
+    # Se duas colunas têm o mesmo nome normalizado (ex.: 'Educaçao Física' e 'Educação Física'),
+    # só a de `escolher_grafia` recebe o valor, como no IndiceVocabulario.
+    preferidas = frozenset(colunas_preferidas)
+    sem_valor = {
+        coluna
+        for grafias in grafias_repetidas(colunas_esperadas, _normalizar_coluna).values()
+        for coluna in grafias if coluna != escolher_grafia(grafias, preferidas)
+    }
+    colunas_normalizadas = [
+        coluna if coluna in sem_valor else _normalizar_coluna(coluna) for coluna in colunas_esperadas
+    ]
+    df_final = df_encoded.reindex(columns=colunas_normalizadas, fill_value=0)
+    df_final.columns = list(colunas_esperadas)
     
     # Verificação final 
-    if df_final.shape[1] != len(COLUNAS_ESPERADAS):
-        colunas_extras = list(set(df_final.columns) - set(COLUNAS_ESPERADAS))
-        colunas_faltando = list(set(COLUNAS_ESPERADAS) - set(df_final.columns))
+    if df_final.shape[1] != len(colunas_esperadas):
+        colunas_extras = list(set(df_final.columns) - set(colunas_esperadas))
+        colunas_faltando = list(set(colunas_esperadas) - set(df_final.columns))
         raise Exception(
-            f"ERRO CRÍTICO FINAL: Esperado {len(COLUNAS_ESPERADAS)} colunas, encontrado {df_final.shape[1]}. "
+            f"ERRO CRÍTICO FINAL: Esperado {len(colunas_esperadas)} colunas, encontrado {df_final.shape[1]}. "
             f"Colunas Extras: {colunas_extras}. Colunas Faltando: {colunas_faltando}"
         )
 
     # 8. ✅ CORREÇÃO para o UserWarning: Retorna o DataFrame (com feature names)
     return df_final
 
+def codificar_features(features: Union[Dict[str, Any], Sequence[Dict[str, Any]]]) -> np.ndarray:
+    """
+    Codifica um dicionário (ou lista de dicionários) de features na matriz OHE esperada pelo modelo,
+    usando o codificador pré-compilado no carregamento.
+    """
+    return obter_contexto().codificador.codificar(features)
+
+def _rotulo_bolsa(predicao: Any) -> str:
+    """Converte a saída do modelo (1/True = Integral) no texto da classificação."""
+    return "Bolsa Integral" if predicao == 1 else "Bolsa Parcial"
+
+def classificacao_em_cache(dados_candidato: Dict[str, Any]) -> Optional[str]:
+    """Retorna a classificação se o perfil já estiver no cache de predições (sem predizer)."""
+    contexto = _CONTEXTO
+    if contexto is None or not CACHE_PREDICOES.ativo:
+        return None
+    try:
+        chave = contexto.codificador.chave(dados_candidato, contar=False)
+        return CACHE_PREDICOES.obter(contexto.impressao, chave, contar_falha=False)
+    except Exception:
+        return None
+
 def classificar_bolsa(dados_candidato: Dict[str, Any]) -> str:
     """
     Realiza a predição da bolsa (Integral/Parcial) usando o modelo de IA.
     """
     try:
-        modelo = MODELO_DE_IA
+        # Um único contexto durante toda a predição, mesmo se houver troca de modelo no meio
+        contexto = obter_contexto()
+        codificador = contexto.codificador
+
+        # Chave normalizada (após o Top-N): perfis equivalentes reaproveitam a predição
+        with etapa("codificacao"):
+            chave = codificador.chave(dados_candidato)
+        with etapa("cache"):
+            classificacao = CACHE_PREDICOES.obter(contexto.impressao, chave)
+        if classificacao is not None:
+            return classificacao
         
-        # vetor_features agora é um DataFrame com feature names
-        vetor_features = pre_processar_features(dados_candidato)
+        # Matriz (1, 175) gerada pelo codificador compilado (mesmos valores do caminho em pandas)
+        with etapa("codificacao"):
+            vetor_features = codificador.matriz_de_chaves([chave])
         
-        # Realiza a predição. O Scikit-learn aceita o DataFrame diretamente,
-        # resolvendo o UserWarning.
-        predicao = modelo.predict(vetor_features)[0]
+        # Realiza a predição
+        with etapa("predict"):
+            predicao = _prever(contexto, vetor_features)[0]
         
         # Converte a saída
-        return "Bolsa Integral" if predicao == 1 else "Bolsa Parcial"
+        classificacao = _rotulo_bolsa(predicao)
+        CACHE_PREDICOES.armazenar(contexto.impressao, chave, classificacao)
+        return classificacao
         
     except Exception as e:
         print(f"⚠️ Erro crítico na predição da IA. Detalhe: {e}")
         # Retorna o padrão
-        return "Bolsa Parcial"
\ No newline at end of file
+        return "Bolsa Parcial"
+
+def classificar_bolsa_lote(lista_candidatos: Sequence[Dict[str, Any]]) -> List[str]:
+    """
+    Versão vetorizada de `classificar_bolsa`: consulta o cache para cada candidato, codifica
+    as chaves restantes (sem repetição) em uma única matriz e chama o `predict` do modelo uma
+    única vez. Retorna as classificações na ordem de entrada.
+
+    Diferente da versão unitária, erros são propagados (o chamador decide como reportá-los).
+    """
+    if not lista_candidatos:
+        return []
+
+    contexto = obter_contexto()
+    codificador, impressao = contexto.codificador, contexto.impressao
+    with etapa("codificacao"):
+        chaves = [codificador.chave(dados) for dados in lista_candidatos]
+    with etapa("cache"):
+        classificacoes: List[Optional[str]] = [CACHE_PREDICOES.obter(impressao, chave) for chave in chaves]
+
+    # Chaves ainda não classificadas, cada uma uma única vez (na ordem em que aparecem)
+    pendentes = list(dict.fromkeys(
+        chave for chave, classificacao in zip(chaves, classificacoes) if classificacao is None
+    ))
+    if pendentes:
+        with etapa("codificacao"):
+            matriz = codificador.matriz_de_chaves(pendentes)
+        with etapa("predict"):
+            predicoes = _prever(contexto, matriz)
+        novas = {}
+        for chave, predicao in zip(pendentes, predicoes):
+            novas[chave] = _rotulo_bolsa(predicao)
+            CACHE_PREDICOES.armazenar(impressao, chave, novas[chave])
+        classificacoes = [
+            classificacao if classificacao is not None else novas[chave]
+            for chave, classificacao in zip(chaves, classificacoes)
+        ]
+
+    return classificacoes
+
+# Garante que o modelo seja carregado quando o módulo for importado
+try:
+    carregar_recursos_ia() 
+except Exception as e:
+    # A exceção será propagada se o carregamento falhar, mas o código continua para análise
+    print(f"Erro de carregamento inicial: {e}") 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, REAL, Boolean, DateTime
+from sqlalchemy import Column, Integer, Text, ForeignKey, REAL, Boolean, DateTime, Index, MetaData, Table, event, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -8,6 +8,7 @@ class Instituicao(Base):
     __tablename__ = "instituicao"
     ID = Column(Integer, primary_key=True, index=True)
     nome = Column(Text, nullable=False)
+    # A restrição unique já cria o índice usado por get_or_create_instituicao
     sigla = Column(Text, unique=True, nullable=False)
     localizacao_campus= Column(Text)
     modalidade = Column(Text) 
@@ -43,6 +44,13 @@ class Curso(Base):
     instituicao = relationship("Instituicao", back_populates="cursos")
     inscricoes = relationship("Inscricao", back_populates="curso")
 
+    __table_args__ = (
+        # get_curso_by_name compara lower(nome_curso): só um índice sobre a mesma expressão evita o SCAN
+        Index("ix_curso_nome_curso_lower", func.lower(nome_curso)),
+        # get_or_create_curso (nome + instituição) e os cursos de uma instituição
+        Index("ix_curso_instituicao_nome", "ID_instituicao", "nome_curso"),
+    )
+
 class Inscricao(Base):
     __tablename__ = "inscricao"
     ID_inscricao = Column(Integer, primary_key=True, index=True)
@@ -54,27 +62,110 @@ class Inscricao(Base):
     candidato = relationship("Candidato", back_populates="inscricoes")
     curso = relationship("Curso", back_populates="inscricoes")
 
+    __table_args__ = (
+        # Inscrição mais recente do candidato em uma única busca no índice (/resultados/{candidato_id})
+        Index("ix_inscricao_candidato_inscricao", "ID_Candidato", "ID_inscricao"),
+        # delete_curso verifica se há inscrições no curso (EXISTS)
+        Index("ix_inscricao_curso", "ID_curso"),
+    )
 
-class Simulacao(Base):
-    """Tabela para armazenar histórico de simulações realizadas"""
-    __tablename__ = "simulacao"
-    
-    ID = Column(Integer, primary_key=True, index=True)
-    data_simulacao = Column(DateTime, default=datetime.utcnow, nullable=False)
-    
-    # Dados do candidato (10 features)
+
+# Colunas de texto da simulação guardadas como inteiros (ID em simulacao_texto)
+COLUNAS_TEXTO_SIMULACAO = (
+    "sexo",
+    "raca_beneficiario",
+    "regiao_beneficiario",
+    "modalidade_ensino",
+    "nome_turno",
+    "modalidade_concorrencia",
+    "nome_curso",
+    "nome_instituicao",
+    "classificacao",
+)
+
+
+class SimulacaoTexto(Base):
+    """Dicionário dos textos repetidos nas simulações (cursos, instituições, modalidades...)."""
+    __tablename__ = "simulacao_texto"
+
+    ID = Column(Integer, primary_key=True)
+    texto = Column(Text, unique=True, nullable=False)
+
+
+class SimulacaoDados(Base):
+    """
+    Armazenamento do histórico de simulações: os textos repetidos viram IDs de simulacao_texto.
+    Para leitura, use Simulacao (a view `simulacao`, com os textos); para gravação,
+    crud.inserir_simulacoes (que converte os textos com o cache do dicionario_textos).
+    """
+    __tablename__ = "simulacao_dados"
+
+    ID = Column(Integer, primary_key=True)
+    # Indexada: a retenção busca as simulações mais antigas por data
+    data_simulacao = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     idade = Column(Integer, nullable=False)
-    sexo = Column(Text, nullable=False)
-    raca_beneficiario = Column(Text, nullable=False)
     pcd = Column(Boolean, nullable=False)
-    regiao_beneficiario = Column(Text, nullable=False)
-    
-    # Dados do curso
-    modalidade_ensino = Column(Text, nullable=False)
-    nome_turno = Column(Text, nullable=False)
-    modalidade_concorrencia = Column(Text, nullable=False)
-    nome_curso = Column(Text, nullable=False)
-    nome_instituicao = Column(Text, nullable=False)
-    
-    # Resultado da IA
-    classificacao = Column(Text, nullable=False)  # "Bolsa Integral" ou "Bolsa Parcial"
\ No newline at end of file
+
+    sexo_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    raca_beneficiario_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    regiao_beneficiario_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    modalidade_ensino_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    nome_turno_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    modalidade_concorrencia_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    nome_curso_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    nome_instituicao_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+    classificacao_id = Column(Integer, ForeignKey("simulacao_texto.ID"), nullable=False)
+
+
+# Views não são criadas pelo create_all: ficam fora do Base.metadata (ver migracoes.preparar_visao_simulacao)
+VISOES = MetaData()
+
+
+class Simulacao(Base):
+    """
+    Histórico de simulações realizadas, com os textos por extenso.
+    É a view `simulacao` sobre simulacao_dados + simulacao_texto, com as mesmas colunas da
+    antiga tabela: consultas existentes continuam funcionando (INSERT e DELETE na view também,
+    por triggers, mas sem atualizar os agregados; o código da API grava em simulacao_dados).
+    """
+    __table__ = Table(
+        "simulacao",
+        VISOES,
+        Column("ID", Integer, primary_key=True),
+        Column("data_simulacao", DateTime, nullable=False),
+        # Dados do candidato (10 features)
+        Column("idade", Integer, nullable=False),
+        Column("sexo", Text, nullable=False),
+        Column("raca_beneficiario", Text, nullable=False),
+        Column("pcd", Boolean, nullable=False),
+        Column("regiao_beneficiario", Text, nullable=False),
+        # Dados do curso
+        Column("modalidade_ensino", Text, nullable=False),
+        Column("nome_turno", Text, nullable=False),
+        Column("modalidade_concorrencia", Text, nullable=False),
+        Column("nome_curso", Text, nullable=False),
+        Column("nome_instituicao", Text, nullable=False),
+        # Resultado da IA
+        Column("classificacao", Text, nullable=False),  # "Bolsa Integral" ou "Bolsa Parcial"
+    )
+
+
+class SimulacaoAgregado(Base):
+    """
+    Contagens do histórico de simulações por dimensão (dia, curso, instituição, região, raça...)
+    e classificação, mantidas a cada gravação (ver agregados.py). O /estatisticas lê só daqui.
+    """
+    __tablename__ = "simulacao_agregado"
+
+    dimensao = Column(Text, primary_key=True)  # "dia", "curso", "instituicao", "regiao", "raca", ...
+    valor = Column(Text, primary_key=True)  # Ex: "2024-11-03", "Engenharia Civil", "Sul"
+    classificacao = Column(Text, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
+# A cada create_all: migra a antiga tabela simulacao (se houver) e cria a view e os triggers
+@event.listens_for(Base.metadata, "after_create")
+def _criar_visao_simulacao(alvo, conexao, **kwargs):
+    from .migracoes import preparar_visao_simulacao
+    preparar_visao_simulacao(conexao)
+
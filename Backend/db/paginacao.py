@@ -0,0 +1,50 @@
+"""
+Paginação por cursor (keyset) nas listagens.
+
+Com `offset(skip)`, o SQLite percorre e descarta as `skip` primeiras linhas: a página 10.000
+custa 10.000 vezes a primeira. Com o cursor, a consulta começa direto no índice da chave
+primária (`WHERE ID > :after_id ORDER BY ID LIMIT :limit`), e toda página custa o mesmo.
+
+O cursor é opaco para o cliente (base64 do último ID da página, com o nome do recurso);
+vai no cabeçalho X-Proximo-Cursor da resposta e volta no parâmetro `cursor`.
+"""
+import base64
+import binascii
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+CABECALHO_PROXIMO_CURSOR = "X-Proximo-Cursor"
+
+
+def codificar_cursor(recurso: str, ultimo_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{recurso}:{ultimo_id}".encode()).rstrip(b"=").decode("ascii")
+
+
+def decodificar_cursor(recurso: str, cursor: str) -> int:
+    """Retorna o `after_id` do cursor; cursor inválido (ou de outro recurso) vira 400."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefixo, _, ultimo_id = texto.partition(":")
+        if prefixo != recurso:
+            raise ValueError(prefixo)
+        return int(ultimo_id)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+
+def resolver_after_id(recurso: str, cursor: Optional[str], skip: int) -> Optional[int]:
+    if cursor is None:
+        return None
+    if skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use 'cursor' ou 'skip', não os dois.",
+        )
+    return decodificar_cursor(recurso, cursor)
+
+
+def anunciar_proxima_pagina(response: Response, recurso: str, linhas: Sequence[dict], limit: int) -> None:
+    """Página cheia = pode haver mais: o cursor da próxima página vai no cabeçalho."""
+    if linhas and len(linhas) >= limit:
+        response.headers[CABECALHO_PROXIMO_CURSOR] = codificar_cursor(recurso, linhas[-1]["ID"])
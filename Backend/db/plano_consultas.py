@@ -0,0 +1,143 @@
+"""
+Verificação dos planos de consulta (EXPLAIN QUERY PLAN) das buscas frequentes do CRUD.
+
+As próprias funções do crud são chamadas, numa transação desfeita no fim (nada é gravado), e
+cada SELECT que elas emitem passa pelo EXPLAIN QUERY PLAN. Uma etapa "SCAN <tabela>" indica
+leitura da tabela inteira: falta um índice ou a consulta usa uma expressão que o índice não
+cobre (ex: lower(nome_curso) sem o índice sobre lower(nome_curso)).
+
+A verificação em si está em tests/test_plano_consultas.py (banco temporário). A linha de comando
+é só um atalho; sem --banco ela também usa um banco temporário, criado com o esquema atual:
+
+    python -m db.plano_consultas                     # código de saída 1 se alguma busca varrer uma tabela
+    python -m db.plano_consultas --banco copia.db    # migra e confere um arquivo existente
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+
+_EMAIL = "plano.consultas@exemplo.com"
+
+
+def _criar_candidato_existente(db: Session) -> None:
+    # Email já cadastrado: create_candidato para no EXISTS, antes do hash da senha
+    db.add(models.Candidato(nome="Plano de Consultas", email=_EMAIL, senha="-"))
+    db.flush()
+    try:
+        crud.create_candidato(db, schemas.CandidatoCreate(nome="Plano de Consultas", email=_EMAIL, senha="123456"))
+    except Exception as e:
+        # Só o erro de email duplicado é esperado aqui; qualquer outro sobe
+        if "Email já cadastrado" not in str(e):
+            raise
+
+
+# Nome -> chamada que faz a busca
+BUSCAS: Dict[str, Callable[[Session], object]] = {
+    "get_curso_by_name": lambda db: crud.get_curso_by_name(db, "Direito"),
+    "get_curso_by_id": lambda db: crud.get_curso_by_id(db, 1),
+    "get_candidato": lambda db: crud.get_candidato(db, 1),
+    "get_candidato_by_email": lambda db: crud.get_candidato_by_email(db, _EMAIL),
+    "get_or_create_instituicao": lambda db: crud.get_or_create_instituicao(
+        db, schemas.InstituicaoCreate(nome="Instituição do Plano", sigla="PLANO")
+    ),
+    "get_or_create_curso": lambda db: crud.get_or_create_curso(
+        db, schemas.CursoDadosInteresse(nome_curso="Direito"), 1
+    ),
+    "create_candidato (email já cadastrado)": _criar_candidato_existente,
+    "delete_curso (inscrições vinculadas)": lambda db: crud.delete_curso(db, 0),
+    "classificar_bolsa_candidato (features)": lambda db: db.execute(crud._consulta_features_candidato(1)).first(),
+}
+
+
+def _varreduras(plano: List[str]) -> List[str]:
+    return [etapa for etapa in plano if etapa.startswith("SCAN ") and etapa != "SCAN CONSTANT ROW"]
+
+
+def verificar_planos(engine: Engine) -> List[dict]:
+    """
+    Roda cada busca de BUSCAS e devolve, por busca, os SELECTs emitidos com o plano de cada um.
+    `ok` é falso quando algum plano tem uma varredura completa de tabela.
+    """
+    resultados = []
+    with engine.connect() as conexao:
+        comandos: list = []
+
+        def _guardar_select(conn, cursor, sql, parametros, contexto, executemany):
+            if sql.lstrip().upper().startswith("SELECT"):
+                comandos.append((sql, parametros))
+
+        event.listen(conexao, "before_cursor_execute", _guardar_select)
+        transacao = conexao.begin()
+        # Os commits das funções do crud viram savepoints; o rollback final desfaz tudo
+        db = Session(bind=conexao, join_transaction_mode="create_savepoint")
+        try:
+            for nome, busca in BUSCAS.items():
+                comandos.clear()
+                busca(db)
+                consultas = []
+                for sql, parametros in list(comandos):
+                    plano = [linha[3] for linha in conexao.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+                    consultas.append({"sql": " ".join(sql.split()), "plano": plano, "varreduras": _varreduras(plano)})
+                resultados.append({
+                    "busca": nome,
+                    "consultas": consultas,
+                    "ok": all(not consulta["varreduras"] for consulta in consultas),
+                })
+        finally:
+            db.close()
+            transacao.rollback()
+            event.remove(conexao, "before_cursor_execute", _guardar_select)
+    return resultados
+
+
+def preparar_banco(engine: Engine) -> None:
+    """A mesma migração da subida da API: tabelas, view e índices que faltarem."""
+    from .migracoes import criar_indices_ausentes
+    models.Base.metadata.create_all(bind=engine)
+    criar_indices_ausentes(engine)
+
+
+def _relatar(resultados: List[dict]) -> None:
+    for resultado in resultados:
+        if resultado["ok"]:
+            indices = "; ".join(etapa for consulta in resultado["consultas"] for etapa in consulta["plano"])
+            print(f"✅ {resultado['busca']}: {indices}")
+            continue
+        for consulta in resultado["consultas"]:
+            if consulta["varreduras"]:
+                print(f"⚠️ {resultado['busca']}: {', '.join(consulta['varreduras'])}\n    {consulta['sql']}")
+
+
+def _principal() -> None:
+    parser = argparse.ArgumentParser(description="Planos de consulta das buscas frequentes do CRUD.")
+    parser.add_argument(
+        "--banco",
+        help="Arquivo SQLite a conferir (é migrado antes; nada das buscas é gravado). "
+             "Sem ele, usa um banco temporário com o esquema atual.",
+    )
+    args = parser.parse_args()
+
+    from .database import criar_engine
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = args.banco or os.path.join(pasta, "plano_consultas.db")
+        engine = criar_engine(f"sqlite:///{os.path.abspath(caminho)}")
+        try:
+            preparar_banco(engine)
+            resultados = verificar_planos(engine)
+        finally:
+            engine.dispose()
+    _relatar(resultados)
+    if not all(resultado["ok"] for resultado in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    _principal()
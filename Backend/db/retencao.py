@@ -0,0 +1,226 @@
+"""
+Retenção do histórico de simulações.
+
+O histórico de simulações cresce sem limite. Aqui as simulações com mais de RETENCAO_DIAS dias saem
+de simulacao_dados para arquivos mensais compactados (`simulacao-AAAA-MM.ndjson.gz`, uma linha
+JSON por simulação, com o ID original e os textos por extenso, lidos da view simulacao), em lotes pequenos: cada lote é lido pelo índice de
+data_simulacao, acrescentado ao arquivo do mês (fsync) e só então apagado, em uma transação
+curta, com uma pausa entre lotes para as gravações da API passarem.
+
+Os agregados do /estatisticas não são alterados (as contagens continuam incluindo as simulações
+arquivadas), e `agregados.reconstruir_agregados` também lê os arquivos.
+As páginas liberadas no SQLite são reaproveitadas pelas novas simulações: o arquivo do banco
+para de crescer. Para devolver o espaço ao disco, use a opção --vacuum da linha de comando.
+
+Uma falha entre a escrita no arquivo e o commit pode repetir linhas no arquivo (nunca perdê-las);
+quem lê os arquivos deve considerar o ID como chave.
+
+Uso manual:
+    python -m db.retencao aplicar [--dias 180] [--vacuum]
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .config import (
+    RETENCAO_DIAS,
+    RETENCAO_PASTA,
+    RETENCAO_LOTE,
+    RETENCAO_PAUSA_MS,
+    RETENCAO_INTERVALO_MINUTOS,
+)
+
+PASTA_ARQUIVO = RETENCAO_PASTA or os.path.join(os.path.dirname(os.path.abspath(__file__)), "arquivo_simulacoes")
+
+ESTADO_RETENCAO = {
+    "execucoes": 0,
+    "arquivadas": 0,
+    "ultima_execucao": None,
+    "ultimo_resumo": None,
+    "ultimo_erro": None,
+}
+
+
+def _nome_arquivo(mes: str) -> str:
+    return f"simulacao-{mes}.ndjson.gz"
+
+
+def _serializar(linha: dict) -> dict:
+    return {
+        coluna: valor.isoformat() if isinstance(valor, datetime) else valor
+        for coluna, valor in linha.items()
+    }
+
+
+def _arquivar(linhas: List[dict], pasta: str) -> Dict[str, int]:
+    """Acrescenta as linhas aos arquivos dos seus meses. Retorna linhas por mês."""
+    por_mes: Dict[str, List[dict]] = defaultdict(list)
+    for linha in linhas:
+        por_mes[linha["data_simulacao"].strftime("%Y-%m")].append(linha)
+
+    os.makedirs(pasta, exist_ok=True)
+    for mes, itens in por_mes.items():
+        # Cada lote vira um novo membro gzip no fim do arquivo; gzip.open lê todos em sequência
+        with open(os.path.join(pasta, _nome_arquivo(mes)), "ab") as bruto:
+            with gzip.GzipFile(fileobj=bruto, mode="wb") as compactado:
+                compactado.write("".join(
+                    json.dumps(_serializar(item), ensure_ascii=False) + "\n" for item in itens
+                ).encode("utf-8"))
+            bruto.flush()
+            os.fsync(bruto.fileno())
+    return {mes: len(itens) for mes, itens in por_mes.items()}
+
+
+def aplicar_retencao(
+    fabrica_sessao: Callable[[], Session],
+    dias: int = RETENCAO_DIAS,
+    pasta: str = PASTA_ARQUIVO,
+    lote: int = RETENCAO_LOTE,
+    pausa_ms: int = RETENCAO_PAUSA_MS,
+    parar: Optional[threading.Event] = None,
+) -> dict:
+    """Move para os arquivos mensais todas as simulações anteriores a `dias` dias atrás."""
+    if dias <= 0:
+        return {"arquivadas": 0, "lotes": 0, "por_mes": {}, "segundos": 0.0}
+
+    corte = datetime.utcnow() - timedelta(days=dias)
+    simulacao = models.Simulacao
+    colunas = list(simulacao.__table__.columns)
+    consulta = (
+        select(*colunas)
+        .where(simulacao.data_simulacao < corte)
+        .order_by(simulacao.data_simulacao, simulacao.ID)
+        .limit(max(1, lote))
+    )
+
+    inicio = time.perf_counter()
+    arquivadas = lotes = 0
+    por_mes: Dict[str, int] = defaultdict(int)
+    while parar is None or not parar.is_set():
+        with fabrica_sessao() as db:
+            linhas = [dict(linha) for linha in db.execute(consulta).mappings()]
+            db.rollback()  # Encerra a leitura antes da escrita no arquivo
+            if not linhas:
+                break
+            for mes, quantidade in _arquivar(linhas, pasta).items():
+                por_mes[mes] += quantidade
+            dados = models.SimulacaoDados
+            db.execute(delete(dados).where(dados.ID.in_([linha["ID"] for linha in linhas])))
+            db.commit()
+        arquivadas += len(linhas)
+        lotes += 1
+        if len(linhas) < lote:
+            break
+        time.sleep(max(0, pausa_ms) / 1000.0)
+
+    resumo = {
+        "arquivadas": arquivadas,
+        "lotes": lotes,
+        "por_mes": dict(por_mes),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    ESTADO_RETENCAO["execucoes"] += 1
+    ESTADO_RETENCAO["arquivadas"] += arquivadas
+    ESTADO_RETENCAO["ultima_execucao"] = datetime.utcnow().isoformat()
+    ESTADO_RETENCAO["ultimo_resumo"] = resumo
+    return resumo
+
+
+def ler_arquivo(pasta: str = PASTA_ARQUIVO) -> Iterator[dict]:
+    """Simulações arquivadas, mês a mês (data_simulacao volta como datetime)."""
+    if not os.path.isdir(pasta):
+        return
+    for nome in sorted(os.listdir(pasta)):
+        if not (nome.startswith("simulacao-") and nome.endswith(".ndjson.gz")):
+            continue
+        with gzip.open(os.path.join(pasta, nome), "rt", encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                registro = json.loads(linha)
+                registro["data_simulacao"] = datetime.fromisoformat(registro["data_simulacao"])
+                yield registro
+
+
+def estatisticas_retencao() -> dict:
+    return {"dias": RETENCAO_DIAS, "pasta": PASTA_ARQUIVO, **ESTADO_RETENCAO}
+
+
+class RotinaRetencao:
+    """Thread que aplica a retenção a cada RETENCAO_INTERVALO_MINUTOS (só com RETENCAO_DIAS > 0)."""
+
+    def __init__(self, fabrica_sessao: Callable[[], Session], dias: int, intervalo_minutos: int):
+        self.fabrica_sessao = fabrica_sessao
+        self.dias = dias
+        self.intervalo_segundos = max(1, intervalo_minutos) * 60
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self.dias > 0
+
+    def iniciar(self) -> None:
+        if not self.ativo or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="retencao-simulacoes", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _loop(self) -> None:
+        # Primeira execução logo após a inicialização; depois, a cada intervalo
+        while not self._parar.is_set():
+            try:
+                resumo = aplicar_retencao(self.fabrica_sessao, dias=self.dias, parar=self._parar)
+                if resumo["arquivadas"]:
+                    print(f"✅ Retenção: {resumo['arquivadas']} simulações arquivadas em {resumo['segundos']} s.")
+            except Exception as e:
+                ESTADO_RETENCAO["ultimo_erro"] = str(e)
+                print(f"⚠️ Falha na retenção do histórico de simulações. Detalhe: {e}")
+            self._parar.wait(self.intervalo_segundos)
+
+
+def _principal() -> None:
+    parser = argparse.ArgumentParser(description="Retenção do histórico de simulações.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    aplicar = sub.add_parser("aplicar", help="Arquiva as simulações antigas.")
+    aplicar.add_argument("--dias", type=int, default=RETENCAO_DIAS, help="Idade mínima (dias) para arquivar.")
+    aplicar.add_argument("--vacuum", action="store_true", help="Roda VACUUM no fim (devolve o espaço ao disco).")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from .database import engine
+    from .migracoes import criar_indices_ausentes
+    models.Base.metadata.create_all(bind=engine)
+    criar_indices_ausentes(engine)
+    if args.dias <= 0:
+        print("⚠️ Informe --dias (ou PROUNI_RETENCAO_DIAS) maior que zero.")
+        return
+    resumo = aplicar_retencao(SessionLocal, dias=args.dias)
+    print(f"✅ {resumo['arquivadas']} simulações arquivadas em {PASTA_ARQUIVO}: {json.dumps(resumo)}")
+    if args.vacuum:
+        with engine.connect() as conexao:
+            conexao.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print("✅ VACUUM concluído.")
+
+
+ROTINA_RETENCAO = RotinaRetencao(SessionLocal, RETENCAO_DIAS, RETENCAO_INTERVALO_MINUTOS)
+
+
+if __name__ == "__main__":
+    _principal()
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import crud, models, schemas
+from ..config import IMPORTACAO_MAX_ERROS_DETALHADOS, IMPORTACAO_TAMANHO_BLOCO
 from ..database import get_db
+from ..importador_candidatos import ImportadorCandidatos, LinhaMuitoLonga, registros_csv, registros_ndjson
+from ..paginacao import anunciar_proxima_pagina, resolver_after_id
 
 router = APIRouter(tags=["Candidatos e Simulação"])
 DbDependency = Depends(get_db)
@@ -30,13 +37,22 @@ def cadastro_endpoint(candidato: schemas.CandidatoCreate, db: Session = DbDepend
     tags=["Administração e teste"]
 )
 def list_candidatos_endpoint(
+    response: Response,
     db:Session = DbDependency, 
     skip: int = Query(0, ge=0), 
-    limit: int = Query(100, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor do cabeçalho X-Proximo-Cursor da página anterior.")
 ):
-    """Retorna uma lista paginada de todos os candidatos."""
+    """
+    Retorna uma lista paginada de todos os candidatos, em ordem de ID.
+    Para percorrer tudo, use o `cursor` devolvido no cabeçalho X-Proximo-Cursor
+    (custo constante por página); `skip` continua aceito, mas fica mais lento a cada página.
+    """
+    after_id = resolver_after_id("candidatos", cursor, skip)
     # 1. Chama a função do crud.py, passando a sessão 'db' e os parâmetros de paginação
-    return crud.get_candidatos(db, skip=skip, limit=limit)
+    candidatos = crud.get_candidatos(db, skip=skip, limit=limit, after_id=after_id)
+    anunciar_proxima_pagina(response, "candidatos", candidatos, limit)
+    return candidatos
 
 @router.post(
     "/formulario/{candidato_id}",
@@ -115,12 +131,16 @@ def create_curso_individual_endpoint(
     summary="Lista todos os cursos com seus dados completos."
 )
 def list_cursos_endpoint(
+    response: Response,
     db: Session = DbDependency, 
     skip: int = Query(0, ge=0), 
-    limit: int = Query(100, ge=1)
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="Valor do cabeçalho X-Proximo-Cursor da página anterior.")
 ):
-    """Retorna uma lista paginada de todos os cursos."""
-    cursos = crud.get_cursos(db, skip=skip, limit=limit)
+    """Retorna uma lista paginada de todos os cursos (cursor em X-Proximo-Cursor, como em /candidatos/)."""
+    after_id = resolver_after_id("cursos", cursor, skip)
+    cursos = crud.get_cursos(db, skip=skip, limit=limit, after_id=after_id)
+    anunciar_proxima_pagina(response, "cursos", cursos, limit)
     return cursos
 
 @router.get(
@@ -192,7 +212,112 @@ def update_curso_endpoint(
 def create_dados_lote_endpoint(candidatos_lote: schemas.LoteCandidatos, db: Session = DbDependency):
     """Insere múltiplos candidatos, instituições, cursos e inscrições em uma transação atômica."""
     try:
-        crud.create_candidatos_lote(db, candidatos_lote)
-        return {"message": "Dados em lote inseridos com sucesso."}
+        resultado = crud.create_candidatos_lote(db, candidatos_lote)
+        return {"message": "Dados em lote inseridos com sucesso.", "resumo": resultado["resumo"]}
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+def _gravar_bloco(db: Session, importador: ImportadorCandidatos, bloco: List[schemas.CandidatoCompleto],
+                  hashes: Optional[list] = None) -> None:
+    """Insere e confirma um bloco. Em erro, desfaz só este bloco (os anteriores já foram confirmados)."""
+    try:
+        importador.inserir_bloco(bloco, hashes)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+@router.post(
+    "/dados/lote/stream",
+    status_code=status.HTTP_201_CREATED,
+    summary="Importa candidatos em streaming (NDJSON ou CSV)",
+    tags=["Administração e teste"]
+)
+async def create_dados_lote_stream_endpoint(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Padrão: deduzido do Content-Type."),
+    db: Session = DbDependency,
+):
+    """
+    Lê o corpo da requisição aos poucos (um candidato por linha em NDJSON, ou CSV com cabeçalho
+    usando 'instituicao.sigla', 'curso.nome_curso' etc.), valida cada linha e grava em blocos de
+    IMPORTACAO_TAMANHO_BLOCO, com um commit por bloco. Os hashes de senha de um bloco são
+    gerados no pool de processos enquanto o bloco anterior é gravado. A memória fica limitada
+    a dois blocos, independente do tamanho do arquivo.
+
+    Linhas inválidas são puladas e contadas (as primeiras vêm detalhadas com o número da linha).
+    Uma linha acima de IMPORTACAO_MAX_BYTES_LINHA interrompe a importação com 413 (os blocos
+    anteriores continuam gravados).
+    Se um bloco falhar no banco, os blocos anteriores continuam gravados e a resposta (500)
+    informa até onde a importação chegou.
+    """
+    if formato is None:
+        formato = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    leitor = registros_csv if formato == "csv" else registros_ndjson
+
+    inicio = time.perf_counter()
+    # O importador carrega todas as instituições e cursos: fora do event loop
+    importador = await run_in_threadpool(ImportadorCandidatos, db)
+    bloco: List[schemas.CandidatoCompleto] = []
+    pendente = None  # (bloco, hashes) aguardando gravação
+    erros: List[dict] = []
+    linhas_lidas = com_erro = 0
+
+    def resumo() -> dict:
+        segundos = time.perf_counter() - inicio
+        return {
+            "formato": formato,
+            "linhas_lidas": linhas_lidas,
+            "importadas": importador.linhas,
+            "com_erro": com_erro,
+            "erros": erros,
+            "blocos": importador.blocos,
+            "instituicoes_criadas": importador.instituicoes_criadas,
+            "cursos_criados": importador.cursos_criados,
+            "segundos": round(segundos, 3),
+            "linhas_por_s": round(importador.linhas / segundos, 1) if segundos > 0 else 0.0,
+        }
+
+    try:
+        async for numero, registro in leitor(request.stream()):
+            linhas_lidas += 1
+            try:
+                if isinstance(registro, Exception):
+                    raise registro
+                bloco.append(schemas.CandidatoCompleto.model_validate(registro))
+            except (ValidationError, ValueError) as e:
+                com_erro += 1
+                if len(erros) < IMPORTACAO_MAX_ERROS_DETALHADOS:
+                    detalhe = "; ".join(
+                        f"{'.'.join(map(str, erro['loc']))}: {erro['msg']}" for erro in e.errors()
+                    ) if isinstance(e, ValidationError) else str(e)
+                    erros.append({"linha": numero, "erro": detalhe})
+                continue
+
+            if len(bloco) >= IMPORTACAO_TAMANHO_BLOCO:
+                hashes = importador.preparar_hashes(bloco)
+                if pendente:
+                    await run_in_threadpool(_gravar_bloco, db, importador, *pendente)
+                pendente, bloco = (bloco, hashes), []
+
+        if pendente:
+            await run_in_threadpool(_gravar_bloco, db, importador, *pendente)
+        await run_in_threadpool(_gravar_bloco, db, importador, bloco)
+    except LinhaMuitoLonga as e:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"message": str(e), "resumo": resumo()},
+        )
+    except UnicodeDecodeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"message": f"Corpo não está em UTF-8: {e}", "resumo": resumo()},
+        )
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"message": f"Importação interrompida: {e}", "resumo": resumo()},
+        )
+
+    return {"message": "Importação em streaming concluída.", "resumo": resumo()}
@@ -0,0 +1,26 @@
+"""
+Router de estatísticas do histórico de simulações (dados do dashboard).
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..agregados import obter_estatisticas
+from ..database import get_db
+
+router = APIRouter(tags=["Estatísticas"])
+
+
+@router.get(
+    "/estatisticas",
+    summary="Estatísticas agregadas das simulações realizadas"
+)
+def obter_estatisticas_endpoint(
+    top: int = Query(10, ge=1, le=100, description="Quantidade de cursos e instituições no ranking"),
+    dias: int = Query(30, ge=1, le=366, description="Dias da série diária (até hoje, UTC)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Total de simulações e contagens por classificação, dia, curso, instituição, região, raça e
+    modalidade de ensino. Lê apenas a tabela de agregados (não percorre o histórico).
+    """
+    return obter_estatisticas(db, top=top, dias=dias)
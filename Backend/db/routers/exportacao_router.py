@@ -0,0 +1,45 @@
+"""
+Router de exportação do histórico de simulações (CSV ou Parquet, em streaming).
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from ..database import SessionLocal
+from ..exportacao import ExportacaoInvalida, exportar
+
+router = APIRouter(tags=["Administração e teste"])
+
+TIPOS_CONTEUDO = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+@router.get(
+    "/exportacao/simulacoes",
+    summary="Exporta o histórico de simulações em CSV ou Parquet"
+)
+def exportar_simulacoes_endpoint(
+    formato: str = Query("csv", pattern="^(csv|parquet)$"),
+    inicio: Optional[datetime] = Query(None, description="Data inicial (inclusiva), ex: 2024-01-01"),
+    fim: Optional[datetime] = Query(None, description="Data final (exclusiva)"),
+    colunas: Optional[str] = Query(None, description="Colunas separadas por vírgula (padrão: todas)"),
+):
+    """
+    Envia o histórico em pedaços, lendo a tabela em janelas pela chave primária: a memória do
+    servidor não depende do tamanho do histórico e as simulações continuam sendo gravadas
+    durante a exportação. Parquet requer o pacote 'pyarrow' no servidor.
+    """
+    lista_colunas = [coluna.strip() for coluna in colunas.split(",") if coluna.strip()] if colunas else None
+    try:
+        # Cada janela abre e fecha a sua própria sessão (nada fica preso à requisição)
+        pedacos = exportar(SessionLocal, formato, lista_colunas, inicio, fim)
+    except ExportacaoInvalida as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    nome = f"simulacoes-{datetime.utcnow():%Y%m%d-%H%M%S}.{formato}"
+    return StreamingResponse(
+        pedacos,
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'},
+    )
@@ -0,0 +1,30 @@
+"""
+Router de métricas internas do serviço (cache, inferência, etc.)
+"""
+from fastapi import APIRouter
+from .. import ml_model
+from ..agendador_inferencia import AGENDADOR
+from ..auth.executor_bcrypt import EXECUTOR_BCRYPT
+from ..gravador_simulacoes import GRAVADOR
+from ..dicionario_textos import DICIONARIO_TEXTOS
+from ..retencao import estatisticas_retencao
+
+router = APIRouter(tags=["Administração e teste"])
+
+
+@router.get(
+    "/metricas",
+    summary="Métricas internas do serviço de simulação"
+)
+def obter_metricas():
+    """Retorna os contadores do cache de predições, do agendador de micro-lotes, dos vocabulários, do executor de bcrypt do /login, da gravação e da retenção do histórico e o backend de inferência."""
+    return {
+        "cache_predicoes": ml_model.CACHE_PREDICOES.estatisticas(),
+        "inferencia": ml_model.estatisticas_inferencia(),
+        "vocabulario": ml_model.estatisticas_vocabulario(),
+        "agendador_inferencia": AGENDADOR.estatisticas(),
+        "bcrypt_login": EXECUTOR_BCRYPT.estatisticas(),
+        "gravacao_simulacoes": GRAVADOR.estatisticas(),
+        "retencao_simulacoes": estatisticas_retencao(),
+        "dicionario_textos_simulacao": DICIONARIO_TEXTOS.estatisticas(),
+    }
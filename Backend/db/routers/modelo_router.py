@@ -0,0 +1,58 @@
+"""
+Router de administração do modelo de IA (versão em uso e recarga sem reiniciar a API).
+"""
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel
+
+from .. import ml_model
+from ..auth.auth import AdminDependency
+from ..vigia_modelo import disparar_recarga
+
+router = APIRouter(prefix="/admin/modelo", tags=["Administração e teste"])
+
+
+class RecargaModeloRequest(BaseModel):
+    # Nome de um bundle na pasta do modelo (vazio = origem padrão)
+    bundle: Optional[str] = None
+
+    class Config:
+        json_schema_extra = {"example": {"bundle": "modelo.bundle"}}
+
+
+def _resolver_bundle(nome: Optional[str]) -> Optional[str]:
+    """Aceita apenas arquivos dentro da pasta do modelo (sem caminhos relativos ou absolutos)."""
+    if not nome:
+        return None
+    pasta = os.path.dirname(os.path.abspath(ml_model.MODELO_BUNDLE_PATH))
+    caminho = os.path.abspath(os.path.join(pasta, nome))
+    if os.path.dirname(caminho) != pasta:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O bundle deve estar na pasta do modelo.")
+    if not os.path.isfile(caminho):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Bundle '{nome}' não encontrado.")
+    return caminho
+
+
+@router.get("", summary="Versão do modelo em uso e situação da última recarga")
+def obter_modelo():
+    return ml_model.descrever_modelo()
+
+
+@router.post(
+    "/recarregar",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Recarrega o modelo em segundo plano (troca atômica, sem reiniciar a API)",
+    dependencies=[AdminDependency],
+)
+def recarregar_modelo(pedido: Optional[RecargaModeloRequest] = None):
+    """
+    Carrega e valida o novo modelo em segundo plano; as requisições continuam usando o modelo atual
+    até a troca. Acompanhe o resultado em GET /admin/modelo.
+    Exige 'Authorization: Bearer <PROUNI_ADMIN_TOKEN>'.
+    """
+    caminho = _resolver_bundle(pedido.bundle if pedido else None)
+    if not disparar_recarga(caminho):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Já existe uma recarga em andamento.")
+    return {"mensagem": "Recarga iniciada.", "modelo_atual": ml_model.descrever_modelo()["versao"]}
@@ -2,13 +2,18 @@
 Router para simulação direta (sem cadastro prévio)
 Baseado no notebook ProUni - análise direta com 10 features
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import BaseModel, Field
-from typing import Literal
+from fastapi import APIRouter, HTTPException, status, Depends, Body
+from pydantic import BaseModel, Field, SkipValidation, ValidationError
+from typing import Literal, List, Optional, Any, Union
 from sqlalchemy.orm import Session
-from ..ml_model import classificar_bolsa
+from starlette.concurrency import run_in_threadpool
+from ..ml_model import classificar_bolsa_lote
+from ..agendador_inferencia import classificar_bolsa_async
+from ..config import GRAVACAO_ASSINCRONA
+from ..gravador_simulacoes import GRAVADOR
 from ..database import get_db
-from .. import models
+from ..cronometro import etapa, marcar_entrada
+from .. import crud
 
 router = APIRouter(tags=["Simulação Direta"])
 
@@ -75,6 +80,88 @@ class SimulacaoDiretaResponse(BaseModel):
     dados_entrada: dict = Field(..., description="Dados enviados para confirmação")
 
 
+class ErroValidacaoItem(BaseModel):
+    """Um erro de validação de um item do lote (mesmo formato dos erros 422 do FastAPI)"""
+    type: str = Field(..., description="Tipo do erro (ex: missing, greater_than_equal)")
+    loc: List[Union[int, str]] = Field(..., description="Campo com erro, dentro do item")
+    msg: str = Field(..., description="Descrição do erro")
+    input: Optional[Any] = Field(None, description="Valor recebido")
+
+
+class SimulacaoLoteItem(BaseModel):
+    """Resultado de um item da simulação em lote (na mesma posição da entrada)"""
+    indice: int = Field(..., description="Posição do item na lista enviada")
+    classificacao: Optional[str] = Field(None, description="Classificação da bolsa, se o item foi processado")
+    mensagem: Optional[str] = Field(None, description="Mensagem explicativa do resultado")
+    erro: Optional[List[ErroValidacaoItem]] = Field(None, description="Erros de validação do item, se houver")
+
+
+class SimulacaoLoteResponse(BaseModel):
+    """Modelo para resposta da simulação em lote"""
+    total: int = Field(..., description="Quantidade de itens recebidos")
+    processados: int = Field(..., description="Quantidade de itens classificados e salvos")
+    com_erro: int = Field(..., description="Quantidade de itens rejeitados na validação")
+    resultados: List[SimulacaoLoteItem]
+
+
+# Limite de itens por requisição em /simular-direto/lote
+LIMITE_ITENS_LOTE = 10000
+
+
+def _montar_features(dados: SimulacaoDiretaRequest) -> dict:
+    """Converte o modelo Pydantic no dicionário de 10 features esperado pela IA."""
+    return {
+        "IDADE": dados.idade,
+        "SEXO_BENEFICIARIO_BOLSA": dados.sexo.upper()[0],  # M ou F
+        "STATUS_DEFICIENCIA_TEXT": "Sim" if dados.pcd else "Não",
+        "RACA_BENEFICIARIO_BOLSA": dados.raca_beneficiario,
+        "REGIAO_BENEFICIARIO_BOLSA": dados.regiao_beneficiario,
+        "MODALIDADE_ENSINO_BOLSA": dados.modalidade_ensino,
+        "NOME_TURNO_CURSO_BOLSA": dados.nome_turno,
+        "MODALIDADE_CONCORRENCIA": dados.modalidade_concorrencia,
+        "NOME_IES_BOLSA": dados.nome_instituicao.upper(),
+        "NOME_CURSO_BOLSA": dados.nome_curso,
+    }
+
+
+def _montar_registro(dados: SimulacaoDiretaRequest, classificacao: str) -> dict:
+    """Campos da linha de histórico (tabela simulacao) para uma simulação."""
+    return {
+        "idade": dados.idade,
+        "sexo": dados.sexo,
+        "raca_beneficiario": dados.raca_beneficiario,
+        "pcd": dados.pcd,
+        "regiao_beneficiario": dados.regiao_beneficiario,
+        "modalidade_ensino": dados.modalidade_ensino,
+        "nome_turno": dados.nome_turno,
+        "modalidade_concorrencia": dados.modalidade_concorrencia,
+        "nome_curso": dados.nome_curso,
+        "nome_instituicao": dados.nome_instituicao,
+        "classificacao": classificacao,
+    }
+
+
+def _salvar_simulacao(db: Session, registro: dict) -> None:
+    """Grava uma simulação no histórico e nos agregados (chamado no threadpool)."""
+    with etapa("banco_insert"):
+        crud.inserir_simulacoes(db, [registro])
+    with etapa("banco_commit"):
+        db.commit()
+
+
+def _montar_mensagem(dados: SimulacaoDiretaRequest, classificacao: str) -> str:
+    """Mensagem explicativa exibida junto com a classificação."""
+    if classificacao == "Bolsa Integral":
+        return (
+            f"Parabéns! Com base no seu perfil, você tem grandes chances de conseguir uma "
+            f"Bolsa Integral (100%) no curso de {dados.nome_curso} na {dados.nome_instituicao}."
+        )
+    return (
+        f"Com base no seu perfil, você tem chances de conseguir uma Bolsa Parcial (50%) "
+        f"no curso de {dados.nome_curso} na {dados.nome_instituicao}."
+    )
+
+
 @router.post(
     "/simular-direto",
     response_model=SimulacaoDiretaResponse,
@@ -82,7 +169,7 @@ class SimulacaoDiretaResponse(BaseModel):
     summary="Simulação direta ProUni (sem cadastro)",
     description="Recebe os 10 dados essenciais e retorna a classificação de bolsa via modelo de IA"
 )
-def simular_bolsa_direta(dados: SimulacaoDiretaRequest, db: Session = Depends(get_db)):
+async def simular_bolsa_direta(dados: SimulacaoDiretaRequest, db: Session = Depends(get_db)):
     """
     Endpoint para simulação direta sem necessidade de cadastro.
     
@@ -92,59 +179,30 @@ def simular_bolsa_direta(dados: SimulacaoDiretaRequest, db: Session = Depends(ge
     - Confirmação dos dados enviados
     
     **IMPORTANTE: Salva a simulação no banco de dados real (database_verdadeiro.db)**
+    
+    A predição passa pelo agendador de micro-lotes (quando ativo) e o acesso ao banco
+    roda no threadpool, para não bloquear o event loop. Com a gravação assíncrona ativa
+    (PROUNI_GRAVACAO_ASSINCRONA=1), a linha do histórico vai para o gravador em segundo plano
+    e a resposta não espera o banco.
     """
+    # Tempo até aqui: leitura do corpo, validação Pydantic e dependências
+    marcar_entrada()
     try:
         # Converte o modelo Pydantic para dicionário
-        dados_dict = {
-            "IDADE": dados.idade,
-            "SEXO_BENEFICIARIO_BOLSA": dados.sexo.upper()[0],  # M ou F
-            "STATUS_DEFICIENCIA_TEXT": "Sim" if dados.pcd else "Não",
-            "RACA_BENEFICIARIO_BOLSA": dados.raca_beneficiario,
-            "REGIAO_BENEFICIARIO_BOLSA": dados.regiao_beneficiario,
-            "MODALIDADE_ENSINO_BOLSA": dados.modalidade_ensino,
-            "NOME_TURNO_CURSO_BOLSA": dados.nome_turno,
-            "MODALIDADE_CONCORRENCIA": dados.modalidade_concorrencia,
-            "NOME_IES_BOLSA": dados.nome_instituicao.upper(),
-            "NOME_CURSO_BOLSA": dados.nome_curso,
-        }
+        dados_dict = _montar_features(dados)
         
         # Chama o modelo de IA
-        classificacao = classificar_bolsa(dados_dict)
-        
-        # Salva a simulação no banco de dados
-        nova_simulacao = models.Simulacao(
-            idade=dados.idade,
-            sexo=dados.sexo,
-            raca_beneficiario=dados.raca_beneficiario,
-            pcd=dados.pcd,
-            regiao_beneficiario=dados.regiao_beneficiario,
-            modalidade_ensino=dados.modalidade_ensino,
-            nome_turno=dados.nome_turno,
-            modalidade_concorrencia=dados.modalidade_concorrencia,
-            nome_curso=dados.nome_curso,
-            nome_instituicao=dados.nome_instituicao,
-            classificacao=classificacao
-        )
-        
-        db.add(nova_simulacao)
-        db.commit()
-        db.refresh(nova_simulacao)
+        with etapa("inferencia"):
+            classificacao = await classificar_bolsa_async(dados_dict)
         
-        # Monta a mensagem
-        if classificacao == "Bolsa Integral":
-            mensagem = (
-                f"Parabéns! Com base no seu perfil, você tem grandes chances de conseguir uma "
-                f"Bolsa Integral (100%) no curso de {dados.nome_curso} na {dados.nome_instituicao}."
-            )
-        else:
-            mensagem = (
-                f"Com base no seu perfil, você tem chances de conseguir uma Bolsa Parcial (50%) "
-                f"no curso de {dados.nome_curso} na {dados.nome_instituicao}."
-            )
+        # Salva a simulação no banco de dados (ou entrega ao gravador em segundo plano)
+        registro = _montar_registro(dados, classificacao)
+        if not (GRAVACAO_ASSINCRONA and GRAVADOR.enviar(registro)):
+            await run_in_threadpool(_salvar_simulacao, db, registro)
         
         return SimulacaoDiretaResponse(
             classificacao=classificacao,
-            mensagem=mensagem,
+            mensagem=_montar_mensagem(dados, classificacao),
             dados_entrada=dados.dict()
         )
         
@@ -154,3 +212,81 @@ def simular_bolsa_direta(dados: SimulacaoDiretaRequest, db: Session = Depends(ge
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao processar simulação: {str(e)}"
         )
+
+
+@router.post(
+    "/simular-direto/lote",
+    response_model=SimulacaoLoteResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Simulação direta ProUni em lote (sem cadastro)",
+    description=(
+        "Recebe uma lista de simulações (mesmo formato de /simular-direto), classifica todas com "
+        "uma única chamada ao modelo e salva o histórico com um único INSERT em lote"
+    )
+)
+def simular_bolsa_direta_lote(
+    # SkipValidation: o esquema de SimulacaoDiretaRequest aparece no OpenAPI, mas a validação
+    # é feita item a item abaixo, para que um item inválido não rejeite o lote inteiro (422)
+    itens: List[SkipValidation[SimulacaoDiretaRequest]] = Body(
+        ..., description=f"Lista de simulações (máximo de {LIMITE_ITENS_LOTE} itens)"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint para simulação em lote (ex: turmas enviadas por escolas parceiras).
+    
+    Cada item é validado individualmente: itens inválidos são reportados no campo `erro`
+    da sua posição e não impedem o processamento dos demais.
+    Os resultados voltam na mesma ordem da entrada.
+    """
+    if len(itens) > LIMITE_ITENS_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O lote excede o limite de {LIMITE_ITENS_LOTE} itens por requisição."
+        )
+
+    marcar_entrada()
+    resultados: List[SimulacaoLoteItem] = []
+    validos: List[tuple] = []
+
+    # 1. Validação item a item (um item ruim não derruba o lote)
+    with etapa("validacao"):
+        for indice, item in enumerate(itens):
+            try:
+                validos.append((indice, SimulacaoDiretaRequest.model_validate(item)))
+                resultados.append(SimulacaoLoteItem(indice=indice))
+            except ValidationError as e:
+                resultados.append(SimulacaoLoteItem(
+                    indice=indice,
+                    erro=e.errors(include_url=False, include_context=False)
+                ))
+
+    try:
+        # 2. Uma única matriz e uma única chamada ao modelo
+        with etapa("inferencia"):
+            classificacoes = classificar_bolsa_lote([_montar_features(dados) for _, dados in validos])
+
+        # 3. Um único INSERT em lote para o histórico
+        with etapa("banco"):
+            crud.registrar_simulacoes_lote(db, [
+                _montar_registro(dados, classificacao)
+                for (_, dados), classificacao in zip(validos, classificacoes)
+            ])
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar simulação em lote: {str(e)}"
+        )
+
+    for (indice, dados), classificacao in zip(validos, classificacoes):
+        resultados[indice].classificacao = classificacao
+        resultados[indice].mensagem = _montar_mensagem(dados, classificacao)
+
+    return SimulacaoLoteResponse(
+        total=len(itens),
+        processados=len(validos),
+        com_erro=len(itens) - len(validos),
+        resultados=resultados
+    )
@@ -39,13 +39,14 @@ class CursoResponse(BaseModel):
     nome_curso:str
     grau:Optional[str] = None
     turno: Optional[str] = None
-    peso_ct: float
-    peso_ch: float
-    peso_lc: float
-    peso_mt: float
-    peso_redacao: float
-    nota_maxima: float
-    nota_minima:float
+    # Ainda não existem na tabela curso: opcionais para a resposta validar
+    peso_ct: Optional[float] = None
+    peso_ch: Optional[float] = None
+    peso_lc: Optional[float] = None
+    peso_mt: Optional[float] = None
+    peso_redacao: Optional[float] = None
+    nota_maxima: Optional[float] = None
+    nota_minima: Optional[float] = None
 
     class Config:
         from_attributes = True
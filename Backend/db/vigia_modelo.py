@@ -0,0 +1,84 @@
+"""
+Recarga do modelo sem reiniciar a API.
+
+`disparar_recarga` roda `ml_model.recarregar_modelo` em uma thread em segundo plano
+(uma recarga por vez); `VigiaModelo` verifica periodicamente a data de modificação do
+bundle e dispara a recarga quando ele muda.
+"""
+import os
+import threading
+from typing import Optional
+
+from . import ml_model
+from .config import MODELO_VIGIAR_SEGUNDOS
+
+_LOCK_DISPARO = threading.Lock()
+_THREAD_RECARGA: Optional[threading.Thread] = None
+
+
+def _recarregar(caminho_bundle: Optional[str]) -> None:
+    try:
+        ml_model.recarregar_modelo(caminho_bundle)
+    except Exception as e:
+        print(f"⚠️ Falha ao recarregar o modelo; a versão atual continua ativa. Detalhe: {e}")
+
+
+def disparar_recarga(caminho_bundle: Optional[str] = None) -> bool:
+    """Inicia a recarga em segundo plano. Retorna False se já houver uma recarga em andamento."""
+    global _THREAD_RECARGA
+
+    with _LOCK_DISPARO:
+        if _THREAD_RECARGA is not None and _THREAD_RECARGA.is_alive():
+            return False
+        _THREAD_RECARGA = threading.Thread(
+            target=_recarregar, args=(caminho_bundle,), name="recarga-modelo", daemon=True
+        )
+        _THREAD_RECARGA.start()
+        return True
+
+
+def _assinatura() -> tuple:
+    try:
+        estado = os.stat(ml_model.MODELO_BUNDLE_PATH)
+        return (estado.st_mtime_ns, estado.st_size)
+    except OSError:
+        return (None, None)
+
+
+class VigiaModelo:
+    """Thread que recarrega o modelo quando o bundle em disco muda."""
+
+    def __init__(self, intervalo_segundos: int):
+        self.intervalo_segundos = intervalo_segundos
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self.intervalo_segundos > 0
+
+    def iniciar(self) -> None:
+        if not self.ativo or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="vigia-modelo", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        ultima = _assinatura()
+        while not self._parar.wait(self.intervalo_segundos):
+            atual = _assinatura()
+            # O bundle é trocado com os.replace; um arquivo ausente não dispara recarga
+            if atual != ultima and atual[0] is not None:
+                print("🔄 Alteração detectada nos artefatos do modelo; recarregando...")
+                disparar_recarga()
+                ultima = atual
+
+
+VIGIA_MODELO = VigiaModelo(MODELO_VIGIAR_SEGUNDOS)
@@ -0,0 +1,111 @@
+"""
+Índice normalizado dos vocabulários usados no One-Hot (IES, cursos e demais categorias).
+
+Os nomes chegam em grafias diferentes: o router põe o nome da IES em maiúsculas, o caminho em
+pandas põe todas as categorias em maiúsculas e as colunas do modelo guardam os cursos com
+iniciais maiúsculas ("Análise E Desenvolvimento De Sistemas"). Comparando o texto cru, quase
+todo curso caía em OUTROS_CURSOS. Aqui tudo é comparado pela forma normalizada (sem acentos,
+casefold e espaços colapsados), com um dicionário que leva direto ao índice da coluna OHE.
+"""
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional
+
+
+@lru_cache(maxsize=16384)
+def normalizar_nome(valor: Any) -> str:
+    """'  Análise  e Desenvolvimento ' -> 'analise e desenvolvimento'.
+
+    Os mesmos nomes se repetem a cada requisição; o cache evita refazer a decomposição Unicode.
+    """
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return ' '.join(texto.casefold().split())
+
+
+def _acentos(nome: str) -> int:
+    return sum(1 for caractere in unicodedata.normalize('NFD', nome) if unicodedata.combining(caractere))
+
+
+def escolher_grafia(grafias: Iterable[str], preferidas: Collection[str] = ()) -> str:
+    """
+    Entre grafias com o mesmo nome normalizado (ex.: 'Educaçao Física' e 'Educação Física'),
+    a que recebe o valor: a registrada como preferida no bundle (a mais frequente no treino);
+    sem registro, a com mais acentos (a grafia completa, não a que perdeu um acento) e,
+    no empate, a primeira em ordem alfabética.
+    """
+    return min(grafias, key=lambda grafia: (grafia not in preferidas, -_acentos(grafia), grafia))
+
+
+def grafias_repetidas(nomes: Iterable[str], normalizar: Callable[[str], str] = normalizar_nome) -> Dict[str, List[str]]:
+    """Nome normalizado -> grafias, só para os nomes que aparecem em mais de uma grafia."""
+    grupos: Dict[str, List[str]] = defaultdict(list)
+    for nome in nomes:
+        grupos[normalizar(nome)].append(nome)
+    return {chave: grafias for chave, grafias in grupos.items() if len(grafias) > 1}
+
+
+class IndiceVocabulario:
+    """
+    Nome normalizado -> índice da coluna OHE (-1 quando o valor não tem coluna).
+    Valores fora do vocabulário vão para `indice_fallback` (a coluna OUTRAS_IES/OUTROS_CURSOS
+    no agrupamento Top-N; -1 nas demais categorias).
+
+    Os contadores são incrementados sem lock: com threads concorrentes, alguma contagem pode
+    se perder, o que é aceitável para uma taxa de acerto.
+    """
+
+    def __init__(self, nome: str, mapa: Dict[str, int], indice_fallback: int = -1):
+        self.nome = nome
+        self.mapa = mapa
+        self.indice_fallback = indice_fallback
+        self.consultas = 0
+        self.falhas = 0
+
+    @classmethod
+    def de_colunas(cls, nome: str, colunas: Dict[str, int], vocabulario: Optional[Iterable[str]] = None,
+                   fallback: Optional[str] = None, preferidas: Collection[str] = ()) -> "IndiceVocabulario":
+        """
+        Monta o índice a partir das colunas OHE da feature (sufixo -> índice da coluna).
+        Com `vocabulario` (Top-N), só os nomes do vocabulário são aceitos e os demais vão para `fallback`.
+        Sufixos com o mesmo nome normalizado ficam com a coluna de `escolher_grafia` (`preferidas`
+        são os sufixos registrados no bundle); a colisão é avisada ao gerar ou verificar o bundle.
+        """
+        grafias: Dict[str, List[str]] = defaultdict(list)
+        for sufixo in colunas:
+            grafias[normalizar_nome(sufixo)].append(sufixo)
+        colunas_normalizadas = {
+            chave: colunas[escolher_grafia(sufixos, preferidas)] for chave, sufixos in grafias.items()
+        }
+
+        if vocabulario is None:
+            return cls(nome, colunas_normalizadas)
+        mapa = {}
+        for valor in vocabulario:
+            chave = normalizar_nome(valor)
+            mapa[chave] = colunas_normalizadas.get(chave, -1)
+        indice_fallback = colunas_normalizadas.get(normalizar_nome(fallback), -1) if fallback else -1
+        return cls(nome, mapa, indice_fallback)
+
+    def indice(self, valor_normalizado: str, contar: bool = True) -> int:
+        indice = self.mapa.get(valor_normalizado)
+        if contar:
+            self.consultas += 1
+            if indice is None:
+                self.falhas += 1
+        return self.indice_fallback if indice is None else indice
+
+    def zerar(self) -> None:
+        self.consultas = 0
+        self.falhas = 0
+
+    def estatisticas(self) -> dict:
+        consultas, falhas = self.consultas, self.falhas
+        return {
+            "tamanho": len(self.mapa),
+            "consultas": consultas,
+            "encontrados": consultas - falhas,
+            "nao_encontrados": falhas,
+            "taxa_acerto": round((consultas - falhas) / consultas, 4) if consultas else 0.0,
+        }
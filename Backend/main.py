@@ -1,15 +1,53 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware 
 
 from db import models
-from db.database import engine
+from db.database import engine, relatar_pragmas
+from db.migracoes import criar_indices_ausentes
+from db.agregados import preencher_se_vazio
 from db.auth.router import router as auth_router 
+from db.auth.pass_utils import encerrar_pool_hash
+from db.auth.executor_bcrypt import EXECUTOR_BCRYPT
 from db.routers.candidato_router import router as candidato_router
 from db.routers.simulacao_direta_router import router as simulacao_direta_router
+from db.routers.metricas_router import router as metricas_router
+from db.routers.modelo_router import router as modelo_router
+from db.routers.estatisticas_router import router as estatisticas_router
+from db.routers.exportacao_router import router as exportacao_router
+from db.agendador_inferencia import AGENDADOR
+from db.gravador_simulacoes import GRAVADOR
+from db.retencao import ROTINA_RETENCAO
+from db.vigia_modelo import VIGIA_MODELO
+from db.cronometro import MiddlewareServerTiming
+from db.config import SERVER_TIMING_ATIVO, GRAVACAO_ASSINCRONA
+from db.paginacao import CABECALHO_PROXIMO_CURSOR
 
 models.Base.metadata.create_all(bind=engine)
+# Índices novos em bancos criados antes deles
+criar_indices_ausentes(engine)
+relatar_pragmas(engine)
+# Agregados do /estatisticas em bancos com histórico anterior a eles
+preencher_se_vazio(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    VIGIA_MODELO.iniciar()
+    if GRAVACAO_ASSINCRONA:
+        GRAVADOR.iniciar()
+    ROTINA_RETENCAO.iniciar()
+    yield
+    VIGIA_MODELO.parar()
+    ROTINA_RETENCAO.parar()
+    # Encerramento: processa o que ainda estiver na fila de inferência
+    AGENDADOR.parar()
+    # ...e grava o histórico de simulações que ainda estiver em memória
+    GRAVADOR.parar()
+    encerrar_pool_hash()
+    EXECUTOR_BCRYPT.encerrar()
 
-app = FastAPI(title="Simulador SISU API - Refatorado")
+app = FastAPI(title="Simulador SISU API - Refatorado", lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -23,11 +61,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"], 
+    expose_headers=["Server-Timing", CABECALHO_PROXIMO_CURSOR],
 )
 
+# Tempos por etapa no cabeçalho Server-Timing (desligado = middleware não registrado, custo zero)
+if SERVER_TIMING_ATIVO:
+    app.add_middleware(MiddlewareServerTiming)
+
 
 app.include_router(auth_router)
 
 app.include_router(candidato_router)
 
-app.include_router(simulacao_direta_router)
\ No newline at end of file
+app.include_router(simulacao_direta_router)
+
+app.include_router(metricas_router)
+
+app.include_router(modelo_router)
+
+app.include_router(estatisticas_router)
+
+app.include_router(exportacao_router)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam o pacote `db` como a API (rodando a partir da pasta Backend)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+"""
+Agendador de micro-lotes: Futures cancelados pelo chamador (cliente desconectado) e lotes com
+erro não podem derrubar a thread do agendador.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from db.agendador_inferencia import AgendadorInferencia
+
+
+class _LoteBloqueado:
+    """funcao_lote que segura o primeiro lote até `liberar` e falha nos itens marcados como ruins."""
+
+    def __init__(self):
+        self.em_execucao = threading.Event()
+        self.liberar = threading.Event()
+        self.lotes = []
+
+    def __call__(self, itens):
+        self.lotes.append([item["id"] for item in itens])
+        if len(self.lotes) == 1:
+            self.em_execucao.set()
+            self.liberar.wait(5)
+        if any(item.get("ruim") for item in itens):
+            raise ValueError("item inválido")
+        return [f"resultado {item['id']}" for item in itens]
+
+
+@pytest.fixture
+def agendador():
+    funcao = _LoteBloqueado()
+    agendador = AgendadorInferencia(funcao, janela_ms=0.5, max_lote=8, max_fila=32)
+    agendador.funcao = funcao
+    yield agendador
+    funcao.liberar.set()
+    agendador.parar()
+
+
+def test_item_cancelado_na_fila_nao_derruba_a_thread(agendador):
+    primeiro = agendador.enviar({"id": 1})
+    assert agendador.funcao.em_execucao.wait(5)
+
+    cancelado = agendador.enviar({"id": 2})
+    assert cancelado.cancel()
+    seguinte = agendador.enviar({"id": 3})
+    agendador.funcao.liberar.set()
+
+    assert primeiro.result(timeout=5) == "resultado 1"
+    assert seguinte.result(timeout=5) == "resultado 3"
+    assert all(2 not in lote for lote in agendador.funcao.lotes)
+    assert agendador._thread.is_alive()
+    assert agendador.enviar({"id": 4}).result(timeout=5) == "resultado 4"
+
+
+def test_cancelamento_pelo_asyncio(agendador):
+    async def _cenario():
+        primeiro = asyncio.wrap_future(agendador.enviar({"id": 1}))
+        await asyncio.get_running_loop().run_in_executor(None, agendador.funcao.em_execucao.wait, 5)
+        desistente = asyncio.wrap_future(agendador.enviar({"id": 2}))
+        desistente.cancel()  # cancela também o Future da fila
+        agendador.funcao.liberar.set()
+        assert await asyncio.wait_for(primeiro, 5) == "resultado 1"
+        return await asyncio.wait_for(asyncio.wrap_future(agendador.enviar({"id": 3})), 5)
+
+    assert asyncio.run(_cenario()) == "resultado 3"
+
+
+def test_lote_com_erro_isola_o_item_ruim(agendador):
+    agendador.funcao.liberar.set()
+    agendador.enviar({"id": 0}).result(timeout=5)
+
+    futuros = [agendador.enviar({"id": i, "ruim": i == 2}) for i in range(1, 4)]
+    cancelado = agendador.enviar({"id": 9})
+    cancelado.cancel()
+    assert futuros[0].result(timeout=5) == "resultado 1"
+    with pytest.raises(ValueError):
+        futuros[1].result(timeout=5)
+    assert futuros[2].result(timeout=5) == "resultado 3"
+    assert agendador.enviar({"id": 5}).result(timeout=5) == "resultado 5"
+
+
+def test_enviar_reinicia_thread_morta(agendador):
+    agendador.funcao.liberar.set()
+    agendador.enviar({"id": 1}).result(timeout=5)
+    # Simula a thread encerrada sem passar por parar() (referência antiga ainda guardada)
+    thread = agendador._thread
+    agendador._fila.put(None)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert agendador.enviar({"id": 2}).result(timeout=5) == "resultado 2"
@@ -0,0 +1,62 @@
+"""
+Reconstrução dos agregados com simulações arquivadas: o ID é a chave, então linhas repetidas no
+arquivo (ou arquivadas e ainda na tabela, após uma falha da retenção) não são contadas duas vezes.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from db import agregados, crud, models, retencao
+from db.database import criar_engine
+
+
+@pytest.fixture
+def sessao(tmp_path):
+    engine = criar_engine(f"sqlite:///{tmp_path / 'agregados.db'}")
+    models.Base.metadata.create_all(engine)
+    fabrica = sessionmaker(bind=engine)
+    try:
+        yield fabrica
+    finally:
+        engine.dispose()
+
+
+def _simulacoes(n: int):
+    aleatorio = random.Random(0)
+    agora = datetime.utcnow()
+    return [{
+        "data_simulacao": agora - timedelta(days=aleatorio.randint(0, 300)),
+        "idade": 20, "sexo": "Feminino", "pcd": False,
+        "raca_beneficiario": aleatorio.choice(["Parda", "Branca"]),
+        "regiao_beneficiario": aleatorio.choice(["Sul", "Norte"]),
+        "modalidade_ensino": "EAD", "nome_turno": "Noturno", "modalidade_concorrencia": "Ampla",
+        "nome_curso": aleatorio.choice(["Direito", "Medicina", "Pedagogia"]),
+        "nome_instituicao": aleatorio.choice(["USP", "UFRJ"]),
+        "classificacao": aleatorio.choice(["Bolsa Integral", "Bolsa Parcial"]),
+    } for _ in range(n)]
+
+
+def test_reconstrucao_conta_cada_id_uma_vez(sessao, tmp_path):
+    pasta = str(tmp_path / "arquivo")
+    with sessao() as db:
+        crud.registrar_simulacoes_lote(db, _simulacoes(1200))
+        esperado = agregados.obter_estatisticas(db)
+
+    resumo = retencao.aplicar_retencao(sessao, dias=90, pasta=pasta, lote=200, pausa_ms=0)
+    assert resumo["arquivadas"] > 0
+
+    with sessao() as db:
+        colunas = list(models.Simulacao.__table__.columns)
+        # Falha depois do fsync e antes do commit: as mesmas linhas arquivadas de novo ...
+        arquivadas = list(retencao.ler_arquivo(pasta))
+        retencao._arquivar(arquivadas[:150], pasta)
+        # ... e linhas no arquivo que continuam na tabela (DELETE desfeito)
+        na_tabela = [dict(linha) for linha in db.execute(select(*colunas).limit(100)).mappings()]
+        retencao._arquivar(na_tabela, pasta)
+
+        lidas = agregados.reconstruir_agregados(db, pasta=pasta)
+        assert lidas == 1200
+        assert agregados.obter_estatisticas(db) == esperado
@@ -0,0 +1,157 @@
+"""
+Paridade da FlorestaCompilada com o RandomForestClassifier do sklearn.
+
+O sklearn converte X para float32 e compara com limiares em float64 (`x <= limiar` vai para a
+esquerda); as entradas exatamente no limiar e no float32 vizinho são as que denunciam qualquer
+diferença de tipo ou de comparação.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from db.bundle_modelo import BundleInvalido, conferir_floresta
+from db.floresta_compilada import FlorestaCompilada
+
+
+def _treinar(n_classes=2, semente=0, **parametros):
+    rng = np.random.default_rng(semente)
+    X = np.column_stack([
+        rng.integers(14, 80, size=2000).astype(np.float64),  # idade
+        rng.integers(0, 2, size=(2000, 6)).astype(np.float64),  # colunas One-Hot
+        rng.normal(size=(2000, 3)) * 1e3,  # contínuas (limiares sem representação exata em float32)
+    ])
+    y = (X[:, 0] + 40 * X[:, 1] + X[:, 7] / 50 + rng.normal(scale=10, size=len(X))).astype(int) % n_classes
+    modelo = RandomForestClassifier(n_estimators=15, random_state=semente, **parametros).fit(X, y)
+    return modelo, FlorestaCompilada.de_sklearn(modelo), X
+
+
+def _nos_internos(floresta):
+    return np.flatnonzero(floresta.esquerda != np.arange(len(floresta.esquerda)))
+
+
+def _assert_paridade(modelo, floresta, X):
+    np.testing.assert_allclose(floresta.predict_proba(X), modelo.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(floresta.predict(X), modelo.predict(X))
+
+
+@pytest.mark.parametrize("n_classes, parametros", [
+    (2, {}),
+    (2, {"max_depth": 4, "criterion": "entropy"}),
+    (3, {"min_samples_leaf": 3}),
+])
+def test_entradas_aleatorias(n_classes, parametros):
+    modelo, floresta, X = _treinar(n_classes, **parametros)
+    rng = np.random.default_rng(1)
+    aleatorias = X[rng.integers(0, len(X), size=500)] + rng.normal(scale=0.5, size=(500, X.shape[1]))
+    _assert_paridade(modelo, floresta, X)
+    _assert_paridade(modelo, floresta, aleatorias)
+
+
+def test_entradas_nos_limiares():
+    modelo, floresta, X = _treinar()
+    nos = _nos_internos(floresta)
+    linhas = X[np.arange(len(nos)) % len(X)]
+    limiares = floresta.limiar[nos]
+    for valores in (
+        limiares,  # limiar em float64 (o cast para float32 pode cair de qualquer lado)
+        limiares.astype(np.float32),  # exatamente o float32 mais próximo
+        np.nextafter(limiares.astype(np.float32), np.float32(np.inf)),
+        np.nextafter(limiares.astype(np.float32), np.float32(-np.inf)),
+    ):
+        X_borda = linhas.copy()
+        X_borda[np.arange(len(nos)), floresta.feature[nos]] = valores
+        _assert_paridade(modelo, floresta, X_borda)
+
+
+def test_entradas_extremas():
+    modelo, floresta, X = _treinar()
+    extremos = np.array([
+        np.zeros(X.shape[1]),
+        np.full(X.shape[1], -1e30),
+        np.full(X.shape[1], 1e30),
+        np.full(X.shape[1], np.finfo(np.float32).max),
+        np.full(X.shape[1], np.finfo(np.float32).tiny),
+    ])
+    _assert_paridade(modelo, floresta, extremos)
+
+
+def test_uma_linha_igual_ao_lote():
+    modelo, floresta, X = _treinar()
+    lote = floresta.predict_proba(X[:50])
+    for indice in range(50):
+        np.testing.assert_array_equal(floresta.predict_proba(X[indice:indice + 1])[0], lote[indice])
+
+
+def test_conferencia_recusa_comparacao_estrita():
+    modelo, floresta, _ = _treinar()
+    conferir_floresta(floresta, modelo)
+    # `<` no lugar de `<=`: só muda o caminho das entradas exatamente no limiar
+    floresta.limiar = np.nextafter(floresta.limiar, -np.inf)
+    with pytest.raises(BundleInvalido):
+        conferir_floresta(floresta, modelo)
+
+
+def _bundle_minimo(caminho):
+    import pandas as pd
+    from db.bundle_modelo import salvar_bundle
+    from db.esquema_features import montar_matriz_treino
+
+    rng = np.random.default_rng(0)
+    n = 300
+    dados = pd.DataFrame({
+        'IDADE': rng.integers(17, 60, size=n),
+        'SEXO_BENEFICIARIO_BOLSA': rng.choice(['F', 'M'], n),
+        'STATUS_DEFICIENCIA_TEXT': rng.choice(['Sim', 'Não'], n),
+        'RACA_BENEFICIARIO_BOLSA': rng.choice(['Parda', 'Branca'], n),
+        'REGIAO_BENEFICIARIO_BOLSA': rng.choice(['SUDESTE', 'SUL'], n),
+        'MODALIDADE_ENSINO_BOLSA': rng.choice(['PRESENCIAL', 'EAD'], n),
+        'NOME_TURNO_CURSO_BOLSA': rng.choice(['Noturno', 'Matutino'], n),
+        'NOME_IES_BOLSA': rng.choice(['Universidade A', 'Universidade B', 'Faculdade C'], n),
+        'NOME_CURSO_BOLSA': rng.choice(['Direito', 'Pedagogia', 'Enfermagem'], n),
+    })
+    top_ies, top_cursos = ['Universidade A', 'Universidade B'], ['Direito', 'Pedagogia']
+    X = montar_matriz_treino(dados, top_ies, top_cursos)
+    modelo = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, rng.integers(0, 2, size=n))
+    salvar_bundle(str(caminho), modelo, list(X.columns), top_ies, top_cursos)
+
+
+def test_carga_confia_na_conferencia_do_manifesto(tmp_path, monkeypatch):
+    from db import bundle_modelo, ml_model
+
+    caminho = tmp_path / "modelo.bundle"
+    _bundle_minimo(caminho)
+    assert bundle_modelo.ler_manifesto(str(caminho))["conferencia_floresta"]["ok"]
+    monkeypatch.setattr(ml_model, "BACKEND_INFERENCIA", "compilado")
+    monkeypatch.setattr(ml_model, "CONFERIR_FLORESTA_NA_CARGA", False)
+
+    def _sem_unpickling(*_):
+        raise AssertionError("a carga não deveria desserializar o estimador")
+
+    monkeypatch.setattr(bundle_modelo, "_ler_estimador", _sem_unpickling)
+    contexto = ml_model._carregar_de_bundle(str(caminho))
+    assert contexto.floresta is not None
+    assert isinstance(contexto.modelo, ml_model.EstimadorSobDemanda)
+    assert not contexto.modelo.carregado
+
+
+def test_carga_volta_para_sklearn_se_a_floresta_divergir(tmp_path, monkeypatch):
+    from db import ml_model
+
+    caminho = tmp_path / "modelo.bundle"
+    _bundle_minimo(caminho)
+    monkeypatch.setattr(ml_model, "BACKEND_INFERENCIA", "compilado")
+    monkeypatch.setattr(ml_model, "CONFERIR_FLORESTA_NA_CARGA", True)
+
+    contexto = ml_model._carregar_de_bundle(str(caminho))
+    assert contexto.floresta is not None
+    assert isinstance(contexto.modelo, ml_model.EstimadorSobDemanda)
+
+    def _divergente(floresta, modelo):
+        raise BundleInvalido("A floresta compilada diverge do predict_proba do estimador.")
+
+    monkeypatch.setattr(ml_model, "conferir_floresta", _divergente)
+    contexto = ml_model._carregar_de_bundle(str(caminho))
+    assert contexto.floresta is None
+    assert isinstance(contexto.modelo, RandomForestClassifier)
+    assert len(ml_model._prever(contexto, contexto.codificador.matriz_de_chaves(
+        ml_model._chaves_sinteticas(contexto.codificador, 4)))) == 4
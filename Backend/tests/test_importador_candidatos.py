@@ -0,0 +1,52 @@
+"""
+Leitura incremental da importação em streaming: linhas quebradas entre pedaços do corpo e o
+limite de tamanho de linha (um corpo sem quebras de linha não pode crescer sem limite).
+"""
+import asyncio
+
+import pytest
+
+from db.importador_candidatos import LinhaMuitoLonga, registros_csv, registros_ndjson
+
+
+async def _pedacos(dados: bytes, tamanho: int = 7):
+    for inicio in range(0, len(dados), tamanho):
+        yield dados[inicio:inicio + tamanho]
+
+
+def _ler(leitor, dados: bytes, **kwargs):
+    async def _coletar():
+        return [item async for item in leitor(_pedacos(dados), **kwargs)]
+    return asyncio.run(_coletar())
+
+
+def test_ndjson_com_linhas_quebradas_entre_pedacos():
+    itens = _ler(registros_ndjson, b'{"nome": "Ana"}\n\n{"nome": "Bruno"}\n{quebrado\n')
+    assert [numero for numero, _ in itens] == [1, 3, 4]
+    assert itens[1][1] == {"nome": "Bruno"}
+    assert isinstance(itens[2][1], ValueError)
+
+
+def test_csv_com_campo_multilinha():
+    itens = _ler(registros_csv, b'nome,instituicao.sigla\n"Ana\nMaria",UFX\nBruno,UFY\n')
+    assert itens == [(2, {"nome": "Ana\nMaria", "instituicao": {"sigla": "UFX"}}),
+                     (4, {"nome": "Bruno", "instituicao": {"sigla": "UFY"}})]
+
+
+def test_corpo_sem_quebra_de_linha_para_no_limite():
+    with pytest.raises(LinhaMuitoLonga) as erro:
+        _ler(registros_ndjson, b'{"nome": "' + b"a" * 10_000, limite=1024)
+    assert erro.value.numero == 1
+
+
+def test_linha_longa_no_meio_do_arquivo():
+    dados = b'{"nome": "Ana"}\n{"nome": "' + b"b" * 2000 + b'"}\n{"nome": "Caio"}\n'
+    with pytest.raises(LinhaMuitoLonga) as erro:
+        _ler(registros_ndjson, dados, limite=1024)
+    assert erro.value.numero == 2
+
+
+def test_csv_com_aspas_sem_fechar_para_no_limite():
+    dados = b'nome,email\n"Ana' + b"\nlinha curta" * 500
+    with pytest.raises(LinhaMuitoLonga):
+        _ler(registros_csv, dados, limite=1024)
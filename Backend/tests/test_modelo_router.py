@@ -0,0 +1,51 @@
+"""
+POST /admin/modelo/recarregar só troca o modelo com o token de administração (PROUNI_ADMIN_TOKEN).
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from db.auth import auth
+from db.routers import modelo_router
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    recargas = []
+
+    def _disparar(caminho):
+        recargas.append(caminho)
+        return True
+
+    monkeypatch.setattr(modelo_router, "disparar_recarga", _disparar)
+    app = FastAPI()
+    app.include_router(modelo_router.router)
+    cliente = TestClient(app)
+    cliente.recargas = recargas
+    return cliente
+
+
+def test_sem_segredo_configurado_a_rota_fica_desativada(cliente, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "")
+    resposta = cliente.post("/admin/modelo/recarregar", headers={"Authorization": "Bearer qualquer"})
+    assert resposta.status_code == 403
+    assert cliente.recargas == []
+
+
+@pytest.mark.parametrize("cabecalhos", [{}, {"Authorization": "Bearer errado"}, {"Authorization": "Bearer é".encode("latin-1")}])
+def test_token_ausente_ou_errado(cliente, monkeypatch, cabecalhos):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "segredo-admin")
+    resposta = cliente.post("/admin/modelo/recarregar", headers=cabecalhos)
+    assert resposta.status_code == 401
+    assert cliente.recargas == []
+
+
+def test_token_correto_dispara_a_recarga(cliente, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "segredo-admin")
+    resposta = cliente.post("/admin/modelo/recarregar", headers={"Authorization": "Bearer segredo-admin"})
+    assert resposta.status_code == 202
+    assert cliente.recargas == [None]
+
+
+def test_consulta_do_modelo_continua_aberta(cliente):
+    assert cliente.get("/admin/modelo").status_code == 200
@@ -0,0 +1,63 @@
+"""
+As buscas frequentes do CRUD usam índice em um banco recém-migrado (nenhum "SCAN <tabela>" no
+EXPLAIN QUERY PLAN). Roda num SQLite temporário, nunca no banco da aplicação.
+"""
+import pytest
+
+from db.database import criar_engine
+from db.plano_consultas import BUSCAS, preparar_banco, verificar_planos
+
+BUSCAS_OBRIGATORIAS = [
+    "get_curso_by_name",
+    "get_or_create_curso",
+    "get_or_create_instituicao",
+    "create_candidato (email já cadastrado)",
+    "delete_curso (inscrições vinculadas)",
+]
+
+
+@pytest.fixture(scope="module")
+def resultados(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp("plano") / "plano_consultas.db"
+    engine = criar_engine(f"sqlite:///{caminho}")
+    try:
+        preparar_banco(engine)
+        yield {resultado["busca"]: resultado for resultado in verificar_planos(engine)}
+    finally:
+        engine.dispose()
+
+
+def test_todas_as_buscas_foram_verificadas(resultados):
+    assert set(resultados) == set(BUSCAS)
+    for nome in BUSCAS_OBRIGATORIAS:
+        assert resultados[nome]["consultas"], f"{nome} não emitiu nenhum SELECT"
+
+
+@pytest.mark.parametrize("nome", list(BUSCAS))
+def test_busca_sem_varredura(resultados, nome):
+    varreduras = [
+        (consulta["sql"], consulta["varreduras"])
+        for consulta in resultados[nome]["consultas"] if consulta["varreduras"]
+    ]
+    assert not varreduras
+
+
+def test_nome_do_curso_usa_indice_de_expressao(resultados):
+    planos = [etapa for consulta in resultados["get_curso_by_name"]["consultas"] for etapa in consulta["plano"]]
+    assert any("ix_curso_nome_curso_lower" in etapa for etapa in planos)
+
+
+def test_nada_fica_gravado(resultados, tmp_path):
+    # verificar_planos desfaz tudo o que as funções do crud gravaram
+    from sqlalchemy import text
+
+    caminho = tmp_path / "vazio.db"
+    engine = criar_engine(f"sqlite:///{caminho}")
+    try:
+        preparar_banco(engine)
+        verificar_planos(engine)
+        with engine.connect() as conexao:
+            for tabela in ("candidato", "curso", "instituicao"):
+                assert conexao.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar() == 0
+    finally:
+        engine.dispose()
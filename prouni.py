@@ -953,6 +953,66 @@ random_search = RandomizedSearchCV(
 # Executar o Fit
 random_search.fit(entrada_treino, saida_treino)
 
+"""Exportação do modelo para a API
+
+Um único arquivo (Backend/db/modelo.bundle) com o estimador, a ordem das colunas, os vocabulários
+Top-N e a impressão digital da base de treino. A API recusa o bundle se algo não bater.
+
+O modelo exportado não é o da busca acima (treinado com as features deste notebook): ele é
+treinado de novo com as 10 entradas que a API recebe, codificadas por `montar_matriz_treino`, que
+usa a mesma normalização e o mesmo agrupamento Top-N do codificador da API.
+"""
+
+import sys
+sys.path.insert(0, 'Backend')  # pasta do repositório; no Colab, ajuste para onde o Backend foi copiado
+from db.bundle_modelo import salvar_bundle, impressao_dados_treino
+from db.esquema_features import escolher_top_n, montar_matriz_treino
+
+# Base original (sem as transformações acima), nas colunas e valores que a API recebe
+df_api = carregar_dados("../content/pda-prouni-2017.csv").dropna()
+nascimento = pd.to_datetime(df_api['DT_NASCIMENTO_BENEFICIARIO'], format='%d/%m/%Y', errors='coerce')
+dados_api = pd.DataFrame({
+    'IDADE': 2017 - nascimento.dt.year,
+    'SEXO_BENEFICIARIO_BOLSA': df_api['SEXO_BENEFICIARIO_BOLSA'],
+    'STATUS_DEFICIENCIA_TEXT': df_api['BENEFICIARIO_DEFICIENTE_FISICO'].map({'S': 'Sim', 'N': 'Não'}),
+    'RACA_BENEFICIARIO_BOLSA': df_api['RACA_BENEFICIARIO_BOLSA'],
+    'REGIAO_BENEFICIARIO_BOLSA': df_api['REGIAO_BENEFICIARIO_BOLSA'],
+    'MODALIDADE_ENSINO_BOLSA': df_api['MODALIDADE_ENSINO_BOLSA'],
+    'NOME_TURNO_CURSO_BOLSA': df_api['NOME_TURNO_CURSO_BOLSA'],
+    'NOME_IES_BOLSA': df_api['NOME_IES_BOLSA'],
+    'NOME_CURSO_BOLSA': df_api['NOME_CURSO_BOLSA'],
+})
+saida_api = (df_api['TIPO_BOLSA'] == 'BOLSA INTEGRAL').astype(int)
+
+# Top-N usados no agrupamento de IES e cursos (os demais viram OUTRAS_IES / OUTROS_CURSOS),
+# contados pelo nome normalizado, como a API compara
+top_ies = escolher_top_n(dados_api['NOME_IES_BOLSA'], 50)
+top_cursos = escolher_top_n(dados_api['NOME_CURSO_BOLSA'], 100)
+entrada_api = montar_matriz_treino(dados_api, top_ies, top_cursos)
+
+entrada_api_treino, entrada_api_teste, saida_api_treino, saida_api_teste = dividir_dados(
+    entrada=entrada_api,
+    saida=saida_api,
+    test_size=0.3,
+    random_state=42
+)
+
+# Hiperparâmetros da busca acima
+modelo_api = RandomForestClassifier(random_state=42, n_jobs=-1, **random_search.best_params_)
+modelo_api.fit(entrada_api_treino, saida_api_treino)
+print(f"Acurácia no teste (features da API): {accuracy_score(saida_api_teste, modelo_api.predict(entrada_api_teste))*100:.2f}")
+
+manifesto = salvar_bundle(
+    'Backend/db/modelo.bundle',
+    modelo_api,
+    colunas=list(entrada_api.columns),
+    top_ies=top_ies,
+    top_cursos=top_cursos,
+    impressao_treino=impressao_dados_treino(entrada_api_treino, saida_api_treino),
+    frequencias_colunas=entrada_api_treino.sum(),
+)
+print(f"Bundle {manifesto['versao']} exportado (sha256 {manifesto['sha256_conteudo'][:12]}).")
+
 """Rede neural"""
 
 from sklearn.neural_network import MLPClassifier
@@ -8,7 +8,7 @@ export const authService = {
    * Faz login com email e senha
    * @param {string} email 
    * @param {string} senha 
-   * @returns {Promise<{access_status: string, candidato: Object}>}
+   * @returns {Promise<{access_status: string, access_token: string, token_type: string, expires_in: number, candidato: Object}>}
    */
   async login(email, senha) {
     const response = await api.post('/login', { email, senha })